@@ -14,6 +14,8 @@ from app.core.config import settings
 from app.models.user import User
 from app.models.video import Video
 from app.models.vote import Vote
+from app.models.queue import QueueMessage, DeadLetterMessage
+from app.models.processing_run import ProcessingRun
 
 # This is the Alembic Config object
 config = context.config
@@ -0,0 +1,23 @@
+"""Add pipeline_version to videos
+
+Revision ID: 5b1e9c3a7d42
+Revises: 28074d007126
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5b1e9c3a7d42'
+down_revision = '28074d007126'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('pipeline_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'pipeline_version')
@@ -0,0 +1,25 @@
+"""Add claim lease columns to videos
+
+Revision ID: 9d2f4a6c8e13
+Revises: 5b1e9c3a7d42
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9d2f4a6c8e13'
+down_revision = '5b1e9c3a7d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('lease_owner', sa.String(length=255), nullable=True))
+    op.add_column('videos', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'lease_expires_at')
+    op.drop_column('videos', 'lease_owner')
@@ -0,0 +1,51 @@
+"""Add video_processing_runs table with per-stage timings
+
+Revision ID: a7c2e5f8b316
+Revises: f3b6c9d2a481
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2e5f8b316'
+down_revision = 'f3b6c9d2a481'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('video_processing_runs',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('video_id', sa.String(), nullable=False),
+        sa.Column('worker_id', sa.String(), nullable=True),
+        sa.Column('outcome', sa.String(), nullable=False),
+        sa.Column('failed_stage', sa.String(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('resumed_at', sa.String(), nullable=True),
+        sa.Column('engine', sa.String(), nullable=True),
+        sa.Column('encoding_profile', sa.String(), nullable=True),
+        sa.Column('pipeline_version', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('input_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('output_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('fetch_seconds', sa.Float(), nullable=True),
+        sa.Column('probe_seconds', sa.Float(), nullable=True),
+        sa.Column('transform_seconds', sa.Float(), nullable=True),
+        sa.Column('encode_seconds', sa.Float(), nullable=True),
+        sa.Column('publish_seconds', sa.Float(), nullable=True),
+        sa.Column('record_seconds', sa.Float(), nullable=True),
+        sa.Column('total_seconds', sa.Float(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_video_processing_runs_video_id'), 'video_processing_runs', ['video_id'], unique=False)
+    op.create_index('ix_video_processing_runs_finished_at', 'video_processing_runs', ['finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_video_processing_runs_finished_at', table_name='video_processing_runs')
+    op.drop_index(op.f('ix_video_processing_runs_video_id'), table_name='video_processing_runs')
+    op.drop_table('video_processing_runs')
@@ -0,0 +1,31 @@
+"""Add probed source properties to videos
+
+Revision ID: b9d4f1a6c273
+Revises: a7c2e5f8b316
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4f1a6c273'
+down_revision = 'a7c2e5f8b316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('source_width', sa.Integer(), nullable=True))
+    op.add_column('videos', sa.Column('source_height', sa.Integer(), nullable=True))
+    op.add_column('videos', sa.Column('source_duration', sa.Float(), nullable=True))
+    op.add_column('videos', sa.Column('source_fps', sa.Float(), nullable=True))
+    op.add_column('videos', sa.Column('source_codec', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'source_codec')
+    op.drop_column('videos', 'source_fps')
+    op.drop_column('videos', 'source_duration')
+    op.drop_column('videos', 'source_height')
+    op.drop_column('videos', 'source_width')
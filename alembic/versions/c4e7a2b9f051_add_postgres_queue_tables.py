@@ -0,0 +1,49 @@
+"""Add PostgreSQL queue backend tables
+
+Revision ID: c4e7a2b9f051
+Revises: 9d2f4a6c8e13
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c4e7a2b9f051'
+down_revision = '9d2f4a6c8e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('queue_messages',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('queue_name', sa.String(length=255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('receipt_handle', sa.String(length=64), nullable=True),
+        sa.Column('receive_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('visible_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('receipt_handle')
+    )
+    op.create_index('ix_queue_messages_queue_visible', 'queue_messages', ['queue_name', 'visible_at'], unique=False)
+
+    op.create_table('queue_dead_letters',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('message_id', sa.BigInteger(), nullable=False),
+        sa.Column('queue_name', sa.String(length=255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('receive_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('dead_lettered_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_queue_dead_letters_queue_name'), 'queue_dead_letters', ['queue_name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_queue_dead_letters_queue_name'), table_name='queue_dead_letters')
+    op.drop_table('queue_dead_letters')
+    op.drop_index('ix_queue_messages_queue_visible', table_name='queue_messages')
+    op.drop_table('queue_messages')
@@ -0,0 +1,23 @@
+"""Add encoding_profile to videos
+
+Revision ID: e8a1d3f5b720
+Revises: c4e7a2b9f051
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e8a1d3f5b720'
+down_revision = 'c4e7a2b9f051'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('encoding_profile', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'encoding_profile')
@@ -0,0 +1,25 @@
+"""Add thumbnail and preview sprite paths to videos
+
+Revision ID: f3b6c9d2a481
+Revises: e8a1d3f5b720
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f3b6c9d2a481'
+down_revision = 'e8a1d3f5b720'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('thumbnail_path', sa.String(), nullable=True))
+    op.add_column('videos', sa.Column('preview_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'preview_path')
+    op.drop_column('videos', 'thumbnail_path')
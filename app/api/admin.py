@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.core.database import get_db
+from app.core.auth import require_admin_token
+from app.services.processing_run_service import ProcessingRunService
+from app.schemas.processing_run import ProcessingRunStats, StageTimings
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/processing-runs/stats", response_model=ProcessingRunStats)
+def get_processing_run_stats(
+    hours: float = Query(default=24, gt=0, le=24 * 90),
+    until: Optional[datetime] = None,
+    outcome: str = Query(default="processed", pattern="^(processed|failed)$"),
+    db: Session = Depends(get_db)
+):
+    """p50/p95/p99 seconds per pipeline stage over the `hours` before `until` (default now)"""
+    until = until or datetime.now(timezone.utc)
+    since = until - timedelta(hours=hours)
+
+    percentiles = ProcessingRunService.stage_percentiles(db, since, until, outcome)
+    stages = [
+        StageTimings(
+            stage=stage,
+            runs=values["count"],
+            p50_seconds=values["p50"],
+            p95_seconds=values["p95"],
+            p99_seconds=values["p99"]
+        )
+        for stage, values in percentiles.items()
+    ]
+    return ProcessingRunStats(
+        since=since,
+        until=until,
+        outcome=outcome,
+        runs=ProcessingRunService.count_runs(db, since, until),
+        stages=stages
+    )
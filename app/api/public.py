@@ -5,7 +5,7 @@ from app.core.database import get_db
 from app.core.auth import get_current_active_user
 from app.services.video_service import VideoService
 from app.services.vote_service import VoteService
-from app.services.file_storage import get_file_storage
+from app.services.file_storage import get_file_storage, get_public_url
 from app.schemas.vote import VoteResponse, RankingItem, PublicVideoResponse
 from app.schemas.user import UserResponse
 from app.models.video import VideoStatus
@@ -51,6 +51,8 @@ def get_public_videos(
             username=f"{video.owner.first_name} {video.owner.last_name}",
             city=video.owner.city,
             processed_url=processed_url,
+            thumbnail_url=get_public_url(file_storage, video.thumbnail_path, f"/api/videos/{video.id}/thumbnail"),
+            preview_url=get_public_url(file_storage, video.preview_path, f"/api/videos/{video.id}/preview"),
             votes=vote_count
         )
         result.append(video_data)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import List
 import os
@@ -7,7 +8,7 @@ import logging
 from app.core.database import get_db
 from app.core.auth import get_current_active_user
 from app.services.video_service import VideoService
-from app.services.file_storage import get_file_storage
+from app.services.file_storage import get_file_storage, get_public_url
 from app.schemas.video import (
     VideoCreate, VideoResponse, VideoListResponse, 
     VideoUploadResponse, VideoDeleteResponse
@@ -142,7 +143,9 @@ def get_my_videos(
             status=video.status,
             uploaded_at=video.created_at,
             processed_at=video.processed_at,
-            processed_url=processed_url
+            processed_url=processed_url,
+            thumbnail_url=get_public_url(file_storage, video.thumbnail_path, f"/api/videos/{video.id}/thumbnail"),
+            preview_url=get_public_url(file_storage, video.preview_path, f"/api/videos/{video.id}/preview")
         )
         result.append(video_data)
     
@@ -205,6 +208,30 @@ def get_video_detail(
     )
 
 
+def _local_preview_response(db: Session, video_id: str, path_attribute: str) -> FileResponse:
+    """Serve a locally stored preview image of a processed video (they are public, like the feed)"""
+    video = VideoService.get_video_by_id_any_user(db, video_id)
+    stored_path = getattr(video, path_attribute) if video and video.status == VideoStatus.processed else None
+    if not stored_path or stored_path.startswith(('http://', 'https://', 's3://')) or not os.path.isfile(stored_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Imagen no encontrada"
+        )
+    return FileResponse(stored_path, media_type="image/jpeg")
+
+
+@router.get("/{video_id}/thumbnail")
+def get_video_thumbnail(video_id: str, db: Session = Depends(get_db)):
+    """Poster image of a processed video (local storage)"""
+    return _local_preview_response(db, video_id, "thumbnail_path")
+
+
+@router.get("/{video_id}/preview")
+def get_video_preview(video_id: str, db: Session = Depends(get_db)):
+    """Sprite sheet of a processed video for feed previews (local storage)"""
+    return _local_preview_response(db, video_id, "preview_path")
+
+
 @router.delete("/{video_id}", response_model=VideoDeleteResponse)
 def delete_video(
     video_id: str,
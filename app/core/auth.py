@@ -1,4 +1,5 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
@@ -44,4 +45,12 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def require_admin_token(x_admin_token: str = Header(default="")):
+    """Allow admin endpoints only with the X-Admin-Token header matching ADMIN_API_TOKEN"""
+    if not settings.admin_api_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="API de administración deshabilitada")
+    if not secrets.compare_digest(x_admin_token.encode(), settings.admin_api_token.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token de administración inválido")
@@ -24,6 +24,8 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Shared secret for /api/admin endpoints (X-Admin-Token header); empty disables them
+    admin_api_token: str = ""
     
     # Redis Configuration
     # Default: Local development (Docker Compose service name "redis")
@@ -42,6 +44,12 @@ class Settings(BaseSettings):
     s3_bucket_name: str = ""
     s3_upload_prefix: str = "uploads/"
     s3_processed_prefix: str = "processed_videos/"
+    s3_presigned_url_expiration: int = 3600  # Seconds a presigned URL stays valid
+    s3_multipart_threshold_mb: int = 16  # Uploads from a file above this size use multipart
+    s3_multipart_chunksize_mb: int = 8  # Multipart part size (S3 minimum is 5 MiB)
+    # How workers read S3 originals: "download" (full copy to /tmp before decoding) or
+    # "stream" (ffmpeg reads a presigned URL with ranged GETs and stops at video_max_duration)
+    worker_input_mode: str = "download"
     
     # AWS Credentials (required if not using IAM roles)
     # Production: Overridden by .env with actual AWS credentials
@@ -55,6 +63,16 @@ class Settings(BaseSettings):
     celery_broker_url: str = "redis://redis:6379/0"
     celery_result_backend: str = "redis://redis:6379/0"
     
+    # Queue backend used by the upload API and the worker loop
+    # "sqs" (default), "postgres" (FOR UPDATE SKIP LOCKED table in the application database)
+    # or "redis" (Redis Stream with a consumer group)
+    queue_backend: str = "sqs"
+    queue_name: str = "video_processing"  # Table queue name / Redis stream key
+    queue_poll_interval: float = 1.0  # Seconds between polls while long polling a database queue
+    queue_redis_url: str = ""  # Defaults to redis_url
+    queue_consumer_group: str = "video_workers"
+    queue_encode_name: str = "video_encoding"  # Encode queue of the split pipeline (table queue / stream)
+    
     # SQS Configuration (New - Entrega 4)
     # Production: Overridden by .env with actual SQS queue URL
     sqs_queue_url: str = ""
@@ -62,6 +80,48 @@ class Settings(BaseSettings):
     sqs_visibility_timeout: int = 300  # 5 minutes
     sqs_max_receive_count: int = 3  # Max retries before DLQ
     sqs_wait_time_seconds: int = 20  # Long polling wait time
+    sqs_encode_queue_url: str = ""  # Encode queue of the split pipeline (see worker_role)
+    sqs_heartbeat_interval: int = 60  # Seconds between visibility extensions of in-flight messages
+    sqs_max_job_seconds: int = 3600  # Stop extending visibility after this long (hung jobs get redelivered)
+    
+    # Video claim lease: a worker owns a video in 'processing' until the lease expires.
+    # The job renews it every sqs_heartbeat_interval seconds; keep it at most
+    # sqs_visibility_timeout - sqs_heartbeat_interval so the lease of a crashed worker has
+    # expired by the time its message is redelivered (otherwise redeliveries find it busy
+    # and use up sqs_max_receive_count)
+    video_claim_lease_seconds: int = 240
+    
+    # Worker role: "all" runs every stage off the upload queue; with a split pipeline "probe"
+    # workers validate uploads, record their metadata and forward valid ones to the encode
+    # queue, which "encode" workers consume (each role scales on its own)
+    worker_role: str = "all"
+    worker_probe_concurrency: int = 4  # Uploads probed at once by a probe worker (network-bound)
+    video_min_duration: float = 0.5  # Shorter sources are rejected by the probe stage
+    
+    # SQS Worker concurrency
+    # 1 = sequential worker, N > 1 = N processing slots, 0 = auto (CPU and memory)
+    worker_concurrency: int = 1
+    worker_slot_memory_mb: int = 700  # Memory budget per slot when sizing automatically
+    # Jobs run in child processes recycled after this many jobs or once their RSS after a job
+    # crosses the threshold (0 disables a limit; both 0 runs the sequential worker in-process)
+    worker_max_jobs_per_child: int = 50
+    worker_max_child_rss_mb: int = 1024
+    # Per-job scratch files (downloads, segments, outputs); point at tmpfs or NVMe when available
+    worker_scratch_dir: str = "/tmp/anb_jobs"
+    worker_scratch_min_free_mb: int = 1024  # Free space required before taking a new job
+    # Downloaded originals and encoded outputs kept per video and pipeline version so a retried
+    # job resumes at its first incomplete stage; abandoned checkpoints are pruned at startup.
+    # Empty keeps them in <worker_scratch_dir>/checkpoints, on the same fast volume as the rest
+    # of the job's bytes; a directory on another volume is also covered by the admission check
+    worker_checkpoint_dir: str = ""
+    worker_checkpoint_ttl_hours: int = 24
+    # Sequential worker: download the next input and upload the previous result while the
+    # current job encodes. The depths bound how many jobs wait on each side of the encoder
+    worker_pipelined: bool = False
+    worker_prefetch_depth: int = 1
+    worker_upload_depth: int = 1
+    # Store each job's stage timings and sizes in video_processing_runs (GET /api/admin/processing-runs/stats)
+    worker_record_runs: bool = True
     
     # Environment
     # Production: Overridden by .env (ENVIRONMENT=production, DEBUG=False)
@@ -72,6 +132,47 @@ class Settings(BaseSettings):
     anb_logo_path: str = "/app/assets/anb_logo.png"
     video_max_duration: int = 30
     video_resolution: str = "720p"
+    # 16:9 output tiers: sources are rendered at the tallest tier not above their own height
+    # (never above video_resolution), so low-resolution uploads are not upscaled
+    video_output_heights: str = "360,480,720"
+    # Processing engine: "ffmpeg" (single filter-graph subprocess, falls back to moviepy) or "moviepy"
+    video_engine: str = "ffmpeg"
+    ffmpeg_binary: str = ""  # Defaults to the ffmpeg bundled with moviepy (imageio-ffmpeg)
+    # Intro/outro with the ffmpeg engine: "concat" (pre-encoded once per output spec and
+    # joined by stream copy) or "filter" (rendered in the same filter graph on every job)
+    video_bumper_mode: str = "concat"
+    worker_cache_dir: str = "/tmp/anb_worker_cache"  # Per-worker cache (bumpers, assets)
+    # LRU cache of downloaded originals (keyed by S3 key and ETag) in worker_cache_dir; 0 disables it
+    worker_source_cache_mb: int = 2048
+    # Encode one video as keyframe-aligned segments in parallel (ffmpeg engine, concat mode):
+    # 1 = off, N = N concurrent encoders, 0 = one per CPU
+    video_parallel_segments: int = 1
+    video_segment_min_seconds: float = 5.0  # Shortest segment worth a separate encoder
+    # Upload the processed video to S3 in parts while ffmpeg is still writing it (fragmented MP4)
+    video_streaming_upload: bool = False
+    # HLS ladder instead of a single MP4 (ffmpeg engine); processed_url is then the master playlist
+    video_hls_enabled: bool = False
+    video_hls_ladder: str = "360,540,720"  # Rendition heights
+    video_hls_segment_seconds: int = 4
+    # Feed previews rendered from the same decode: poster JPEG and a sprite sheet of small frames
+    video_previews_enabled: bool = True
+    video_poster_width: int = 640
+    video_sprite_interval: int = 3  # Seconds of clip between sprite tiles
+    video_sprite_columns: int = 5
+    video_sprite_tile_width: int = 160
+    # Encoding profiles (app/workers/encoding.py): "quality", "balanced" or "fast".
+    # The worker switches to encoding_backlog_profile when the queue is deeper or older
+    # than the *_high thresholds and back once it is below the *_low thresholds
+    encoding_profile: str = "quality"
+    encoding_backlog_profile: str = "fast"
+    encoding_backlog_depth_high: int = 200
+    encoding_backlog_depth_low: int = 20
+    encoding_backlog_age_high_seconds: int = 900
+    encoding_backlog_age_low_seconds: int = 120
+    encoding_policy_interval: int = 30  # Seconds between queue depth samples
+    # Bump whenever the processing output changes (watermark, intro/outro, encoding)
+    # so `python -m app.workers.reprocess --outdated` can re-render older videos
+    pipeline_version: int = 1
     
     model_config = {"env_file": ".env"}
 
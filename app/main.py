@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from app.api import auth, videos, public
+from app.api import auth, videos, public, admin
 from app.core.config import settings
 import logging
 
@@ -33,6 +33,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(videos.router, prefix="/api/videos", tags=["Videos"])
 app.include_router(public.router, prefix="/api/public", tags=["Public"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.exception_handler(Exception)
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Float, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+# Pipeline stages timed in each run (app/workers/pipeline.py), one column each
+RUN_STAGES = ("fetch", "probe", "transform", "encode", "publish", "record")
+
+
+class ProcessingRun(Base):
+    """One attempt of a worker at processing a video, with the seconds spent in each stage"""
+    __tablename__ = "video_processing_runs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    video_id = Column(String, nullable=False, index=True)  # No foreign key: runs outlive deleted videos
+    worker_id = Column(String, nullable=True)  # host:pid of the worker, as in Video.lease_owner
+    outcome = Column(String, nullable=False)  # processed or failed
+    failed_stage = Column(String, nullable=True)
+    error_message = Column(Text, nullable=True)
+    resumed_at = Column(String, nullable=True)  # Checkpoint stage the run resumed at
+    engine = Column(String, nullable=True)
+    encoding_profile = Column(String, nullable=True)
+    pipeline_version = Column(Integer, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    input_bytes = Column(BigInteger, nullable=True)  # None when the original was streamed
+    output_bytes = Column(BigInteger, nullable=True)  # None for HLS and streamed uploads
+    # Seconds per stage; None for stages the run skipped (checkpointed or never reached)
+    fetch_seconds = Column(Float, nullable=True)
+    probe_seconds = Column(Float, nullable=True)
+    transform_seconds = Column(Float, nullable=True)
+    encode_seconds = Column(Float, nullable=True)
+    publish_seconds = Column(Float, nullable=True)
+    record_seconds = Column(Float, nullable=True)
+    total_seconds = Column(Float, nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_video_processing_runs_finished_at', 'finished_at'),
+    )
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class QueueMessage(Base):
+    """Message of the PostgreSQL queue backend (app/services/postgres_queue.py)"""
+    __tablename__ = "queue_messages"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    queue_name = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    receipt_handle = Column(String, nullable=True, unique=True)  # Changes on every receive
+    receive_count = Column(Integer, nullable=False, default=0)
+    visible_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_queue_messages_queue_visible', 'queue_name', 'visible_at'),
+    )
+
+
+class DeadLetterMessage(Base):
+    """Message that exceeded the maximum receive count"""
+    __tablename__ = "queue_dead_letters"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    message_id = Column(BigInteger, nullable=False)
+    queue_name = Column(String, nullable=False, index=True)
+    body = Column(Text, nullable=False)
+    receive_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    dead_lettered_at = Column(DateTime(timezone=True), server_default=func.now())
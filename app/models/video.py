@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Enum, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
@@ -23,8 +23,20 @@ class Video(Base):
     original_filename = Column(String, nullable=False)
     original_path = Column(String, nullable=False)
     processed_path = Column(String, nullable=True)
+    thumbnail_path = Column(String, nullable=True)  # Poster image of the processed video
+    preview_path = Column(String, nullable=True)  # Sprite sheet of small frames for feed previews
     task_id = Column(String, nullable=True)  # Celery task ID
     error_message = Column(Text, nullable=True)
+    pipeline_version = Column(Integer, nullable=True)  # settings.pipeline_version that produced processed_path
+    encoding_profile = Column(String, nullable=True)  # Encoding profile of processed_path (quality, fast, ...)
+    # Original's video stream as recorded by the probe stage (display size, rotation applied)
+    source_width = Column(Integer, nullable=True)
+    source_height = Column(Integer, nullable=True)
+    source_duration = Column(Float, nullable=True)
+    source_fps = Column(Float, nullable=True)
+    source_codec = Column(String, nullable=True)
+    lease_owner = Column(String, nullable=True)  # Worker currently processing the video
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     processed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+class StageTimings(BaseModel):
+    stage: str
+    runs: int  # Runs that went through the stage
+    p50_seconds: Optional[float] = None
+    p95_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+
+
+class ProcessingRunStats(BaseModel):
+    since: datetime
+    until: datetime
+    outcome: Optional[str] = None
+    runs: Dict[str, int]  # Runs per outcome in the window
+    stages: List[StageTimings]
@@ -29,6 +29,8 @@ class VideoListResponse(BaseModel):
     uploaded_at: datetime
     processed_at: Optional[datetime] = None
     processed_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
     class Config:
         from_attributes = True
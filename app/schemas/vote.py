@@ -19,6 +19,8 @@ class PublicVideoResponse(BaseModel):
     username: str
     city: str
     processed_url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     votes: int
 
     class Config:
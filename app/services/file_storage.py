@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, BinaryIO, Callable
+import mimetypes
 import os
 import shutil
 import logging
 from app.core.config import settings
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.exceptions import ClientError
     BOTO3_AVAILABLE = True
 except ImportError:
@@ -14,6 +16,36 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+# Types browsers and HLS players need that mimetypes does not always know
+CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+    '.mp4': 'video/mp4',
+}
+
+# An HLS output is stored as a directory; its processed path is that of this playlist
+HLS_MASTER_PLAYLIST = "master.m3u8"
+
+
+def _guess_content_type(filename: str) -> Optional[str]:
+    """Content-Type to store an object with"""
+    extension = os.path.splitext(filename)[1].lower()
+    return CONTENT_TYPES.get(extension) or mimetypes.guess_type(filename)[0]
+
+
+def _read_chunk(stream: BinaryIO, size: int) -> bytes:
+    """Read up to `size` bytes, stopping short only at EOF (pipes return partial reads)"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        data = stream.read(remaining)
+        if not data:
+            break
+        chunks.append(data)
+        remaining -= len(data)
+    return b''.join(chunks)
+
+
 class FileStorageInterface(ABC):
     """Abstract interface for file storage"""
     
@@ -22,6 +54,21 @@ class FileStorageInterface(ABC):
         """Save file and return file path"""
         pass
     
+    @abstractmethod
+    def save_file_from_path(self, source_path: str, filename: str, directory: str) -> str:
+        """Save a local file without loading it into memory and return file path"""
+        pass
+    
+    @abstractmethod
+    def save_file_from_stream(self, stream: BinaryIO, filename: str, directory: str,
+                              finalize: Optional[Callable[[], None]] = None) -> str:
+        """
+        Save data read from `stream` until EOF and return file path
+        
+        `finalize` is called after EOF; if it raises, nothing is stored.
+        """
+        pass
+    
     @abstractmethod
     def get_file_path(self, filename: str, directory: str) -> str:
         """Get full file path"""
@@ -32,6 +79,11 @@ class FileStorageInterface(ABC):
         """Delete file"""
         pass
     
+    @abstractmethod
+    def delete_directory(self, dir_path: str) -> bool:
+        """Delete a directory (or S3 prefix) and every file under it"""
+        pass
+    
     @abstractmethod
     def file_exists(self, file_path: str) -> bool:
         """Check if file exists"""
@@ -62,6 +114,29 @@ class LocalFileStorage(FileStorageInterface):
         
         return file_path
     
+    def save_file_from_path(self, source_path: str, filename: str, directory: str) -> str:
+        """Copy a local file into storage (`filename` may include subdirectories)"""
+        file_path = os.path.join(directory, filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        shutil.copyfile(source_path, file_path)
+        return file_path
+    
+    def save_file_from_stream(self, stream: BinaryIO, filename: str, directory: str,
+                              finalize: Optional[Callable[[], None]] = None) -> str:
+        """Write a stream to local storage"""
+        os.makedirs(directory, exist_ok=True)
+        file_path = os.path.join(directory, filename)
+        try:
+            with open(file_path, "wb") as f:
+                shutil.copyfileobj(stream, f)
+            if finalize:
+                finalize()
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        return file_path
+    
     def get_file_path(self, filename: str, directory: str) -> str:
         """Get full file path"""
         return os.path.join(directory, filename)
@@ -76,6 +151,16 @@ class LocalFileStorage(FileStorageInterface):
         except Exception:
             return False
     
+    def delete_directory(self, dir_path: str) -> bool:
+        """Delete a directory from local storage"""
+        try:
+            if os.path.isdir(dir_path):
+                shutil.rmtree(dir_path)
+                return True
+            return False
+        except Exception:
+            return False
+    
     def file_exists(self, file_path: str) -> bool:
         """Check if file exists"""
         return os.path.exists(file_path)
@@ -140,6 +225,73 @@ class S3FileStorage(FileStorageInterface):
         except ClientError as e:
             raise Exception(f"Error uploading to S3: {str(e)}")
     
+    def save_file_from_path(self, source_path: str, filename: str, directory: str) -> str:
+        """Upload a local file to S3, in parallel multipart chunks when it is large"""
+        key = self._get_s3_key(filename, directory)
+        mb = 1024 * 1024
+        transfer_config = TransferConfig(
+            multipart_threshold=settings.s3_multipart_threshold_mb * mb,
+            multipart_chunksize=settings.s3_multipart_chunksize_mb * mb
+        )
+        extra_args = {}
+        content_type = _guess_content_type(filename)
+        if content_type:
+            extra_args['ContentType'] = content_type
+        
+        try:
+            self.s3_client.upload_file(source_path, self.bucket_name, key,
+                                       ExtraArgs=extra_args or None, Config=transfer_config)
+            return f"s3://{self.bucket_name}/{key}"
+        except ClientError as e:
+            raise Exception(f"Error uploading to S3: {str(e)}")
+    
+    def save_file_from_stream(self, stream: BinaryIO, filename: str, directory: str,
+                              finalize: Optional[Callable[[], None]] = None) -> str:
+        """
+        Upload a stream to S3 with a multipart upload, one part per chunk as it is read
+        
+        The upload is completed only if `finalize` succeeds, and aborted otherwise,
+        so a failed encoder never leaves a truncated object behind.
+        """
+        key = self._get_s3_key(filename, directory)
+        part_size = max(settings.s3_multipart_chunksize_mb, 5) * 1024 * 1024  # S3 minimum part size is 5 MiB
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=key, ContentType=_guess_content_type(filename) or 'application/octet-stream'
+        )['UploadId']
+        parts = []
+        
+        try:
+            while True:
+                chunk = _read_chunk(stream, part_size)
+                if not chunk and parts:
+                    break
+                part_number = len(parts) + 1
+                response = self.s3_client.upload_part(
+                    Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                    PartNumber=part_number, Body=chunk
+                )
+                parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+                if len(chunk) < part_size:
+                    break
+            
+            if finalize:
+                finalize()
+            
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            logger.info(f"Streamed {len(parts)} part(s) to S3: {key}")
+            return f"s3://{self.bucket_name}/{key}"
+        except Exception as e:
+            try:
+                self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            except Exception as abort_error:
+                logger.error(f"Error aborting multipart upload {upload_id}: {abort_error}")
+            if isinstance(e, ClientError):
+                raise Exception(f"Error uploading to S3: {str(e)}")
+            raise
+    
     def get_file_path(self, filename: str, directory: str) -> str:
         """
         Get S3 file URL.
@@ -155,27 +307,27 @@ class S3FileStorage(FileStorageInterface):
         direct_url = f"https://{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/{key}"
         return direct_url
     
+    def _key_from_path(self, file_path: str) -> str:
+        """S3 key of an s3:// path, a public URL (as returned by get_file_path) or a key"""
+        if file_path.startswith('s3://'):
+            # S3 path: s3://bucket/key
+            return file_path.replace(f's3://{self.bucket_name}/', '')
+        if file_path.startswith('http://') or file_path.startswith('https://'):
+            # HTTP URL: https://bucket.s3.region.amazonaws.com/key
+            # Extract key from URL
+            # Format: https://bucket.s3.region.amazonaws.com/prefix/filename
+            url_parts = file_path.split('.amazonaws.com/')
+            if len(url_parts) > 1:
+                return url_parts[1]
+            # Fallback: try to extract from URL
+            return file_path.split(f'{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/')[-1]
+        # Assume it's just the key
+        return file_path
+    
     def delete_file(self, file_path: str) -> bool:
         """Delete file from S3"""
         try:
-            # Extract key from path
-            if file_path.startswith('s3://'):
-                # S3 path: s3://bucket/key
-                key = file_path.replace(f's3://{self.bucket_name}/', '')
-            elif file_path.startswith('http://') or file_path.startswith('https://'):
-                # HTTP URL: https://bucket.s3.region.amazonaws.com/key
-                # Extract key from URL
-                # Format: https://bucket.s3.region.amazonaws.com/prefix/filename
-                url_parts = file_path.split('.amazonaws.com/')
-                if len(url_parts) > 1:
-                    key = url_parts[1]
-                else:
-                    # Fallback: try to extract from URL
-                    key = file_path.split(f'{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/')[-1]
-            else:
-                # Assume it's just the key
-                key = file_path
-            
+            key = self._key_from_path(file_path)
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
             logger.info(f"Deleted file from S3: bucket={self.bucket_name}, key={key}")
             return True
@@ -183,20 +335,42 @@ class S3FileStorage(FileStorageInterface):
             logger.error(f"Error deleting file from S3: {str(e)}")
             return False
     
+    def delete_directory(self, dir_path: str) -> bool:
+        """Delete every object under a prefix (s3:// path, public URL or key) from S3"""
+        try:
+            prefix = self._key_from_path(dir_path).rstrip('/') + '/'
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            deleted = 0
+            # A listed page holds at most 1000 keys, the DeleteObjects limit
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                keys = [{'Key': item['Key']} for item in page.get('Contents', [])]
+                if keys:
+                    self.s3_client.delete_objects(Bucket=self.bucket_name, Delete={'Objects': keys, 'Quiet': True})
+                    deleted += len(keys)
+            logger.info(f"Deleted {deleted} file(s) from S3: bucket={self.bucket_name}, prefix={prefix}")
+            return True
+        except ClientError as e:
+            logger.error(f"Error deleting prefix from S3: {str(e)}")
+            return False
+    
     def file_exists(self, file_path: str) -> bool:
         """Check if file exists in S3"""
         try:
-            # Extract key from path
-            if file_path.startswith('s3://'):
-                key = file_path.replace(f's3://{self.bucket_name}/', '')
-            else:
-                key = file_path
-            
+            key = self._key_from_path(file_path)
             self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
             return True
         except ClientError:
             return False
     
+    def get_etag(self, s3_path: str) -> Optional[str]:
+        """ETag of an object (changes whenever the object is replaced), or None if it cannot be read"""
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=self._key_from_path(s3_path))
+            return response.get('ETag', '').strip('"') or None
+        except ClientError as e:
+            logger.warning(f"Could not read ETag of {s3_path}: {str(e)}")
+            return None
+    
     def download_file(self, s3_path: str, local_path: str) -> bool:
         """Download file from S3 to local path"""
         try:
@@ -243,6 +417,32 @@ class S3FileStorage(FileStorageInterface):
             logger.error(f"Unexpected error downloading from S3: {str(e)}")
             return False
     
+    def generate_presigned_url(self, s3_path: str, expires_in: int = None) -> Optional[str]:
+        """
+        Presigned GET URL for an object, so readers can stream it with ranged requests
+        
+        Args:
+            s3_path: s3://bucket/key path or key
+            expires_in: URL lifetime in seconds (S3_PRESIGNED_URL_EXPIRATION by default)
+        """
+        if s3_path.startswith('s3://'):
+            key = s3_path.replace(f's3://{self.bucket_name}/', '')
+        else:
+            key = s3_path
+        
+        try:
+            return self.s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket_name, 'Key': key},
+                ExpiresIn=expires_in or settings.s3_presigned_url_expiration
+            )
+        except ClientError as e:
+            logger.error(f"Error creating presigned URL for {s3_path}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error creating presigned URL for {s3_path}: {e}")
+            return None
+    
     def copy_file(self, src_path: str, dest_path: str) -> bool:
         """Copy file within S3 or from local to S3"""
         try:
@@ -283,16 +483,42 @@ class CloudFileStorage(FileStorageInterface):
     def save_file(self, file_data: bytes, filename: str, directory: str) -> str:
         return self.s3_storage.save_file(file_data, filename, directory)
     
+    def save_file_from_path(self, source_path: str, filename: str, directory: str) -> str:
+        return self.s3_storage.save_file_from_path(source_path, filename, directory)
+    
+    def save_file_from_stream(self, stream: BinaryIO, filename: str, directory: str,
+                              finalize: Optional[Callable[[], None]] = None) -> str:
+        return self.s3_storage.save_file_from_stream(stream, filename, directory, finalize)
+    
     def get_file_path(self, filename: str, directory: str) -> str:
         return self.s3_storage.get_file_path(filename, directory)
     
     def delete_file(self, file_path: str) -> bool:
         return self.s3_storage.delete_file(file_path)
     
+    def delete_directory(self, dir_path: str) -> bool:
+        return self.s3_storage.delete_directory(dir_path)
+    
     def file_exists(self, file_path: str) -> bool:
         return self.s3_storage.file_exists(file_path)
 
 
+def get_public_url(file_storage: FileStorageInterface, stored_path: Optional[str], local_url: str) -> Optional[str]:
+    """
+    URL clients use for a stored file
+    
+    Public URLs are returned as-is, s3:// paths are mapped to their public
+    URL and local paths to the API endpoint `local_url`.
+    """
+    if not stored_path:
+        return None
+    if stored_path.startswith('http://') or stored_path.startswith('https://'):
+        return stored_path
+    if stored_path.startswith('s3://'):
+        return file_storage.get_file_path(stored_path.split('/')[-1], settings.processed_dir)
+    return local_url
+
+
 # Storage factory
 def get_file_storage() -> FileStorageInterface:
     """Get file storage implementation based on configuration"""
@@ -0,0 +1,207 @@
+"""
+PostgreSQL queue backend for video processing messages
+
+Stores messages in the `queue_messages` table of the application database.
+Consumers lock rows with FOR UPDATE SKIP LOCKED, so several workers can poll
+concurrently without blocking each other, and hide them behind a visibility
+lease exactly like SQS. Messages received more than `sqs_max_receive_count`
+times are moved to `queue_dead_letters`.
+"""
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import func
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.queue import QueueMessage, DeadLetterMessage
+from app.services.queue_backend import QueueBackendInterface, build_message_body
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresQueueBackend(QueueBackendInterface):
+    """Queue backend on a PostgreSQL table"""
+
+    def __init__(self, session_factory=None, queue_name: str = None):
+        self.session_factory = session_factory or SessionLocal
+        self.queue_name = queue_name or settings.queue_name
+        self.visibility_timeout = settings.sqs_visibility_timeout
+        self.max_receive_count = settings.sqs_max_receive_count
+        self.wait_time_seconds = settings.sqs_wait_time_seconds
+        self.poll_interval = settings.queue_poll_interval
+
+    def is_configured(self) -> bool:
+        """The queue lives in the application database, so it is always available"""
+        return True
+
+    def send_video_processing_message(self, video_id: str, video_path: str) -> Optional[str]:
+        """Insert a video processing message"""
+        results = self.send_messages_batch([(video_id, video_path)])
+        return results.get(video_id)
+
+    def send_messages_batch(self, videos: List[Tuple[str, str]],
+                            max_attempts: int = 3) -> Dict[str, Optional[str]]:
+        """Insert several messages in a single transaction"""
+        results: Dict[str, Optional[str]] = {video_id: None for video_id, _ in videos}
+        db = self.session_factory()
+        try:
+            rows = [
+                (video_id, QueueMessage(queue_name=self.queue_name,
+                                        body=build_message_body(video_id, video_path)))
+                for video_id, video_path in videos
+            ]
+            db.add_all([row for _, row in rows])
+            db.commit()
+            for video_id, row in rows:
+                results[video_id] = str(row.id)
+            logger.info(f"Enqueued {len(rows)} video processing message(s) in PostgreSQL queue '{self.queue_name}'")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error enqueuing messages in PostgreSQL queue: {e}")
+        finally:
+            db.close()
+        return results
+
+    def receive_messages(self, max_messages: int = 1) -> list:
+        """
+        Receive up to `max_messages` visible messages, polling for at most
+        `sqs_wait_time_seconds` when the queue is empty
+        """
+        deadline = time.monotonic() + self.wait_time_seconds
+        while True:
+            messages = self._receive_once(min(max_messages, 10))
+            if messages or time.monotonic() >= deadline:
+                return messages
+            time.sleep(self.poll_interval)
+
+    def _receive_once(self, max_messages: int) -> list:
+        """Lock visible rows with SKIP LOCKED and lease them to this consumer"""
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(QueueMessage)
+                .filter(QueueMessage.queue_name == self.queue_name, QueueMessage.visible_at <= now)
+                .order_by(QueueMessage.id)
+                .limit(max_messages)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            messages = []
+            for row in rows:
+                if row.receive_count >= self.max_receive_count:
+                    self._dead_letter(db, row)
+                    continue
+
+                row.receive_count += 1
+                row.receipt_handle = uuid.uuid4().hex
+                row.visible_at = now + timedelta(seconds=self.visibility_timeout)
+                messages.append({
+                    'MessageId': str(row.id),
+                    'ReceiptHandle': row.receipt_handle,
+                    'Body': row.body,
+                    'Attributes': {
+                        'ApproximateReceiveCount': str(row.receive_count),
+                        'SentTimestamp': str(int(row.created_at.timestamp() * 1000)) if row.created_at else None
+                    }
+                })
+            db.commit()
+
+            if messages:
+                logger.info(f"Received {len(messages)} message(s) from PostgreSQL queue")
+            return messages
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error receiving messages from PostgreSQL queue: {e}")
+            return []
+        finally:
+            db.close()
+
+    def _dead_letter(self, db, row: QueueMessage):
+        """Move a message that exceeded the receive count to the dead-letter table"""
+        logger.warning(f"Message {row.id} received {row.receive_count} times, moving to dead-letter table")
+        db.add(DeadLetterMessage(
+            message_id=row.id,
+            queue_name=row.queue_name,
+            body=row.body,
+            receive_count=row.receive_count,
+            created_at=row.created_at
+        ))
+        db.delete(row)
+
+    def delete_message(self, receipt_handle: str) -> bool:
+        """Delete a message; stale receipt handles (message redelivered since) are ignored"""
+        return not self.delete_messages_batch([receipt_handle])
+
+    def delete_messages_batch(self, receipt_handles: List[str]) -> List[str]:
+        """Delete several messages by receipt handle"""
+        if not receipt_handles:
+            return []
+        db = self.session_factory()
+        try:
+            deleted = {
+                handle for (handle,) in db.query(QueueMessage.receipt_handle)
+                .filter(QueueMessage.receipt_handle.in_(receipt_handles))
+                .all()
+            }
+            db.query(QueueMessage).filter(
+                QueueMessage.receipt_handle.in_(deleted)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return [handle for handle in receipt_handles if handle not in deleted]
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error deleting messages from PostgreSQL queue: {e}")
+            return list(receipt_handles)
+        finally:
+            db.close()
+
+    def change_messages_visibility(self, receipt_handles: List[str], visibility_timeout: int) -> List[str]:
+        """Extend the visibility lease of in-flight messages"""
+        if not receipt_handles:
+            return []
+        db = self.session_factory()
+        try:
+            visible_at = datetime.now(timezone.utc) + timedelta(seconds=visibility_timeout)
+            rows = (
+                db.query(QueueMessage)
+                .filter(QueueMessage.receipt_handle.in_(receipt_handles))
+                .all()
+            )
+            for row in rows:
+                row.visible_at = visible_at
+            db.commit()
+            extended = {row.receipt_handle for row in rows}
+            return [handle for handle in receipt_handles if handle not in extended]
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error extending message visibility in PostgreSQL queue: {e}")
+            return list(receipt_handles)
+        finally:
+            db.close()
+
+    def get_queue_attributes(self) -> Optional[Dict[str, Any]]:
+        """Queue depth using the SQS attribute names"""
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            base = db.query(func.count(QueueMessage.id)).filter(QueueMessage.queue_name == self.queue_name)
+            visible = base.filter(QueueMessage.visible_at <= now).scalar()
+            in_flight = base.filter(QueueMessage.visible_at > now).scalar()
+            dead_letters = db.query(func.count(DeadLetterMessage.id)).filter(
+                DeadLetterMessage.queue_name == self.queue_name
+            ).scalar()
+            return {
+                'ApproximateNumberOfMessages': str(visible),
+                'ApproximateNumberOfMessagesNotVisible': str(in_flight),
+                'DeadLetterMessages': str(dead_letters)
+            }
+        except Exception as e:
+            logger.error(f"Error getting PostgreSQL queue attributes: {e}")
+            return None
+        finally:
+            db.close()
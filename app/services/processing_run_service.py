@@ -0,0 +1,71 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+from app.models.processing_run import ProcessingRun, RUN_STAGES
+
+PERCENTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    """Linear interpolation between closest ranks of sorted `values` (same as percentile_cont)"""
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class ProcessingRunService:
+    @staticmethod
+    def record_run(db: Session, **fields) -> ProcessingRun:
+        """Store one processing run (`fields` are ProcessingRun columns)"""
+        run = ProcessingRun(**fields)
+        db.add(run)
+        db.commit()
+        return run
+
+    @staticmethod
+    def stage_percentiles(db: Session, since: datetime, until: datetime,
+                          outcome: Optional[str] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Run count and p50/p95/p99 seconds of every stage (and the total) over a time window
+
+        PostgreSQL computes the percentiles in one aggregate query over the
+        finished_at index; other databases (SQLite in tests) return the
+        timing columns of the window and the percentiles are computed here.
+        """
+        columns = {stage: getattr(ProcessingRun, f"{stage}_seconds") for stage in RUN_STAGES}
+        columns["total"] = ProcessingRun.total_seconds
+
+        filters = [ProcessingRun.finished_at >= since, ProcessingRun.finished_at < until]
+        if outcome:
+            filters.append(ProcessingRun.outcome == outcome)
+
+        stats = {}
+        if db.get_bind().dialect.name == "postgresql":
+            aggregates = []
+            for column in columns.values():
+                aggregates.append(func.count(column))
+                aggregates += [func.percentile_cont(fraction).within_group(column) for fraction in PERCENTILES.values()]
+            row = db.query(*aggregates).filter(*filters).one()
+            width = 1 + len(PERCENTILES)
+            for index, stage in enumerate(columns):
+                count, *values = row[index * width:(index + 1) * width]
+                stats[stage] = {"count": count, **dict(zip(PERCENTILES, values))}
+            return stats
+
+        rows = db.query(*columns.values()).filter(*filters).all()
+        for index, stage in enumerate(columns):
+            values = sorted(row[index] for row in rows if row[index] is not None)
+            stats[stage] = {"count": len(values)}
+            for name, fraction in PERCENTILES.items():
+                stats[stage][name] = _percentile(values, fraction) if values else None
+        return stats
+
+    @staticmethod
+    def count_runs(db: Session, since: datetime, until: datetime) -> Dict[str, int]:
+        """Runs per outcome over a time window"""
+        results = db.query(ProcessingRun.outcome, func.count(ProcessingRun.id)).filter(
+            ProcessingRun.finished_at >= since, ProcessingRun.finished_at < until
+        ).group_by(ProcessingRun.outcome).all()
+        return {outcome: count for outcome, count in results}
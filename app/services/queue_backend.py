@@ -0,0 +1,67 @@
+"""
+Queue backend interface for video processing messages
+
+Every backend hands out messages shaped like SQS messages
+({'MessageId', 'ReceiptHandle', 'Body', 'Attributes'}) so the worker loop in
+app/workers/sqs_worker.py works the same on any of them.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+import json
+import uuid
+
+
+def build_message_body(video_id: str, video_path: str) -> str:
+    """Serialize the body of a video processing message"""
+    return json.dumps({
+        "video_id": video_id,
+        "video_path": video_path,
+        "task_id": str(uuid.uuid4()),
+        "created_at": datetime.utcnow().isoformat()
+    })
+
+
+class QueueBackendInterface(ABC):
+    """Abstract interface for the video processing queue"""
+
+    @abstractmethod
+    def is_configured(self) -> bool:
+        """Check if the backend can send and receive messages"""
+        pass
+
+    @abstractmethod
+    def send_video_processing_message(self, video_id: str, video_path: str) -> Optional[str]:
+        """Enqueue one video and return its message ID"""
+        pass
+
+    @abstractmethod
+    def send_messages_batch(self, videos: List[Tuple[str, str]],
+                            max_attempts: int = 3) -> Dict[str, Optional[str]]:
+        """Enqueue several videos and return video_id -> message ID"""
+        pass
+
+    @abstractmethod
+    def receive_messages(self, max_messages: int = 1) -> list:
+        """Receive up to `max_messages` messages, hiding them from other consumers"""
+        pass
+
+    @abstractmethod
+    def delete_message(self, receipt_handle: str) -> bool:
+        """Acknowledge a processed message"""
+        pass
+
+    @abstractmethod
+    def delete_messages_batch(self, receipt_handles: List[str]) -> List[str]:
+        """Acknowledge several messages and return the handles that failed"""
+        pass
+
+    @abstractmethod
+    def change_messages_visibility(self, receipt_handles: List[str], visibility_timeout: int) -> List[str]:
+        """Keep in-flight messages hidden for `visibility_timeout` more seconds"""
+        pass
+
+    @abstractmethod
+    def get_queue_attributes(self) -> Optional[Dict[str, Any]]:
+        """Get queue depth attributes (SQS attribute names)"""
+        pass
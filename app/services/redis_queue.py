@@ -0,0 +1,237 @@
+"""
+Redis Streams queue backend for video processing messages
+
+Messages are entries of a stream consumed through a consumer group:
+- XREADGROUP delivers new entries to this consumer
+- entries left pending longer than the visibility timeout (crashed or stalled
+  workers) are taken over with XAUTOCLAIM
+- the delivery counter kept by Redis for each pending entry is the receive
+  count; entries delivered more than `sqs_max_receive_count` times are moved
+  to the `<stream>:dead` stream
+- XACK + XDEL acknowledge an entry, XCLAIM with JUSTID resets its idle time
+  (the visibility heartbeat)
+"""
+import os
+import socket
+from typing import Optional, Dict, Any, List, Tuple
+import redis
+from redis.exceptions import RedisError, ResponseError
+from app.core.config import settings
+from app.services.queue_backend import QueueBackendInterface, build_message_body
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RedisStreamsQueueBackend(QueueBackendInterface):
+    """Queue backend on a Redis stream with a consumer group"""
+
+    def __init__(self, redis_client=None, stream: str = None, group: str = None, consumer: str = None):
+        self.redis_client = redis_client or redis.from_url(settings.queue_redis_url or settings.redis_url)
+        self.stream = stream or settings.queue_name
+        self.dead_letter_stream = f"{self.stream}:dead"
+        self.group = group or settings.queue_consumer_group
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = settings.sqs_visibility_timeout
+        self.max_receive_count = settings.sqs_max_receive_count
+        self.wait_time_seconds = settings.sqs_wait_time_seconds
+        self._group_ready = False
+
+    def _ensure_group(self):
+        """Create the stream and consumer group on first use"""
+        if self._group_ready:
+            return
+        try:
+            self.redis_client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+
+    def is_configured(self) -> bool:
+        """Check if Redis is reachable"""
+        try:
+            return bool(self.redis_client.ping())
+        except RedisError as e:
+            logger.error(f"Redis queue not reachable: {e}")
+            return False
+
+    def send_video_processing_message(self, video_id: str, video_path: str) -> Optional[str]:
+        """Append a video processing message to the stream"""
+        try:
+            message_id = self.redis_client.xadd(self.stream, {'body': build_message_body(video_id, video_path)})
+            message_id = message_id.decode() if isinstance(message_id, bytes) else message_id
+            logger.info(f"Video processing message sent to Redis stream: {message_id} for video {video_id}")
+            return message_id
+        except RedisError as e:
+            logger.error(f"Error sending message to Redis stream: {e}")
+            return None
+
+    def send_messages_batch(self, videos: List[Tuple[str, str]],
+                            max_attempts: int = 3) -> Dict[str, Optional[str]]:
+        """Append several messages in one pipeline round trip"""
+        results: Dict[str, Optional[str]] = {video_id: None for video_id, _ in videos}
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for video_id, video_path in videos:
+                pipe.xadd(self.stream, {'body': build_message_body(video_id, video_path)})
+            for (video_id, _), message_id in zip(videos, pipe.execute()):
+                results[video_id] = message_id.decode() if isinstance(message_id, bytes) else message_id
+            logger.info(f"Sent {len(videos)} video processing message(s) to Redis stream '{self.stream}'")
+        except RedisError as e:
+            logger.error(f"Error sending message batch to Redis stream: {e}")
+        return results
+
+    def receive_messages(self, max_messages: int = 1) -> list:
+        """
+        Receive stalled entries first (XAUTOCLAIM), then new ones (XREADGROUP),
+        blocking up to `sqs_wait_time_seconds` only when nothing was reclaimed
+        """
+        max_messages = min(max_messages, 10)
+        try:
+            self._ensure_group()
+            entries = self._claim_stalled(max_messages)
+
+            if len(entries) < max_messages:
+                # BLOCK 0 waits forever: without a wait time (or with reclaimed entries) do not block
+                block = self.wait_time_seconds * 1000 if self.wait_time_seconds > 0 and not entries else None
+                response = self.redis_client.xreadgroup(
+                    self.group, self.consumer, {self.stream: '>'},
+                    count=max_messages - len(entries),
+                    block=block
+                )
+                for _, stream_entries in response or []:
+                    entries.extend(stream_entries)
+
+            messages = self._to_messages(entries)
+            if messages:
+                logger.info(f"Received {len(messages)} message(s) from Redis stream")
+            return messages
+
+        except RedisError as e:
+            logger.error(f"Error receiving messages from Redis stream: {e}")
+            return []
+
+    def _claim_stalled(self, count: int) -> list:
+        """Take over entries idle for longer than the visibility timeout"""
+        response = self.redis_client.xautoclaim(
+            self.stream, self.group, self.consumer,
+            min_idle_time=self.visibility_timeout * 1000,
+            start_id='0-0', count=count
+        )
+        # Entries deleted from the stream while pending come back as None
+        return [entry for entry in response[1] if entry and entry[1]]
+
+    def _to_messages(self, entries: list) -> list:
+        """Build SQS-shaped messages, dead-lettering entries over the receive limit"""
+        if not entries:
+            return []
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for entry_id, _ in entries:
+            pipe.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+        pending = pipe.execute()
+
+        messages = []
+        for (entry_id, fields), pending_info in zip(entries, pending):
+            entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            body = fields.get(b'body', fields.get('body'))
+            body = body.decode() if isinstance(body, bytes) else body
+            receive_count = pending_info[0]['times_delivered'] if pending_info else 1
+
+            if receive_count > self.max_receive_count:
+                logger.warning(f"Entry {entry_id} delivered {receive_count} times, moving to {self.dead_letter_stream}")
+                dead_pipe = self.redis_client.pipeline()
+                dead_pipe.xadd(self.dead_letter_stream, {
+                    'body': body, 'message_id': entry_id, 'receive_count': receive_count
+                })
+                dead_pipe.xack(self.stream, self.group, entry_id)
+                dead_pipe.xdel(self.stream, entry_id)
+                dead_pipe.execute()
+                continue
+
+            messages.append({
+                'MessageId': entry_id,
+                'ReceiptHandle': entry_id,
+                'Body': body,
+                'Attributes': {
+                    'ApproximateReceiveCount': str(receive_count),
+                    # Stream IDs start with the millisecond timestamp of the XADD
+                    'SentTimestamp': entry_id.split('-')[0]
+                }
+            })
+        return messages
+
+    def delete_message(self, receipt_handle: str) -> bool:
+        """Acknowledge and remove an entry"""
+        return not self.delete_messages_batch([receipt_handle])
+
+    def delete_messages_batch(self, receipt_handles: List[str]) -> List[str]:
+        """Acknowledge and remove several entries"""
+        if not receipt_handles:
+            return []
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.xack(self.stream, self.group, *receipt_handles)
+            pipe.xdel(self.stream, *receipt_handles)
+            pipe.execute()
+            return []
+        except RedisError as e:
+            logger.error(f"Error acknowledging entries in Redis stream: {e}")
+            return list(receipt_handles)
+
+    def change_messages_visibility(self, receipt_handles: List[str], visibility_timeout: int) -> List[str]:
+        """
+        Reset the idle time of pending entries so XAUTOCLAIM leaves them alone
+
+        Streams have no per-entry timeout: an entry becomes claimable after
+        `sqs_visibility_timeout` of idleness, so `visibility_timeout` is not used.
+        """
+        if not receipt_handles:
+            return []
+        try:
+            claimed = self.redis_client.xclaim(
+                self.stream, self.group, self.consumer, min_idle_time=0,
+                message_ids=receipt_handles, justid=True
+            )
+            claimed = {entry_id.decode() if isinstance(entry_id, bytes) else entry_id for entry_id in claimed}
+            return [handle for handle in receipt_handles if handle not in claimed]
+        except RedisError as e:
+            logger.error(f"Error extending entry visibility in Redis stream: {e}")
+            return list(receipt_handles)
+
+    def get_pending_entries(self, count: int = 10) -> Dict[str, Any]:
+        """
+        Pending-entries view of the consumer group (delivered, not acknowledged)
+
+        Returns the XPENDING summary plus the `count` oldest entries with their
+        consumer, idle time and delivery count.
+        """
+        self._ensure_group()
+        summary = self.redis_client.xpending(self.stream, self.group)
+        oldest = self.redis_client.xpending_range(self.stream, self.group, min='-', max='+', count=count)
+        return {
+            'pending': summary['pending'],
+            'consumers': summary.get('consumers', []),
+            'oldest': oldest
+        }
+
+    def get_queue_attributes(self) -> Optional[Dict[str, Any]]:
+        """Queue depth using the SQS attribute names"""
+        try:
+            self._ensure_group()
+            groups = self.redis_client.xinfo_groups(self.stream)
+            group = next(
+                (info for info in groups
+                 if (info['name'].decode() if isinstance(info['name'], bytes) else info['name']) == self.group),
+                {}
+            )
+            return {
+                # `lag` (Redis >= 7) counts entries not yet delivered to the group
+                'ApproximateNumberOfMessages': str(group.get('lag') or 0),
+                'ApproximateNumberOfMessagesNotVisible': str(group.get('pending', 0)),
+                'DeadLetterMessages': str(self.redis_client.xlen(self.dead_letter_stream))
+            }
+        except RedisError as e:
+            logger.error(f"Error getting Redis stream attributes: {e}")
+            return None
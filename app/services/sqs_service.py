@@ -1,22 +1,25 @@
 """
 SQS Service for sending and receiving video processing messages
 """
-import json
-import uuid
+import time
 import boto3
 from botocore.exceptions import ClientError
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from app.core.config import settings
+from app.services.queue_backend import QueueBackendInterface, build_message_body
 import logging
 
 logger = logging.getLogger(__name__)
 
+# SQS batch APIs (Send/Delete/ChangeMessageVisibility) accept at most 10 entries per request
+SQS_BATCH_LIMIT = 10
 
-class SQSService:
+
+class SQSService(QueueBackendInterface):
     """Service for interacting with Amazon SQS"""
     
-    def __init__(self):
-        """Initialize SQS client"""
+    def __init__(self, queue_url: Optional[str] = None):
+        """Initialize SQS client for `queue_url` (settings.sqs_queue_url by default)"""
         # Build client config - only pass credentials if they're explicitly set
         # Otherwise, let boto3 use IAM Role automatically
         client_config = {
@@ -32,7 +35,28 @@ class SQSService:
                 client_config['aws_session_token'] = settings.aws_session_token
         
         self.sqs_client = boto3.client('sqs', **client_config)
-        self.queue_url = settings.sqs_queue_url
+        self.queue_url = settings.sqs_queue_url if queue_url is None else queue_url
+    
+    def is_configured(self) -> bool:
+        """Check if the SQS queue URL is set"""
+        return bool(self.queue_url)
+    
+    @staticmethod
+    def _build_message(video_id: str, video_path: str) -> Dict[str, Any]:
+        """Build the MessageBody/MessageAttributes pair shared by single and batch sends"""
+        return {
+            'MessageBody': build_message_body(video_id, video_path),
+            'MessageAttributes': {
+                'video_id': {
+                    'StringValue': video_id,
+                    'DataType': 'String'
+                },
+                'video_path': {
+                    'StringValue': video_path,
+                    'DataType': 'String'
+                }
+            }
+        }
     
     def send_video_processing_message(
         self, 
@@ -54,29 +78,10 @@ class SQSService:
             return None
         
         try:
-            # Create message body
-            from datetime import datetime
-            message_body = {
-                "video_id": video_id,
-                "video_path": video_path,
-                "task_id": str(uuid.uuid4()),
-                "created_at": datetime.utcnow().isoformat()
-            }
-            
             # Send message to SQS
             response = self.sqs_client.send_message(
                 QueueUrl=self.queue_url,
-                MessageBody=json.dumps(message_body),
-                MessageAttributes={
-                    'video_id': {
-                        'StringValue': video_id,
-                        'DataType': 'String'
-                    },
-                    'video_path': {
-                        'StringValue': video_path,
-                        'DataType': 'String'
-                    }
-                }
+                **self._build_message(video_id, video_path)
             )
             
             message_id = response.get('MessageId')
@@ -90,6 +95,77 @@ class SQSService:
             logger.error(f"Unexpected error sending message to SQS: {e}")
             return None
     
+    def send_messages_batch(
+        self,
+        videos: List[Tuple[str, str]],
+        max_attempts: int = 3
+    ) -> Dict[str, Optional[str]]:
+        """
+        Send video processing messages using SendMessageBatch (10 per request)
+        
+        Entries reported in 'Failed' are retried with exponential backoff unless
+        SQS flags them as a sender fault (those would fail again unchanged).
+        
+        Args:
+            videos: List of (video_id, video_path) tuples
+            max_attempts: Attempts per entry before giving up
+            
+        Returns:
+            Dict mapping video_id to its Message ID (None if it could not be sent)
+        """
+        results: Dict[str, Optional[str]] = {video_id: None for video_id, _ in videos}
+        if not self.queue_url:
+            logger.error("SQS queue URL not configured")
+            return results
+        
+        for start in range(0, len(videos), SQS_BATCH_LIMIT):
+            chunk = videos[start:start + SQS_BATCH_LIMIT]
+            # Batch entry ids only need to be unique within the request
+            pending = {
+                str(index): (video_id, self._build_message(video_id, video_path))
+                for index, (video_id, video_path) in enumerate(chunk)
+            }
+            
+            for attempt in range(max_attempts):
+                if not pending:
+                    break
+                if attempt:
+                    time.sleep(min(0.2 * (2 ** attempt), 5))
+                
+                try:
+                    response = self.sqs_client.send_message_batch(
+                        QueueUrl=self.queue_url,
+                        Entries=[
+                            {'Id': entry_id, **message}
+                            for entry_id, (_, message) in pending.items()
+                        ]
+                    )
+                except ClientError as e:
+                    logger.error(f"Error sending message batch to SQS (attempt {attempt + 1}): {e}")
+                    continue
+                except Exception as e:
+                    logger.error(f"Unexpected error sending message batch to SQS: {e}")
+                    continue
+                
+                for entry in response.get('Successful', []):
+                    video_id, _ = pending.pop(entry['Id'])
+                    results[video_id] = entry.get('MessageId')
+                
+                for entry in response.get('Failed', []):
+                    if entry.get('SenderFault'):
+                        video_id, _ = pending.pop(entry['Id'], (None, None))
+                        logger.error(
+                            f"SQS rejected message for video {video_id}: "
+                            f"{entry.get('Code')} - {entry.get('Message')}"
+                        )
+            
+            for video_id, _ in pending.values():
+                logger.error(f"Giving up sending message for video {video_id} after {max_attempts} attempts")
+        
+        sent = sum(1 for message_id in results.values() if message_id)
+        logger.info(f"Sent {sent}/{len(videos)} video processing message(s) to SQS in batches")
+        return results
+    
     def receive_messages(self, max_messages: int = 1) -> list:
         """
         Receive messages from SQS queue
@@ -110,6 +186,8 @@ class SQSService:
                 MaxNumberOfMessages=min(max_messages, 10),  # SQS limit is 10
                 WaitTimeSeconds=settings.sqs_wait_time_seconds,  # Long polling
                 MessageAttributeNames=['All'],
+                # SentTimestamp drives the backlog encoding policy (message age)
+                AttributeNames=['SentTimestamp', 'ApproximateReceiveCount'],
                 VisibilityTimeout=settings.sqs_visibility_timeout
             )
             
@@ -154,6 +232,83 @@ class SQSService:
             logger.error(f"Unexpected error deleting message from SQS: {e}")
             return False
     
+    def delete_messages_batch(self, receipt_handles: List[str]) -> List[str]:
+        """
+        Delete several messages using DeleteMessageBatch (10 per request)
+        
+        Args:
+            receipt_handles: Receipt handles of the messages to delete
+            
+        Returns:
+            Receipt handles that could not be deleted
+        """
+        if not self.queue_url:
+            logger.error("SQS queue URL not configured")
+            return list(receipt_handles)
+        
+        failed_handles = []
+        for start in range(0, len(receipt_handles), SQS_BATCH_LIMIT):
+            chunk = receipt_handles[start:start + SQS_BATCH_LIMIT]
+            try:
+                response = self.sqs_client.delete_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {'Id': str(index), 'ReceiptHandle': handle}
+                        for index, handle in enumerate(chunk)
+                    ]
+                )
+                for entry in response.get('Failed', []):
+                    logger.error(f"Error deleting message from SQS: {entry.get('Code')} - {entry.get('Message')}")
+                    failed_handles.append(chunk[int(entry['Id'])])
+            except ClientError as e:
+                logger.error(f"Error deleting message batch from SQS: {e}")
+                failed_handles.extend(chunk)
+            except Exception as e:
+                logger.error(f"Unexpected error deleting message batch from SQS: {e}")
+                failed_handles.extend(chunk)
+        
+        logger.debug(f"Deleted {len(receipt_handles) - len(failed_handles)} message(s) from SQS")
+        return failed_handles
+    
+    def change_messages_visibility(self, receipt_handles: List[str], visibility_timeout: int) -> List[str]:
+        """
+        Extend the visibility timeout of in-flight messages using
+        ChangeMessageVisibilityBatch (10 per request)
+        
+        Args:
+            receipt_handles: Receipt handles of the messages being processed
+            visibility_timeout: New timeout in seconds, counted from now
+            
+        Returns:
+            Receipt handles whose visibility could not be changed
+        """
+        if not self.queue_url:
+            logger.error("SQS queue URL not configured")
+            return list(receipt_handles)
+        
+        failed_handles = []
+        for start in range(0, len(receipt_handles), SQS_BATCH_LIMIT):
+            chunk = receipt_handles[start:start + SQS_BATCH_LIMIT]
+            try:
+                response = self.sqs_client.change_message_visibility_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {'Id': str(index), 'ReceiptHandle': handle, 'VisibilityTimeout': visibility_timeout}
+                        for index, handle in enumerate(chunk)
+                    ]
+                )
+                for entry in response.get('Failed', []):
+                    logger.warning(f"Error extending message visibility: {entry.get('Code')} - {entry.get('Message')}")
+                    failed_handles.append(chunk[int(entry['Id'])])
+            except ClientError as e:
+                logger.error(f"Error extending message visibility in SQS: {e}")
+                failed_handles.extend(chunk)
+            except Exception as e:
+                logger.error(f"Unexpected error extending message visibility in SQS: {e}")
+                failed_handles.extend(chunk)
+        
+        return failed_handles
+    
     def get_queue_attributes(self) -> Optional[Dict[str, Any]]:
         """
         Get queue attributes (useful for monitoring)
@@ -180,14 +335,44 @@ class SQSService:
             return None
 
 
-# Singleton instance
-_sqs_service: Optional[SQSService] = None
+# Singleton instances
+_sqs_service: Optional[QueueBackendInterface] = None
+_encode_queue_service: Optional[QueueBackendInterface] = None
+
+
+def _create_queue_backend(sqs_queue_url: str, queue_name: str) -> QueueBackendInterface:
+    """Queue backend selected by QUEUE_BACKEND for one queue"""
+    queue_backend = getattr(settings, 'queue_backend', 'sqs')
+    if queue_backend == 'postgres':
+        from app.services.postgres_queue import PostgresQueueBackend
+        return PostgresQueueBackend(queue_name=queue_name)
+    if queue_backend == 'redis':
+        from app.services.redis_queue import RedisStreamsQueueBackend
+        return RedisStreamsQueueBackend(stream=queue_name)
+    return SQSService(queue_url=sqs_queue_url)
 
 
-def get_sqs_service() -> SQSService:
-    """Get or create SQS service singleton"""
+def get_sqs_service() -> QueueBackendInterface:
+    """
+    Get or create the queue service singleton
+    
+    Returns the SQS service unless QUEUE_BACKEND selects another backend
+    with the same interface. This is the queue uploads are sent to.
+    """
     global _sqs_service
     if _sqs_service is None:
-        _sqs_service = SQSService()
+        _sqs_service = _create_queue_backend(settings.sqs_queue_url, settings.queue_name)
     return _sqs_service
 
+
+def get_encode_queue_service() -> QueueBackendInterface:
+    """
+    Get or create the encode queue singleton
+    
+    Probe workers (WORKER_ROLE=probe) forward the uploads that pass
+    validation to this queue; encode workers consume it.
+    """
+    global _encode_queue_service
+    if _encode_queue_service is None:
+        _encode_queue_service = _create_queue_backend(settings.sqs_encode_queue_url, settings.queue_encode_name)
+    return _encode_queue_service
@@ -1,13 +1,23 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, and_, or_, update, case, literal
 from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 from app.models.video import Video, VideoStatus
 from app.models.user import User
 from app.models.vote import Vote
 from app.schemas.video import VideoCreate
-from app.services.file_storage import get_file_storage
+from app.services.file_storage import get_file_storage, HLS_MASTER_PLAYLIST
 import os
 import uuid
+import enum
+
+
+class ClaimResult(enum.Enum):
+    """Outcome of VideoService.claim_video"""
+    claimed = "claimed"              # This worker owns the video now
+    already_processed = "processed"  # Processed by the current pipeline version
+    claimed_by_other = "busy"        # Another worker holds an active lease
+    not_found = "not_found"          # Video was deleted
 
 
 class VideoService:
@@ -62,23 +72,10 @@ class VideoService:
         # Delete physical files (works with both local and S3 storage)
         try:
             file_storage = get_file_storage()
-            # Delete original file
-            if video.original_path:
-                if video.original_path.startswith('s3://') or video.original_path.startswith('http'):
-                    # S3 path or URL - use file_storage.delete_file
-                    file_storage.delete_file(video.original_path)
-                elif os.path.exists(video.original_path):
-                    # Local file
-                    os.remove(video.original_path)
-            
-            # Delete processed file
-            if video.processed_path:
-                if video.processed_path.startswith('s3://') or video.processed_path.startswith('http'):
-                    # S3 path or URL - use file_storage.delete_file
-                    file_storage.delete_file(video.processed_path)
-                elif os.path.exists(video.processed_path):
-                    # Local file
-                    os.remove(video.processed_path)
+            VideoService.delete_stored_file(file_storage, video.original_path)
+            VideoService.delete_stored_file(file_storage, video.processed_path)
+            VideoService.delete_stored_file(file_storage, video.thumbnail_path)
+            VideoService.delete_stored_file(file_storage, video.preview_path)
         except Exception:
             pass  # Continue even if file deletion fails
         
@@ -86,9 +83,39 @@ class VideoService:
         db.commit()
         return True
 
+    @staticmethod
+    def delete_stored_file(file_storage, path: Optional[str]):
+        """
+        Delete a file given its stored path (S3 path, URL or local path)
+        
+        An HLS output is stored as the path of its master playlist: the whole
+        directory (or S3 prefix) with its renditions is deleted.
+        """
+        if not path:
+            return
+        if path.endswith(f"/{HLS_MASTER_PLAYLIST}"):
+            file_storage.delete_directory(path.rsplit('/', 1)[0])
+        elif path.startswith('s3://') or path.startswith('http'):
+            # S3 path or URL - use file_storage.delete_file
+            file_storage.delete_file(path)
+        elif os.path.exists(path):
+            # Local file
+            os.remove(path)
+
+    @staticmethod
+    def release_lease(db: Session, video_id: str):
+        """Drop the claim lease of a video without changing its status"""
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if video:
+            video.lease_owner = None
+            video.lease_expires_at = None
+            db.commit()
+
     @staticmethod
     def update_video_status(db: Session, video_id: str, status: VideoStatus, 
-                          processed_path: str = None, error_message: str = None):
+                          processed_path: str = None, error_message: str = None,
+                          pipeline_version: int = None, encoding_profile: str = None,
+                          thumbnail_path: str = None, preview_path: str = None):
         """Update video status and processed path"""
         video = db.query(Video).filter(Video.id == video_id).first()
         if video:
@@ -97,11 +124,139 @@ class VideoService:
                 video.processed_path = processed_path
             if error_message:
                 video.error_message = error_message
+            if pipeline_version is not None:
+                video.pipeline_version = pipeline_version
+            if encoding_profile is not None:
+                video.encoding_profile = encoding_profile
+            if status != VideoStatus.processing:
+                # Job finished: release the claim lease
+                video.lease_owner = None
+                video.lease_expires_at = None
             if status == VideoStatus.processed:
+                # The previews belong to this output: ones it did not produce are cleared
+                video.thumbnail_path = thumbnail_path
+                video.preview_path = preview_path
                 video.processed_at = func.now()
             db.commit()
             db.refresh(video)
 
+    @staticmethod
+    def record_source_info(db: Session, video_id: str, width: int, height: int, duration: float = None,
+                           fps: float = None, codec: str = None):
+        """Store the probed properties of a video's original"""
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if video:
+            video.source_width = width
+            video.source_height = height
+            video.source_duration = duration
+            video.source_fps = fps
+            video.source_codec = codec
+            db.commit()
+
+    @staticmethod
+    def claim_video(db: Session, video_id: str, worker_id: str, lease_seconds: int,
+                    pipeline_version: int) -> ClaimResult:
+        """
+        Atomically lease a video to `worker_id` for processing
+        
+        The claim succeeds only for videos that are uploaded or failed, stuck in
+        processing with an expired lease, or processed by an older pipeline
+        version and not leased. Duplicate deliveries of the same job therefore
+        never run twice. Claimed videos move to 'processing', except processed
+        ones: they stay public with their current output while they are
+        re-rendered, and the new output replaces it when it is recorded.
+        """
+        now = datetime.now(timezone.utc)
+        lease_free = or_(Video.lease_expires_at.is_(None), Video.lease_expires_at < now)
+        claim = (
+            update(Video)
+            .where(
+                Video.id == video_id,
+                or_(
+                    Video.status.in_([VideoStatus.uploaded, VideoStatus.failed]),
+                    and_(Video.status == VideoStatus.processing, lease_free),
+                    and_(
+                        Video.status == VideoStatus.processed,
+                        or_(Video.pipeline_version.is_(None), Video.pipeline_version < pipeline_version),
+                        lease_free
+                    )
+                )
+            )
+            .values(
+                status=case((Video.status == VideoStatus.processed, Video.status),
+                             else_=literal(VideoStatus.processing, Video.status.type)),
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                updated_at=now
+            )
+            .returning(Video.id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = db.execute(claim).first()
+        db.commit()
+        
+        if claimed:
+            return ClaimResult.claimed
+        
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if not video:
+            return ClaimResult.not_found
+        if video.status == VideoStatus.processed and (video.pipeline_version or 0) >= pipeline_version:
+            return ClaimResult.already_processed
+        return ClaimResult.claimed_by_other
+
+    @staticmethod
+    def renew_lease(db: Session, video_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """
+        Extend the claim lease `worker_id` holds on a video
+
+        Returns False when the lease is no longer this worker's (the job ended
+        or the lease expired and another worker claimed the video).
+        """
+        now = datetime.now(timezone.utc)
+        renew = (
+            update(Video)
+            .where(Video.id == video_id, Video.lease_owner == worker_id)
+            .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+            .returning(Video.id)
+            .execution_options(synchronize_session=False)
+        )
+        renewed = db.execute(renew).first()
+        db.commit()
+        return renewed is not None
+
+    @staticmethod
+    def get_videos_for_reprocess(db: Session, include_failed: bool = False,
+                                 stuck_minutes: Optional[int] = None,
+                                 below_pipeline_version: Optional[int] = None,
+                                 limit: Optional[int] = None) -> List[Video]:
+        """
+        Get videos that should be re-enqueued for processing:
+        failed videos, videos stuck in processing for more than `stuck_minutes`,
+        and processed videos rendered by a pipeline older than `below_pipeline_version`
+        """
+        conditions = []
+        if include_failed:
+            conditions.append(Video.status == VideoStatus.failed)
+        if stuck_minutes is not None:
+            stuck_before = datetime.now(timezone.utc) - timedelta(minutes=stuck_minutes)
+            conditions.append(and_(
+                Video.status == VideoStatus.processing,
+                func.coalesce(Video.updated_at, Video.created_at) < stuck_before
+            ))
+        if below_pipeline_version is not None:
+            conditions.append(and_(
+                Video.status == VideoStatus.processed,
+                or_(Video.pipeline_version.is_(None), Video.pipeline_version < below_pipeline_version)
+            ))
+        if not conditions:
+            return []
+        
+        query = db.query(Video).filter(or_(*conditions)).order_by(Video.created_at)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
     @staticmethod
     def get_public_videos(db: Session, limit: int = 100, offset: int = 0) -> List[Video]:
         """Get processed videos available for public voting"""
@@ -0,0 +1,148 @@
+"""
+Worker asset cache for the ANB logo
+
+The logo is loaded once per worker process (settings.anb_logo_path, or the
+placeholder drawn by `create_anb_logo` when the file is missing) and, for
+each RenderSpec, the variants every job needs are pre-rendered and kept in
+memory:
+
+- the logo PNG on disk, in the worker cache directory, for the ffmpeg engine
+- the full-frame intro/outro image (logo fitted on black)
+- the watermark at its final size with its premultiplied alpha mask
+"""
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+from app.workers.rendering import RenderSpec, create_anb_logo
+import logging
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_logo: Image.Image = None
+_logo_path: str = None
+_assets: Dict[tuple, "RenderAssets"] = {}
+
+
+@dataclass(frozen=True)
+class RenderAssets:
+    """Pre-rendered logo variants for one RenderSpec"""
+    logo_path: str
+    # width x height RGB frame shown during the intro and outro
+    frame: np.ndarray
+    # Watermark RGB, its alpha mask (0-1, opacity applied) and RGB * alpha
+    watermark_rgb: np.ndarray
+    watermark_alpha: np.ndarray
+    watermark_premultiplied: np.ndarray
+
+
+def load_logo() -> Image.Image:
+    """The ANB logo as RGBA: the configured file, or the placeholder if it is missing"""
+    if os.path.exists(settings.anb_logo_path):
+        try:
+            return Image.open(settings.anb_logo_path).convert('RGBA')
+        except Exception as e:
+            logger.warning(f"Could not load logo {settings.anb_logo_path}, using placeholder: {e}")
+    else:
+        logger.info(f"Logo {settings.anb_logo_path} not found, using placeholder")
+    return create_anb_logo().convert('RGBA')
+
+
+def _cache_logo_png(logo: Image.Image) -> str:
+    """Write the logo once to the worker cache directory, named by its content"""
+    buffer = io.BytesIO()
+    logo.save(buffer, format='PNG')
+    data = buffer.getvalue()
+
+    asset_dir = os.path.join(settings.worker_cache_dir, 'assets')
+    os.makedirs(asset_dir, exist_ok=True)
+    path = os.path.join(asset_dir, f"logo_{hashlib.sha1(data).hexdigest()[:16]}.png")
+    if not os.path.exists(path):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    return path
+
+
+def _premultiply(image: Image.Image, opacity: float = 1.0):
+    """Split an RGBA image into (RGB, alpha mask, RGB premultiplied by alpha)"""
+    rgba = np.asarray(image, dtype=np.float32) / 255.0
+    alpha = rgba[:, :, 3] * opacity
+    rgb = np.asarray(image.convert('RGB'))
+    premultiplied = rgba[:, :, :3] * alpha[:, :, None] * 255.0
+    return rgb, alpha, premultiplied
+
+
+def render_assets(logo: Image.Image, logo_path: str, spec: RenderSpec) -> RenderAssets:
+    """Pre-render the intro/outro frame and the watermark of `spec`"""
+    # Full frame: logo fitted inside width x height and centered on black
+    scale = min(spec.width / logo.width, spec.height / logo.height)
+    fitted = logo.resize((max(1, round(logo.width * scale)), max(1, round(logo.height * scale))), Image.LANCZOS)
+    _, fitted_alpha, fitted_premultiplied = _premultiply(fitted)
+    frame = np.zeros((spec.height, spec.width, 3), dtype=np.uint8)
+    x = (spec.width - fitted.width) // 2
+    y = (spec.height - fitted.height) // 2
+    # Over black the composite is the premultiplied color itself
+    frame[y:y + fitted.height, x:x + fitted.width] = np.round(fitted_premultiplied).astype(np.uint8)
+
+    # Watermark: scaled to watermark_width keeping aspect, opacity folded into the mask
+    watermark_height = max(1, round(logo.height * spec.watermark_width / logo.width))
+    watermark = logo.resize((spec.watermark_width, watermark_height), Image.LANCZOS)
+    watermark_rgb, watermark_alpha, watermark_premultiplied = _premultiply(watermark, spec.watermark_opacity)
+
+    return RenderAssets(
+        logo_path=logo_path,
+        frame=frame,
+        watermark_rgb=watermark_rgb,
+        watermark_alpha=watermark_alpha,
+        watermark_premultiplied=watermark_premultiplied,
+    )
+
+
+def _assets_key(spec: RenderSpec) -> tuple:
+    """Fields of the spec the logo variants depend on (encoding options are not among them)"""
+    return (spec.width, spec.height, spec.watermark_width, spec.watermark_opacity)
+
+
+def get_render_assets(spec: RenderSpec) -> RenderAssets:
+    """Logo variants for `spec`, rendered on first use and reused by every later job"""
+    global _logo, _logo_path
+    key = _assets_key(spec)
+    assets = _assets.get(key)
+    if assets is not None:
+        return assets
+
+    with _lock:
+        if key not in _assets:
+            if _logo is None:
+                _logo = load_logo()
+                _logo_path = _cache_logo_png(_logo)
+            _assets[key] = render_assets(_logo, _logo_path, spec)
+            logger.info(f"Rendered logo assets for {spec.width}x{spec.height}")
+        return _assets[key]
+
+
+def warm_assets(specs: Iterable[RenderSpec]):
+    """Pre-render the assets of the given specs at worker startup"""
+    for spec in specs:
+        try:
+            get_render_assets(spec)
+        except Exception as e:
+            # Jobs retry on first use; a missing cache directory must not stop the worker
+            logger.warning(f"Could not pre-render logo assets: {e}")
+
+
+def clear_assets():
+    """Drop the in-memory assets (the logo is reloaded on next use)"""
+    global _logo, _logo_path
+    with _lock:
+        _logo = None
+        _logo_path = None
+        _assets.clear()
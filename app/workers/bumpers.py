@@ -0,0 +1,68 @@
+"""
+Pre-encoded intro/outro segments ("bumpers")
+
+The 2.5 s intro and outro are static logo frames, so they are encoded once
+per output spec (resolution, fps, encoder options, logo) and cached in the
+worker cache directory. Jobs only encode the player's footage and join it
+with the cached bumpers through the concat demuxer (stream copy).
+"""
+import hashlib
+import os
+import uuid
+from app.core.config import settings
+from app.workers.rendering import RenderSpec
+from app.workers.ffmpeg_engine import (
+    get_ffmpeg_binary, encoding_args, build_bumper_filters, run_ffmpeg
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def bumper_cache_key(kind: str, logo_path: str, spec: RenderSpec) -> str:
+    """Key of a bumper: anything that changes its pixels or its bitstream parameters"""
+    digest = hashlib.sha1()
+    with open(logo_path, 'rb') as f:
+        digest.update(f.read())
+    seconds = spec.intro_seconds if kind == 'intro' else spec.outro_seconds
+    digest.update(repr((kind, seconds, spec.width, spec.height, spec.fps, encoding_args(spec))).encode())
+    return digest.hexdigest()[:16]
+
+
+def get_bumper(kind: str, logo_path: str, spec: RenderSpec) -> str:
+    """
+    Path of the encoded intro/outro for `spec`, encoding it on first use
+
+    Args:
+        kind: "intro" or "outro"
+        logo_path: PNG of the logo shown full frame
+        spec: Output spec the bumper must match
+    """
+    bumper_dir = os.path.join(settings.worker_cache_dir, 'bumpers')
+    os.makedirs(bumper_dir, exist_ok=True)
+    bumper_path = os.path.join(bumper_dir, f"{kind}_{bumper_cache_key(kind, logo_path, spec)}.mp4")
+    if os.path.exists(bumper_path):
+        return bumper_path
+
+    seconds = spec.intro_seconds if kind == 'intro' else spec.outro_seconds
+    logger.info(f"Encoding {kind} bumper for {spec.width}x{spec.height}@{spec.fps}: {bumper_path}")
+
+    # Encode to a private file and rename: concurrent slots never see a partial bumper
+    temp_path = f"{bumper_path}.{uuid.uuid4().hex}.tmp.mp4"
+    try:
+        run_ffmpeg([
+            get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+            '-i', logo_path,
+            '-filter_complex', ";".join(["[0:v]format=rgba[logo]", *build_bumper_filters(spec, seconds, "logo", "out")]),
+            '-map', '[out]',
+            '-an',
+            *encoding_args(spec),
+            '-movflags', '+faststart',
+            temp_path,
+        ])
+        os.replace(temp_path, bumper_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return bumper_path
@@ -0,0 +1,141 @@
+"""
+Stage checkpoints of a processing job
+
+A job goes through four stages:
+
+    downloaded -> encoded -> uploaded -> recorded
+
+The artifacts of the first two (the downloaded original, the processed
+output and its previews) are kept in a checkpoint directory keyed by video
+id and pipeline version under WORKER_CHECKPOINT_DIR, which outlives the job
+workspace. A retried job (after a crash, a recycled child or a failed
+upload) finds them there and resumes at the first incomplete stage.
+
+Uploaded outputs are keyed the same way in storage (`output_name`), so a
+retry on another instance still finds an upload that finished before the
+database update. `recorded` is the video's processed status in the
+database; the claim skips those videos, so it needs no marker.
+"""
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("downloaded", "encoded", "uploaded", "recorded")
+
+STATE_FILE = "stages.json"
+
+
+def checkpoint_root() -> str:
+    """Directory holding the checkpoints (under the scratch directory unless configured)"""
+    return settings.worker_checkpoint_dir or os.path.join(settings.worker_scratch_dir, "checkpoints")
+
+
+def output_name(video_id: str, pipeline_version: Optional[int] = None) -> str:
+    """Base name of the processed outputs of a video (without extension)"""
+    version = settings.pipeline_version if pipeline_version is None else pipeline_version
+    return f"processed_{video_id}_v{version}"
+
+
+class JobCheckpoint:
+    """Completed stages and kept artifacts of one video at one pipeline version"""
+
+    def __init__(self, video_id: str, pipeline_version: Optional[int] = None, root: Optional[str] = None):
+        version = settings.pipeline_version if pipeline_version is None else pipeline_version
+        self.path = os.path.join(root or checkpoint_root(), f"{video_id}_v{version}")
+        os.makedirs(self.path, exist_ok=True)
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(os.path.join(self.path, STATE_FILE)) as f:
+                self._stages = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def file(self, name: str) -> str:
+        """Path of an artifact kept in the checkpoint"""
+        return os.path.join(self.path, name)
+
+    def is_done(self, stage: str) -> bool:
+        """Whether `stage` completed and the artifacts it recorded are still there"""
+        data = self._stages.get(stage)
+        if data is None:
+            return False
+        return all(os.path.exists(self.file(name)) for name in data.get("files", []))
+
+    def get(self, stage: str) -> Dict[str, Any]:
+        """Data recorded with a completed stage"""
+        return self._stages.get(stage, {})
+
+    def mark(self, stage: str, files: List[str] = (), **data):
+        """Record `stage` as completed, with the artifact names it produced"""
+        self._stages[stage] = {"files": list(files), "completed_at": time.time(), **data}
+        temp_path = self.file(f"{STATE_FILE}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(self._stages, f)
+        os.replace(temp_path, self.file(STATE_FILE))
+
+    def resume_stage(self) -> str:
+        """First stage that is not complete"""
+        for stage in STAGES[:-1]:
+            if not self.is_done(stage):
+                return stage
+        return STAGES[-1]
+
+    def clear(self):
+        """Drop the checkpoint once the result is recorded"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def prune_checkpoints(max_age_hours: Optional[int] = None, root: Optional[str] = None) -> int:
+    """Remove checkpoints of jobs abandoned for more than `max_age_hours`; returns how many"""
+    root = root or checkpoint_root()
+    max_age_hours = settings.worker_checkpoint_ttl_hours if max_age_hours is None else max_age_hours
+    if not os.path.isdir(root):
+        return 0
+
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"Removed {removed} abandoned checkpoints from {root}")
+    return removed
+
+
+def find_published(file_storage, name: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Processed paths of the outputs named `name` if a previous attempt published them
+
+    Looks for the HLS master playlist or the MP4 in storage. The previews are
+    returned only if both were published.
+    """
+    # Imported here: both modules build on the ffmpeg engine
+    from app.workers.hls import MASTER_PLAYLIST
+    from app.workers.previews import preview_filenames
+
+    for filename in (f"{name}/{MASTER_PLAYLIST}", f"{name}.mp4"):
+        processed_path = file_storage.get_file_path(filename, settings.processed_dir)
+        if file_storage.file_exists(processed_path):
+            break
+    else:
+        return None
+
+    stored_previews = [
+        file_storage.get_file_path(filename, settings.processed_dir) for filename in preview_filenames(name)
+    ]
+    if not all(file_storage.file_exists(path) for path in stored_previews):
+        stored_previews = [None, None]
+    return {"processed_path": processed_path, "thumbnail_path": stored_previews[0], "preview_path": stored_previews[1]}
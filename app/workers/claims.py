@@ -0,0 +1,80 @@
+"""
+Idempotent job claiming shared by the SQS and Celery workers
+
+A claim lease is short (VIDEO_CLAIM_LEASE_SECONDS) and renewed by the job
+while it runs, so the lease of a worker that crashed expires before its
+message is redelivered and the redelivery resumes the job instead of
+finding it busy.
+"""
+import os
+import socket
+import threading
+import time
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.video_service import VideoService, ClaimResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_worker_id() -> str:
+    """Identify this worker process as the owner of a claim lease"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_video(db: Session, video_id: str) -> ClaimResult:
+    """Claim a video for processing with the configured lease and pipeline version"""
+    return VideoService.claim_video(
+        db,
+        video_id,
+        worker_id=get_worker_id(),
+        lease_seconds=settings.video_claim_lease_seconds,
+        pipeline_version=settings.pipeline_version
+    )
+
+
+class LeaseRenewal:
+    """Background thread that keeps this worker's lease on a video alive while its job runs"""
+
+    def __init__(self, video_id: str, interval: int = None, lease_seconds: int = None,
+                 max_job_seconds: int = None, session_factory=SessionLocal):
+        self.video_id = video_id
+        self.worker_id = get_worker_id()
+        self.interval = interval or settings.sqs_heartbeat_interval
+        self.lease_seconds = lease_seconds or settings.video_claim_lease_seconds
+        self.max_job_seconds = max_job_seconds or settings.sqs_max_job_seconds
+        self.session_factory = session_factory
+        self._started = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{video_id}", daemon=True)
+
+    def start(self) -> "LeaseRenewal":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+
+    def renew(self) -> bool:
+        """Extend the lease once; False once it is no longer worth renewing"""
+        if time.monotonic() - self._started > self.max_job_seconds:
+            # A hung job lets its lease lapse, like its message (see app/workers/heartbeat.py)
+            logger.warning(f"Job for video {self.video_id} exceeded {self.max_job_seconds}s, "
+                           f"no longer renewing its lease")
+            return False
+        db = self.session_factory()
+        try:
+            return VideoService.renew_lease(db, self.video_id, self.worker_id, self.lease_seconds)
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not self.renew():
+                    return
+            except Exception as e:
+                logger.error(f"Error renewing the lease of video {self.video_id}: {e}")
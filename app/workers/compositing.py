@@ -0,0 +1,53 @@
+"""
+Watermark compositing for the moviepy engine
+
+`CompositeVideoClip([clip, watermark])` blits the watermark through moviepy's
+generic path on every frame: it allocates a new background, resolves the
+position, converts the mask and redoes the opacity math. The watermark never
+moves, so `WatermarkBlender` computes the region, the inverse alpha and the
+premultiplied color once and blends each frame with a few vectorized NumPy
+operations on preallocated buffers.
+"""
+import numpy as np
+from app.workers.assets import RenderAssets
+
+
+class WatermarkBlender:
+    """Blend the pre-rendered watermark into the bottom-right corner of each frame"""
+
+    def __init__(self, assets: RenderAssets, frame_width: int, frame_height: int):
+        height, width = assets.watermark_alpha.shape
+        # A watermark larger than the frame is cut like a blit at ('right', 'bottom')
+        crop_y = max(0, height - frame_height)
+        crop_x = max(0, width - frame_width)
+        alpha = assets.watermark_alpha[crop_y:, crop_x:].astype(np.float32)
+        premultiplied = assets.watermark_premultiplied[crop_y:, crop_x:].astype(np.float32)
+
+        self.frame_size = (frame_height, frame_width)
+        self.region = (
+            slice(frame_height - alpha.shape[0], frame_height),
+            slice(frame_width - alpha.shape[1], frame_width),
+        )
+        # out = premultiplied + (1 - alpha) * frame; + 0.5 rounds on the uint8 cast
+        self.inverse_alpha = (1.0 - alpha)[:, :, None]
+        self.premultiplied = premultiplied + 0.5
+        self._blend = np.empty(premultiplied.shape, dtype=np.float32)
+        self._frame = np.empty(self.frame_size + (3,), dtype=np.uint8)
+
+    def blend(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Return `frame` with the watermark applied
+
+        Writable uint8 frames are blended in place; read-only or non-uint8
+        frames are first copied into a buffer owned by the blender, so the
+        returned array is only valid until the next call.
+        """
+        if frame.dtype != np.uint8 or not frame.flags.writeable:
+            np.copyto(self._frame, frame[:, :, :3], casting='unsafe')
+            frame = self._frame
+
+        region = frame[self.region]
+        np.multiply(region, self.inverse_alpha, out=self._blend)
+        np.add(self._blend, self.premultiplied, out=self._blend)
+        np.copyto(region, self._blend, casting='unsafe')
+        return frame
@@ -0,0 +1,139 @@
+"""
+Encoding profiles and the backlog policy that selects them
+
+A profile fixes the x264 preset, CRF, encoder threads and output fps. The
+worker encodes with the quality profile while the queue keeps up and
+switches to a faster profile when the backlog grows too deep or too old.
+It returns to the quality profile only after the backlog has drained below
+lower thresholds (hysteresis), so the profile does not flap around a single
+threshold.
+"""
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Any, Optional
+from app.core.config import settings
+from app.workers.rendering import RenderSpec
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """x264 options of one named profile"""
+    name: str
+    preset: str
+    crf: int
+    threads: int = 0  # 0 = let the encoder decide
+    fps: int = 24
+
+
+ENCODING_PROFILES: Dict[str, EncodingProfile] = {
+    # libx264 defaults: the output every video had before profiles existed
+    "quality": EncodingProfile(name="quality", preset="medium", crf=23),
+    "balanced": EncodingProfile(name="balanced", preset="veryfast", crf=23),
+    "fast": EncodingProfile(name="fast", preset="ultrafast", crf=26, fps=20),
+}
+
+
+def get_encoding_profile(name: Optional[str] = None) -> EncodingProfile:
+    """Profile by name (settings.encoding_profile by default), falling back to "quality\""""
+    name = name or settings.encoding_profile
+    profile = ENCODING_PROFILES.get(name)
+    if profile is None:
+        logger.warning(f"Unknown encoding profile '{name}', using 'quality'")
+        profile = ENCODING_PROFILES["quality"]
+    return profile
+
+
+def apply_profile(spec: RenderSpec, profile: EncodingProfile) -> RenderSpec:
+    """Render spec encoded with `profile`"""
+    return replace(spec, fps=profile.fps, preset=profile.preset, crf=profile.crf,
+                   threads=profile.threads, encoding_profile=profile.name)
+
+
+def message_age_seconds(message: Dict[str, Any], now: Optional[float] = None) -> Optional[float]:
+    """Seconds since the message was enqueued (SentTimestamp attribute), if known"""
+    sent_timestamp = (message.get('Attributes') or {}).get('SentTimestamp')
+    if not sent_timestamp:
+        return None
+    try:
+        return max(0.0, (now or time.time()) - int(sent_timestamp) / 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+class BacklogEncodingPolicy:
+    """
+    Pick the encoding profile from the queue backlog
+
+    Depth is ApproximateNumberOfMessages, sampled at most every
+    `sample_interval` seconds; age is the age of the last received message.
+    """
+
+    def __init__(self, queue_service=None,
+                 normal_profile: Optional[str] = None,
+                 backlog_profile: Optional[str] = None,
+                 depth_high: Optional[int] = None,
+                 depth_low: Optional[int] = None,
+                 age_high: Optional[float] = None,
+                 age_low: Optional[float] = None,
+                 sample_interval: Optional[float] = None):
+        self.queue_service = queue_service
+        self.normal_profile = get_encoding_profile(normal_profile or settings.encoding_profile)
+        self.backlog_profile = get_encoding_profile(backlog_profile or settings.encoding_backlog_profile)
+        self.depth_high = depth_high if depth_high is not None else settings.encoding_backlog_depth_high
+        self.depth_low = depth_low if depth_low is not None else settings.encoding_backlog_depth_low
+        self.age_high = age_high if age_high is not None else settings.encoding_backlog_age_high_seconds
+        self.age_low = age_low if age_low is not None else settings.encoding_backlog_age_low_seconds
+        self.sample_interval = sample_interval if sample_interval is not None else settings.encoding_policy_interval
+
+        self.in_backlog = False
+        self.depth: Optional[int] = None
+        self.age: Optional[float] = None
+        self._sampled_at: Optional[float] = None
+
+    def observe_message(self, message: Dict[str, Any]):
+        """Record the age of a received message"""
+        age = message_age_seconds(message)
+        if age is not None:
+            self.age = age
+
+    def _sample_depth(self):
+        """Refresh the queue depth when the last sample is older than `sample_interval`"""
+        now = time.monotonic()
+        if self.queue_service is None or (
+                self._sampled_at is not None and now - self._sampled_at < self.sample_interval):
+            return
+        self._sampled_at = now
+        attributes = self.queue_service.get_queue_attributes()
+        if attributes:
+            try:
+                self.depth = int(attributes.get('ApproximateNumberOfMessages', 0))
+            except (TypeError, ValueError):
+                pass
+
+    def update(self, depth: Optional[int] = None, age: Optional[float] = None) -> EncodingProfile:
+        """Apply the thresholds to the given (or last known) depth and age"""
+        if depth is not None:
+            self.depth = depth
+        if age is not None:
+            self.age = age
+        depth = self.depth or 0
+        age = self.age or 0.0
+
+        if not self.in_backlog and (depth >= self.depth_high or age >= self.age_high):
+            self.in_backlog = True
+            logger.info(f"Backlog detected (depth={depth}, age={age:.0f}s): "
+                        f"encoding with '{self.backlog_profile.name}'")
+        elif self.in_backlog and depth <= self.depth_low and age <= self.age_low:
+            self.in_backlog = False
+            logger.info(f"Backlog cleared (depth={depth}, age={age:.0f}s): "
+                        f"encoding with '{self.normal_profile.name}'")
+
+        return self.backlog_profile if self.in_backlog else self.normal_profile
+
+    def select(self) -> EncodingProfile:
+        """Profile for the next job"""
+        self._sample_depth()
+        return self.update()
@@ -0,0 +1,388 @@
+"""
+ffmpeg filter-graph processing engine
+
+Builds one `filter_complex` that trims, scales/crops/pads, drops audio,
+overlays the watermark and concatenates the intro and outro, and runs it as a
+single ffmpeg process. Frames never leave ffmpeg, unlike the moviepy engine
+which round-trips every frame through NumPy.
+"""
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from app.core.config import settings
+from app.workers.rendering import RenderSpec, PreviewPaths
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FFmpegError(Exception):
+    """ffmpeg exited with an error"""
+    pass
+
+
+def get_ffmpeg_binary() -> str:
+    """ffmpeg executable: FFMPEG_BINARY setting or the one bundled with moviepy (imageio-ffmpeg)"""
+    if settings.ffmpeg_binary:
+        return settings.ffmpeg_binary
+    from moviepy.config import get_setting
+    return get_setting("FFMPEG_BINARY")
+
+
+def encoding_args(spec: RenderSpec) -> List[str]:
+    """
+    Video encoder options shared by every encode of a given spec
+
+    Segments joined by the concat demuxer with stream copy (bumpers, body)
+    must be encoded with exactly these options.
+    """
+    args = [
+        '-c:v', 'libx264',
+        '-preset', spec.preset,
+        '-crf', str(spec.crf),
+        '-pix_fmt', 'yuv420p',
+        '-r', str(spec.fps),
+    ]
+    if spec.threads:
+        args += ['-threads', str(spec.threads)]
+    return args
+
+
+def build_filter_complex(spec: RenderSpec, with_bumpers: bool = True, with_previews: bool = False) -> str:
+    """
+    Filter graph for input 0 (the clip, already trimmed with -t) and input 1 (the logo)
+
+    The clip is scaled to the target height keeping its aspect ratio, then
+    center-cropped when wider or padded with black bars when narrower than
+    the target width, as the moviepy engine does. The intro/outro logo is
+    fitted inside the frame on black, so the output is always exactly
+    width x height.
+
+    Without bumpers the graph only produces the watermarked clip; the intro
+    and outro are then joined from pre-encoded segments (see app/workers/bumpers.py).
+    With previews the watermarked clip also feeds the [poster] and [sprite]
+    outputs (see build_preview_filters).
+    """
+    w, h, fps = spec.width, spec.height, spec.fps
+    frame = f"setsar=1,fps={fps},format=yuv420p"
+    body = f"[0:v]scale=-2:{h},crop='min(iw,{w})':{h},pad={w}:{h}:(ow-iw)/2:0:black,{frame}[body]"
+    watermark = f"[wm_src]scale={spec.watermark_width}:-1,colorchannelmixer=aa={spec.watermark_opacity}[wm]"
+    clip_label = "out" if not with_bumpers else "main"
+    if with_previews:
+        clip = [
+            "[body][wm]overlay=W-w:H-h[clip]",
+            f"[clip]split=3[{clip_label}][poster_src][sprite_src]",
+            *build_preview_filters(spec, "poster_src", "sprite_src"),
+        ]
+    else:
+        clip = [f"[body][wm]overlay=W-w:H-h[{clip_label}]"]
+
+    if not with_bumpers:
+        return ";".join([
+            body,
+            "[1:v]format=rgba[wm_src]",
+            watermark,
+            *clip,
+        ])
+
+    return ";".join([
+        body,
+        "[1:v]format=rgba,split=3[wm_src][intro_src][outro_src]",
+        watermark,
+        *clip,
+        *build_bumper_filters(spec, spec.intro_seconds, "intro_src", "intro"),
+        *build_bumper_filters(spec, spec.outro_seconds, "outro_src", "outro"),
+        "[intro][main][outro]concat=n=3:v=1:a=0[out]",
+    ])
+
+
+def sprite_grid(spec: RenderSpec):
+    """(columns, rows) of the sprite sheet: one tile every VIDEO_SPRITE_INTERVAL seconds of the clip"""
+    tiles = max(1, math.ceil(spec.max_duration / settings.video_sprite_interval))
+    columns = min(settings.video_sprite_columns, tiles)
+    return columns, math.ceil(tiles / columns)
+
+
+def build_preview_filters(spec: RenderSpec, poster_label: str, sprite_label: str) -> List[str]:
+    """
+    Poster and sprite sheet filters fed by the watermarked clip
+
+    The poster is the most representative frame of the first seconds (the
+    `thumbnail` filter skips black or blurry first frames); the sprite sheet
+    is a grid of small frames sampled every VIDEO_SPRITE_INTERVAL seconds.
+    """
+    columns, rows = sprite_grid(spec)
+    return [
+        f"[{poster_label}]thumbnail={spec.fps * 2},scale={settings.video_poster_width}:-2[poster]",
+        f"[{sprite_label}]fps=1/{settings.video_sprite_interval},"
+        f"scale={settings.video_sprite_tile_width}:-2,tile={columns}x{rows}[sprite]",
+    ]
+
+
+def preview_output_args(previews: PreviewPaths) -> List[str]:
+    """Outputs of the [poster] and [sprite] graph labels (one JPEG each)"""
+    return [
+        '-map', '[poster]', '-frames:v', '1', '-q:v', '3', previews.poster,
+        '-map', '[sprite]', '-frames:v', '1', '-q:v', '5', previews.sprite,
+    ]
+
+
+def build_bumper_filters(spec: RenderSpec, seconds: float, logo_label: str, out_label: str) -> List[str]:
+    """Filters rendering the logo fitted on a black frame for `seconds` (intro/outro)"""
+    w, h, fps = spec.width, spec.height, spec.fps
+    return [
+        f"[{logo_label}]scale={w}:{h}:force_original_aspect_ratio=decrease[{out_label}_logo]",
+        f"color=c=black:s={w}x{h}:r={fps}:d={seconds}[{out_label}_bg]",
+        f"[{out_label}_bg][{out_label}_logo]overlay=(W-w)/2:(H-h)/2,setsar=1,fps={fps},format=yuv420p[{out_label}]",
+    ]
+
+
+def input_options(input_path: str) -> List[str]:
+    """Demuxer options for the clip: reconnect on network errors when reading over HTTP(S)"""
+    if input_path.startswith(('http://', 'https://')):
+        return ['-reconnect', '1', '-reconnect_on_network_error', '1', '-reconnect_delay_max', '5']
+    return []
+
+
+# Output written to stdout while it is being encoded
+STREAM_OUTPUT = 'pipe:1'
+
+
+def container_args(output_path: str) -> List[str]:
+    """
+    MP4 muxer options: moov first for files, fragmented MP4 when streaming
+
+    +faststart rewrites the file at the end, which a pipe cannot do; fragmented
+    MP4 needs no seek and can be uploaded in parts while it is written.
+    """
+    if output_path == STREAM_OUTPUT:
+        return ['-movflags', '+frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4']
+    return ['-movflags', '+faststart']
+
+
+def build_ffmpeg_command(input_path: str, output_path: str, logo_path: str, spec: RenderSpec,
+                         with_bumpers: bool = True, previews: Optional[PreviewPaths] = None,
+                         first_frame: int = 0, frames: Optional[int] = None) -> List[str]:
+    """
+    Full ffmpeg command line for one processed video (or only its body without bumpers)
+
+    With `previews` the poster and sprite sheet are written by the same process.
+    `first_frame` and `frames` render only that range of output frames of the
+    clip (a parallel segment, see encode_body_in_segments).
+    """
+    trim = ['-t', str(spec.max_duration)]
+    if first_frame:
+        # Output-frame boundary, rounded down so the source frame shown there is kept
+        start = math.floor(first_frame / spec.fps * 1e6) / 1e6
+        trim = ['-ss', f"{start:.6f}", '-t', f"{spec.max_duration - start:.6f}"]
+    command = [
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        # Input-side -t: ffmpeg stops reading the clip once max_duration is covered
+        # (for a streamed URL it also stops fetching bytes)
+        *input_options(input_path),
+        *trim, '-i', input_path,
+        '-i', logo_path,
+        '-filter_complex', build_filter_complex(spec, with_bumpers, with_previews=previews is not None),
+        '-map', '[out]',
+        *(['-frames:v', str(frames)] if frames is not None else []),
+        '-an',
+        *encoding_args(spec),
+        *container_args(output_path),
+        output_path,
+    ]
+    if previews is not None:
+        command += preview_output_args(previews)
+    return command
+
+
+def run_ffmpeg(command: List[str]):
+    """Run an ffmpeg command, raising FFmpegError on failure"""
+    logger.debug(f"Running ffmpeg: {' '.join(command)}")
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+    except OSError as e:
+        raise FFmpegError(f"Could not run ffmpeg: {e}")
+    if result.returncode != 0:
+        raise FFmpegError(result.stderr.strip()[-2000:] or f"ffmpeg exited with code {result.returncode}")
+
+
+StreamConsumer = Callable[..., str]
+
+
+def stream_ffmpeg(command: List[str], consumer: StreamConsumer) -> str:
+    """
+    Run an ffmpeg command writing to stdout and hand its output to `consumer`
+
+    The consumer is called as consumer(stream, finalize) and must call
+    finalize() after reading to EOF and before committing what it read:
+    finalize waits for ffmpeg and raises FFmpegError if it failed.
+    """
+    logger.debug(f"Streaming ffmpeg: {' '.join(command)}")
+    # stderr goes to a file: a full stderr pipe would block ffmpeg while we read stdout
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        except OSError as e:
+            raise FFmpegError(f"Could not run ffmpeg: {e}")
+
+        def finalize():
+            returncode = process.wait()
+            if returncode != 0:
+                stderr.seek(0)
+                message = stderr.read().decode(errors='replace').strip()[-2000:]
+                raise FFmpegError(message or f"ffmpeg exited with code {returncode}")
+
+        try:
+            return consumer(process.stdout, finalize)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+
+def build_concat_command(list_path: str, output_path: str) -> List[str]:
+    """Concat demuxer command joining the segments listed in `list_path` by stream copy"""
+    return [
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'concat', '-safe', '0', '-i', list_path,
+        '-c', 'copy',
+        *container_args(output_path),
+        output_path,
+    ]
+
+
+def concat_segments(segment_paths: List[str], output_path: str,
+                    stream_to: Optional[StreamConsumer] = None) -> Optional[str]:
+    """
+    Join segments encoded with identical parameters using the concat demuxer (stream copy)
+
+    With `stream_to` the result is written as fragmented MP4 to the consumer
+    instead of `output_path` (which then only names the temporary list file).
+    """
+    list_path = f"{output_path}.concat.txt"
+    with open(list_path, 'w') as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        if stream_to is not None:
+            return stream_ffmpeg(build_concat_command(list_path, STREAM_OUTPUT), stream_to)
+        run_ffmpeg(build_concat_command(list_path, output_path))
+        return None
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+
+def parallel_segment_count() -> int:
+    """Segments encoded concurrently per video (VIDEO_PARALLEL_SEGMENTS, 0 = one per CPU)"""
+    if settings.video_parallel_segments > 0:
+        return settings.video_parallel_segments
+    return os.cpu_count() or 1
+
+
+def plan_segments(spec: RenderSpec, segments: int,
+                  source_duration: Optional[float] = None) -> List[Tuple[int, Optional[int]]]:
+    """
+    Output-frame ranges (first frame, frame count) of the parallel segments of a clip
+
+    Segments are sized from the clip that is actually rendered: the source's
+    duration up to the spec's maximum duration. Every boundary falls on an
+    output frame, so the segments add up to the frames of a single-pass
+    encode; the last one (count None) runs to the end of the clip. Without a
+    probed duration the clip is one segment, as later ones could be empty.
+    """
+    if not source_duration:
+        return [(0, None)]
+    clip_frames = min(source_duration, spec.max_duration) * spec.fps
+    segment_frames = max(1, int(max(settings.video_segment_min_seconds * spec.fps, clip_frames / segments)))
+    count = max(1, int(clip_frames // segment_frames))
+    return [(index * segment_frames, segment_frames) for index in range(count - 1)] + \
+        [((count - 1) * segment_frames, None)]
+
+
+def encode_body_in_segments(input_path: str, output_path: str, logo_path: str, spec: RenderSpec,
+                            segments: int, source_duration: Optional[float] = None) -> List[str]:
+    """
+    Encode the watermarked clip as segments of whole output frames, `segments` at a time
+
+    Each segment is a separate ffmpeg process that seeks the input to its
+    first frame and renders a fixed number of frames with identical encoder
+    options, so the segments join by stream copy into exactly the frames of a
+    single-pass render. Returns the encoded segment paths in order.
+    """
+    plan = plan_segments(spec, segments, source_duration)
+    work_dir = f"{output_path}.segments"
+    os.makedirs(work_dir, exist_ok=True)
+    encoded = [os.path.join(work_dir, f"encoded_{index:03d}.mp4") for index in range(len(plan))]
+    logger.info(f"Encoding {len(plan)} segments of {plan[0][1] or 'all'} frames with {segments} parallel encoders")
+
+    # Threads only wait on the ffmpeg processes doing the work
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        futures = [
+            executor.submit(run_ffmpeg, build_ffmpeg_command(input_path, target, logo_path, spec, with_bumpers=False,
+                                                             first_frame=first_frame, frames=frames))
+            for (first_frame, frames), target in zip(plan, encoded)
+        ]
+        for future in futures:
+            future.result()
+    return encoded
+
+
+def render_with_ffmpeg(input_path: str, output_path: str, logo_path: str, spec: RenderSpec,
+                       stream_to: Optional[StreamConsumer] = None,
+                       previews: Optional[PreviewPaths] = None,
+                       source_duration: Optional[float] = None) -> Optional[str]:
+    """
+    Render the processed video with ffmpeg
+
+    With VIDEO_BUMPER_MODE=concat (default) only the player's footage is
+    encoded; the intro and outro come from segments encoded once per spec and
+    are joined by stream copy. With "filter" everything is rendered in one graph.
+    With VIDEO_PARALLEL_SEGMENTS != 1 (concat mode only) the footage itself is
+    encoded as frame ranges by concurrent ffmpeg processes.
+
+    With `stream_to` the final output is written as fragmented MP4 to that
+    consumer (see stream_ffmpeg) instead of `output_path`, and its return
+    value is returned.
+
+    With `previews` the poster and sprite sheet come from the same decode,
+    except in parallel segment mode where no single process sees the whole clip.
+    `source_duration` (from the probe) sizes the parallel segments.
+    """
+    if settings.video_bumper_mode != 'concat':
+        if stream_to is not None:
+            return stream_ffmpeg(
+                build_ffmpeg_command(input_path, STREAM_OUTPUT, logo_path, spec, previews=previews), stream_to
+            )
+        run_ffmpeg(build_ffmpeg_command(input_path, output_path, logo_path, spec, previews=previews))
+        return None
+
+    # Imported here: bumpers builds on the helpers of this module
+    from app.workers.bumpers import get_bumper
+
+    intro_path = get_bumper('intro', logo_path, spec)
+    outro_path = get_bumper('outro', logo_path, spec)
+    segments = parallel_segment_count()
+    body_paths = []
+    try:
+        if segments > 1:
+            body_paths = encode_body_in_segments(input_path, output_path, logo_path, spec, segments,
+                                                 source_duration=source_duration)
+        else:
+            body_paths = [f"{output_path}.body.mp4"]
+            run_ffmpeg(build_ffmpeg_command(input_path, body_paths[0], logo_path, spec,
+                                            with_bumpers=False, previews=previews))
+        return concat_segments([intro_path, *body_paths, outro_path], output_path, stream_to)
+    finally:
+        for path in body_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        segment_dir = f"{output_path}.segments"
+        if os.path.isdir(segment_dir):
+            shutil.rmtree(segment_dir, ignore_errors=True)
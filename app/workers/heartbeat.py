@@ -0,0 +1,74 @@
+"""
+Visibility-timeout heartbeat for in-flight SQS messages
+
+While a job is running its message is periodically made invisible again for
+`sqs_visibility_timeout` seconds, so long encodes or slow S3 transfers do not
+let a second worker pick up the same video.
+"""
+import threading
+import time
+from typing import Dict
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class VisibilityHeartbeat:
+    """Background thread that extends the visibility of tracked messages"""
+
+    def __init__(self, sqs_service, interval: int = None,
+                 visibility_timeout: int = None, max_job_seconds: int = None):
+        self.sqs_service = sqs_service
+        self.interval = interval or settings.sqs_heartbeat_interval
+        self.visibility_timeout = visibility_timeout or settings.sqs_visibility_timeout
+        self.max_job_seconds = max_job_seconds or settings.sqs_max_job_seconds
+        self._tracked: Dict[str, float] = {}  # receipt handle -> monotonic start time
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqs-heartbeat", daemon=True)
+
+    def start(self) -> "VisibilityHeartbeat":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+
+    def track(self, receipt_handle: str):
+        """Start extending the visibility of a message"""
+        with self._lock:
+            self._tracked[receipt_handle] = time.monotonic()
+
+    def untrack(self, receipt_handle: str):
+        """Stop extending the visibility of a message (job finished)"""
+        with self._lock:
+            self._tracked.pop(receipt_handle, None)
+
+    def beat(self):
+        """Extend the visibility of every tracked message once"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                handle for handle, started in self._tracked.items()
+                if now - started > self.max_job_seconds
+            ]
+            for handle in expired:
+                # Let a hung job's message be redelivered once its current timeout runs out
+                logger.warning(f"Job exceeded {self.max_job_seconds}s, no longer extending visibility: {handle[:20]}...")
+                del self._tracked[handle]
+            handles = list(self._tracked)
+
+        if not handles:
+            return
+
+        failed = self.sqs_service.change_messages_visibility(handles, self.visibility_timeout)
+        logger.debug(f"Extended visibility of {len(handles) - len(failed)}/{len(handles)} message(s)")
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.beat()
+            except Exception as e:
+                logger.error(f"Error in visibility heartbeat: {e}")
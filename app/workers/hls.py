@@ -0,0 +1,151 @@
+"""
+HLS adaptive-bitrate output
+
+One ffmpeg process decodes the clip once, renders the processed video
+(intro, watermarked clip, outro) and splits it into a ladder of renditions
+(e.g. 360p/540p/720p). Each rendition is encoded with keyframes at every
+segment boundary so players can switch between them, and the segments,
+media playlists and master playlist are rendered into one directory, which is
+then published through the file storage.
+"""
+import os
+import shutil
+from dataclasses import dataclass
+from typing import List, Optional
+from app.core.config import settings
+from app.services.file_storage import HLS_MASTER_PLAYLIST
+from app.workers.rendering import RenderSpec, PreviewPaths
+from app.workers.ffmpeg_engine import (
+    FFmpegError, get_ffmpeg_binary, build_filter_complex, input_options, preview_output_args, run_ffmpeg
+)
+from app.workers.workspace import publish_file
+import logging
+
+logger = logging.getLogger(__name__)
+
+MASTER_PLAYLIST = HLS_MASTER_PLAYLIST
+
+
+@dataclass(frozen=True)
+class HlsRendition:
+    """One rung of the ladder"""
+    height: int
+    max_bitrate_kbps: int
+
+
+# Bitrate caps per height; the CRF of the encoding profile applies below the cap
+HLS_BITRATES = {360: 800, 480: 1400, 540: 1800, 720: 3000, 1080: 6000}
+
+
+def get_hls_ladder(spec: RenderSpec) -> List[HlsRendition]:
+    """Renditions from VIDEO_HLS_LADDER, never taller than the output spec"""
+    heights = sorted({int(height) for height in settings.video_hls_ladder.split(",") if height.strip()})
+    heights = [height for height in heights if height <= spec.height] or [spec.height]
+    return [HlsRendition(height=height, max_bitrate_kbps=HLS_BITRATES.get(height, height * 4))
+            for height in heights]
+
+
+def build_hls_command(input_path: str, output_dir: str, logo_path: str, spec: RenderSpec,
+                      ladder: List[HlsRendition], previews: Optional[PreviewPaths] = None) -> List[str]:
+    """ffmpeg command rendering the processed video once and encoding every rendition as HLS"""
+    segment_seconds = settings.video_hls_segment_seconds
+    labels = [f"v{index}" for index in range(len(ladder))]
+    graph = ";".join([
+        build_filter_complex(spec, with_previews=previews is not None),
+        f"[out]split={len(ladder)}" + "".join(f"[{label}_src]" for label in labels),
+        *[f"[{label}_src]scale=-2:{rendition.height}[{label}]" for label, rendition in zip(labels, ladder)],
+    ])
+
+    command = [
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        *input_options(input_path),
+        '-t', str(spec.max_duration), '-i', input_path,
+        '-i', logo_path,
+        '-filter_complex', graph,
+    ]
+    for index, (label, rendition) in enumerate(zip(labels, ladder)):
+        command += [
+            '-map', f'[{label}]',
+            f'-maxrate:v:{index}', f'{rendition.max_bitrate_kbps}k',
+            f'-bufsize:v:{index}', f'{rendition.max_bitrate_kbps * 2}k',
+        ]
+    command += [
+        '-an',
+        '-c:v', 'libx264',
+        '-preset', spec.preset,
+        '-crf', str(spec.crf),
+        '-pix_fmt', 'yuv420p',
+        '-r', str(spec.fps),
+        # Keyframe at every segment boundary, aligned across renditions
+        '-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})',
+        '-sc_threshold', '0',
+        '-f', 'hls',
+        '-hls_time', str(segment_seconds),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(output_dir, 'v%v', 'segment_%03d.ts'),
+        '-master_pl_name', MASTER_PLAYLIST,
+        '-var_stream_map', " ".join(f"v:{index}" for index in range(len(ladder))),
+        os.path.join(output_dir, 'v%v', 'index.m3u8'),
+    ]
+    if spec.threads:
+        command[command.index('-an'):command.index('-an')] = ['-threads', str(spec.threads)]
+    if previews is not None:
+        command += preview_output_args(previews)
+    return command
+
+
+def render_hls(input_path: str, output_dir: str, logo_path: str, spec: RenderSpec,
+               previews: Optional[PreviewPaths] = None) -> str:
+    """Render the HLS ladder (and the previews) into `output_dir` and return the master playlist path"""
+    ladder = get_hls_ladder(spec)
+    os.makedirs(output_dir, exist_ok=True)
+    logger.info(f"Rendering HLS ladder {[rendition.height for rendition in ladder]}")
+    run_ffmpeg(build_hls_command(input_path, output_dir, logo_path, spec, ladder, previews))
+    return os.path.join(output_dir, MASTER_PLAYLIST)
+
+
+def publish_hls(file_storage, hls_dir: str, name: str) -> str:
+    """
+    Store the HLS files under `name/` in the processed directory
+
+    Returns the processed path of the master playlist: its public URL for
+    cloud storage, its local path otherwise.
+    """
+    if settings.storage_type != 'cloud':
+        # Whole directory renamed into place: the ladder appears complete or not at all
+        published_dir = publish_file(hls_dir, settings.processed_dir, name)
+        return os.path.join(published_dir, MASTER_PLAYLIST)
+
+    files = []
+    for root, _, filenames in os.walk(hls_dir):
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(root, filename), hls_dir))
+    # Segments first and playlists last, so a playlist never references a missing segment
+    files.sort(key=lambda path: (path.endswith('.m3u8'), path == MASTER_PLAYLIST, path))
+    for relative_path in files:
+        file_storage.save_file_from_path(
+            os.path.join(hls_dir, relative_path),
+            f"{name}/{relative_path}",
+            settings.processed_dir
+        )
+    logger.info(f"Published {len(files)} HLS files under {name}/")
+    return file_storage.get_file_path(f"{name}/{MASTER_PLAYLIST}", settings.processed_dir)
+
+
+def try_render_hls(input_path: str, output_dir: str, spec: RenderSpec,
+                   previews: Optional[PreviewPaths] = None) -> bool:
+    """
+    Render the HLS output of a job into `output_dir`, False when ffmpeg could not render it
+
+    The caller falls back to the single MP4 output on False; publish_hls
+    stores the directory afterwards.
+    """
+    from app.workers.assets import get_render_assets
+
+    try:
+        render_hls(input_path, output_dir, get_render_assets(spec).logo_path, spec, previews)
+    except FFmpegError as e:
+        logger.warning(f"HLS rendering failed, falling back to MP4 output: {e}")
+        shutil.rmtree(output_dir, ignore_errors=True)
+        return False
+    return True
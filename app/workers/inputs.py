@@ -0,0 +1,48 @@
+"""
+Worker input: where the decoder reads the original video from
+
+S3 originals are either downloaded to /tmp before decoding (WORKER_INPUT_MODE=download)
+or streamed: ffmpeg reads a presigned URL with ranged GETs, so download and
+decode overlap and reading stops once video_max_duration is covered.
+Downloads are served from the worker's source cache when it has the object
+(see app/workers/source_cache.py).
+"""
+import os
+import uuid
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.workers.source_cache import get_source_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_input(file_storage, video_path: str, download_dir: str = "/tmp") -> Tuple[str, Optional[str]]:
+    """
+    Path or URL the renderer should read `video_path` from
+
+    Downloads go to `download_dir` (the job workspace).
+
+    Returns:
+        (input path or URL, local copy to remove after processing or None)
+    """
+    if not video_path.startswith('s3://'):
+        return video_path, None
+
+    if settings.worker_input_mode == 'stream' and hasattr(file_storage, 'generate_presigned_url'):
+        url = file_storage.generate_presigned_url(video_path)
+        if url:
+            logger.info(f"Streaming video from S3: {video_path}")
+            return url, None
+        logger.warning(f"Could not presign {video_path}, downloading it instead")
+
+    logger.info(f"Downloading video from S3: {video_path}")
+    local_video_path = os.path.join(download_dir, f"{uuid.uuid4()}.mp4")
+    source_cache = get_source_cache() if hasattr(file_storage, 'get_etag') else None
+    if source_cache is not None:
+        downloaded = source_cache.fetch(file_storage, video_path, local_video_path)
+    else:
+        downloaded = file_storage.download_file(video_path, local_video_path)
+    if not downloaded:
+        raise Exception(f"Failed to download video from S3: {video_path}")
+    return local_video_path, local_video_path
@@ -0,0 +1,113 @@
+"""
+Probe stage of the split pipeline
+
+Uploads are sent to the upload queue. With WORKER_ROLE=probe a worker takes
+each one, drops duplicates and reads the original's container header; sources
+without a usable video stream are marked failed there, so a corrupt upload
+never takes an encode slot. Valid uploads get their source properties
+recorded on the video row and are forwarded to the encode queue, whose
+workers (WORKER_ROLE=encode) read those properties instead of probing again.
+
+Only the header is read: S3 originals are probed through a presigned URL
+(a few ranged GETs) and never downloaded here.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.video import Video, VideoStatus
+from app.services.file_storage import get_file_storage
+from app.services.queue_backend import QueueBackendInterface
+from app.services.video_service import VideoService
+from app.workers.probe import SourceInfo, SourceReadError, probe_video
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIN_FRAME_SIZE = 16
+
+
+def validate_source(source: Optional[SourceInfo]) -> Optional[str]:
+    """Why a probed source cannot be encoded, or None if it can"""
+    if source is None:
+        return "no readable video stream"
+    if source.width < MIN_FRAME_SIZE or source.height < MIN_FRAME_SIZE:
+        return f"frame size {source.width}x{source.height} is too small"
+    if source.duration is not None and source.duration < settings.video_min_duration:
+        return f"duration {source.duration:.2f}s is shorter than {settings.video_min_duration}s"
+    return None
+
+
+def _is_duplicate(video: Video) -> bool:
+    """Whether the video is already processed at this pipeline version or held by a live encode lease"""
+    if video.status == VideoStatus.processed and (video.pipeline_version or 0) >= settings.pipeline_version:
+        return True
+    if video.status in (VideoStatus.processing, VideoStatus.processed) and video.lease_expires_at is not None:
+        expires_at = video.lease_expires_at
+        if expires_at.tzinfo is None:
+            # SQLite returns naive datetimes
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at > datetime.now(timezone.utc)
+    return False
+
+
+def _probe_path(file_storage, video_path: str) -> Optional[str]:
+    """Path or presigned URL to probe `video_path` from, None if an S3 original cannot be presigned"""
+    if not video_path.startswith('s3://'):
+        return video_path
+    if hasattr(file_storage, 'generate_presigned_url'):
+        return file_storage.generate_presigned_url(video_path)
+    return None
+
+
+def admit_video(video_id: str, video_path: str, encode_queue: QueueBackendInterface) -> bool:
+    """
+    Validate one upload and forward it to the encode queue
+
+    Returns:
+        True if the upload message is done with (forwarded, rejected or a
+        duplicate), False if it should be retried
+    """
+    db = SessionLocal()
+    try:
+        video = VideoService.get_video_by_id_any_user(db, video_id)
+        if video is None:
+            logger.info(f"Skipping video {video_id}: not found")
+            return True
+        if _is_duplicate(video):
+            logger.info(f"Skipping video {video_id}: already {video.status.value}")
+            return True
+
+        probe_path = _probe_path(get_file_storage(), video_path)
+        if probe_path is None:
+            logger.warning(f"Could not presign {video_path}, will retry")
+            return False
+
+        try:
+            source = probe_video(probe_path, name=video_path)
+        except SourceReadError as e:
+            # Not the upload's fault (network, storage, expired URL): probe it again later
+            logger.warning(f"{e}, will retry")
+            return False
+        reason = validate_source(source)
+        if reason is not None:
+            logger.warning(f"Rejecting video {video_id}: {reason}")
+            VideoService.update_video_status(
+                db, video_id, VideoStatus.failed, error_message=f"Invalid video: {reason}"
+            )
+            return True
+
+        VideoService.record_source_info(
+            db, video_id, source.width, source.height,
+            duration=source.duration, fps=source.fps, codec=source.codec
+        )
+        message_id = encode_queue.send_video_processing_message(video_id=video_id, video_path=video_path)
+        if not message_id:
+            logger.warning(f"Could not forward video {video_id} to the encode queue, will retry")
+            return False
+
+        logger.info(f"Video {video_id} is a {source.width}x{source.height} {source.codec} source, "
+                    f"forwarded to the encode queue ({message_id})")
+        return True
+    finally:
+        db.close()
@@ -0,0 +1,106 @@
+"""
+moviepy processing engine
+
+Decodes every frame into NumPy, composites intro, watermark and outro in
+Python and pipes the result back to ffmpeg. Kept as the fallback engine for
+inputs the ffmpeg filter-graph engine cannot handle.
+"""
+from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip
+from PIL import Image
+from app.workers.rendering import RenderSpec
+from app.workers.assets import RenderAssets
+from app.workers.compositing import WatermarkBlender
+
+# Fix for PIL.Image.ANTIALIAS compatibility
+if not hasattr(Image, 'ANTIALIAS'):
+    Image.ANTIALIAS = Image.LANCZOS
+
+
+def render_with_moviepy(input_path: str, output_path: str, logo_path: str, spec: RenderSpec,
+                        temp_audiofile: str = 'temp-audio.m4a', assets: RenderAssets = None):
+    """
+    Render the processed video (intro + watermarked clip + outro) with moviepy
+
+    With `assets` the pre-rendered logo variants are used as-is and the
+    watermark is blended into each frame by `WatermarkBlender`; otherwise the
+    logo at `logo_path` is loaded, resized and composited for this job.
+    """
+    video_clip = VideoFileClip(input_path)
+    intro_clip = outro_clip = final_video = None
+
+    try:
+        # Get video duration and trim to max 30 seconds
+        duration = min(video_clip.duration, spec.max_duration)
+        clip = video_clip.subclip(0, duration)
+
+        # Resize maintaining aspect ratio
+        clip = clip.resize(height=spec.height)
+
+        # If width is different from target, crop or pad
+        if clip.w != spec.width:
+            if clip.w > spec.width:
+                # Crop from center
+                x_center = clip.w / 2
+                x_start = x_center - spec.width / 2
+                clip = clip.crop(x1=x_start, x2=x_start + spec.width)
+            else:
+                # Add padding (black bars)
+                clip = clip.margin(
+                    left=(spec.width - clip.w) // 2,
+                    right=(spec.width - clip.w) // 2,
+                    color=(0, 0, 0)
+                )
+
+        # Remove audio
+        clip = clip.without_audio()
+
+        if assets is not None:
+            # Intro/outro frame and watermark pre-rendered by the worker asset cache
+            intro_clip = ImageClip(assets.frame, duration=spec.intro_seconds)
+            outro_clip = ImageClip(assets.frame, duration=spec.outro_seconds)
+            blender = WatermarkBlender(assets, clip.w, clip.h)
+            video_with_watermark = clip.fl_image(blender.blend)
+        else:
+            # Create intro clip
+            intro_clip = ImageClip(logo_path, duration=spec.intro_seconds).resize(
+                width=spec.width, height=spec.height
+            )
+
+            # Create outro clip
+            outro_clip = ImageClip(logo_path, duration=spec.outro_seconds).resize(
+                width=spec.width, height=spec.height
+            )
+
+            # Create watermark (small logo in corner)
+            watermark = ImageClip(logo_path).set_duration(clip.duration).resize(
+                width=spec.watermark_width
+            ).set_position(('right', 'bottom')).set_opacity(spec.watermark_opacity)
+
+            # Composite video with watermark
+            video_with_watermark = CompositeVideoClip([clip, watermark])
+
+        # Concatenate intro + video + outro
+        final_video = CompositeVideoClip([
+            intro_clip,
+            video_with_watermark.set_start(spec.intro_seconds),
+            outro_clip.set_start(spec.intro_seconds + clip.duration)
+        ])
+
+        # Export processed video
+        final_video.write_videofile(
+            output_path,
+            codec='libx264',
+            audio_codec='aac' if final_video.audio else None,
+            temp_audiofile=temp_audiofile,
+            remove_temp=True,
+            fps=spec.fps,
+            preset=spec.preset,
+            threads=spec.threads or None,
+            ffmpeg_params=['-crf', str(spec.crf)]
+        )
+
+    finally:
+        video_clip.close()
+        for clip_to_close in (final_video, intro_clip, outro_clip):
+            if clip_to_close is not None:
+                clip_to_close.close()
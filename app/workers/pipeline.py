@@ -0,0 +1,480 @@
+"""
+Video processing pipeline shared by the SQS and Celery workers
+
+A job runs through six stages:
+
+- fetch: claim the video and download its original
+- probe: read the source resolution, duration and codec (already recorded
+  on the video when a probe worker validated it, see app/workers/intake.py)
+- transform: plan the output (render spec at the source's tier, previews)
+- encode: render the processed video (or HLS ladder) and its previews
+- publish: store the output and previews
+- record: mark the video processed
+
+The transform itself (trim, scale, watermark, bumpers) runs inside the
+encoder's filter graph; the transform stage decides its parameters. Every
+stage is timed, and the job ends with a `PipelineResult` that the entry
+points log and return. Processed and failed jobs are also stored as rows of
+video_processing_runs (WORKER_RECORD_RUNS) for the admin stats endpoint.
+
+Completed stages are checkpointed (app/workers/checkpoints.py), so a retry
+skips the stages an earlier attempt finished. The SQS worker can also run
+the stages in three groups that overlap across jobs (see
+app/workers/pipelined.py): fetch, then probe to encode, then publish and
+record.
+"""
+import enum
+import os
+import time
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.core.config import settings
+from app.models.processing_run import RUN_STAGES
+from app.models.video import VideoStatus
+from app.services.file_storage import get_file_storage
+from app.services.processing_run_service import ProcessingRunService
+from app.services.video_service import VideoService, ClaimResult
+from app.workers.assets import get_render_assets
+from app.workers.checkpoints import JobCheckpoint, output_name, find_published
+from app.workers.claims import LeaseRenewal, claim_video, get_worker_id
+from app.workers.hls import try_render_hls, publish_hls
+from app.workers.inputs import resolve_input
+from app.workers.previews import preview_paths, ensure_previews, publish_previews
+from app.workers.probe import SourceInfo, SourceReadError, probe_video
+from app.workers.rendering import RenderSpec, render_video, default_render_spec, fit_to_source
+from app.workers.uploads import StreamingUpload
+from app.workers.workspace import JobWorkspace, publish_file, has_scratch_capacity
+import logging
+
+logger = logging.getLogger(__name__)
+
+STAGES = RUN_STAGES  # Each stage has a timing column in video_processing_runs
+
+
+class Outcome(enum.Enum):
+    """How a job ended"""
+    processed = "processed"  # Output published and recorded
+    skipped = "skipped"      # Already processed or deleted: nothing to do
+    busy = "busy"            # Leased by another worker (which may have died): retry later
+    deferred = "deferred"    # Not enough scratch space to start: retry later
+    failed = "failed"        # A stage raised; the video is marked failed
+
+
+@dataclass
+class PipelineResult:
+    """Structured outcome of one job, with the seconds spent in each stage that ran"""
+    video_id: Optional[str]
+    outcome: Outcome
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    resumed_at: Optional[str] = None
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+    engine: Optional[str] = None
+    encoding_profile: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    input_bytes: Optional[int] = None
+    output_bytes: Optional[int] = None
+    processed_path: Optional[str] = None
+
+    @property
+    def acknowledge(self) -> bool:
+        """Whether the queue message is done with (False: leave it for a retry)"""
+        return self.outcome in (Outcome.processed, Outcome.skipped)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stage_seconds.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form (Celery task result)"""
+        return {
+            "video_id": self.video_id,
+            "outcome": self.outcome.value,
+            "stage_seconds": {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+            "total_seconds": round(self.total_seconds, 3),
+            "resumed_at": self.resumed_at,
+            "failed_stage": self.failed_stage,
+            "error": self.error,
+            "engine": self.engine,
+            "encoding_profile": self.encoding_profile,
+            "width": self.width,
+            "height": self.height,
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "processed_path": self.processed_path,
+        }
+
+
+@dataclass
+class VideoJob:
+    """
+    State of one video as it moves through the stages
+
+    `outcome` is set as soon as the job ends early (skipped, busy, deferred,
+    failed); later stages leave such a job untouched.
+    """
+    video_id: Optional[str]
+    video_path: Optional[str]
+    encoding_profile: Optional[str] = None
+    receipt_handle: Optional[str] = None
+    db: Optional[Session] = None
+    lease: Optional[LeaseRenewal] = None
+    file_storage: Any = None
+    workspace: Optional[JobWorkspace] = None
+    checkpoint: Optional[JobCheckpoint] = None
+    name: Optional[str] = None
+    input_path: Optional[str] = None
+    source: Optional[SourceInfo] = None
+    spec: Optional[RenderSpec] = None
+    previews: Any = None
+    outcome: Optional[Outcome] = None
+    result: Optional[PipelineResult] = None
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    resumed_at: Optional[str] = None
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _fail(job: VideoJob, stage_name: str, error: Exception):
+    """Record a failed job in the database; the message is retried"""
+    logger.error(f"Error processing video {job.video_id} in {stage_name}: {str(error)}")
+    job.outcome = Outcome.failed
+    job.failed_stage = stage_name
+    job.error = str(error)
+
+    # Update database with error
+    try:
+        video = VideoService.get_video_by_id_any_user(job.db, job.video_id)
+        if video is not None and video.status == VideoStatus.processed:
+            # Failed re-render: the published output stays up, only the lease is released
+            VideoService.release_lease(job.db, job.video_id)
+        else:
+            VideoService.update_video_status(
+                job.db, job.video_id, VideoStatus.failed, error_message=str(error)
+            )
+    except Exception as db_error:
+        logger.error(f"Error updating database: {db_error}")
+
+
+def _encoded(job: VideoJob) -> bool:
+    """Whether an earlier attempt already produced the output (probe to encode are skipped)"""
+    return job.checkpoint.is_done('encoded') or job.checkpoint.is_done('uploaded')
+
+
+def stage(name: str, skip_if: Optional[Callable[[VideoJob], bool]] = None):
+    """
+    Run a stage function on a job that is still going, timing it
+
+    A stage that raises fails the job; a stage whose `skip_if` holds (its
+    work was checkpointed by an earlier attempt) is not run or timed.
+    """
+    def decorator(function: Callable[[VideoJob], None]):
+        @wraps(function)
+        def run(job: VideoJob) -> VideoJob:
+            if job.outcome is not None or (skip_if is not None and skip_if(job)):
+                return job
+            started = time.perf_counter()
+            try:
+                function(job)
+            except Exception as e:
+                _fail(job, name, e)
+            finally:
+                job.stage_seconds[name] = time.perf_counter() - started
+            return job
+        return run
+    return decorator
+
+
+def _file_size(path: str) -> Optional[int]:
+    """Size of a local file, None for URLs and missing files"""
+    return os.path.getsize(path) if os.path.isfile(path) else None
+
+
+def _processed_path(file_storage, filename: str) -> str:
+    """Processed path of `filename`: its public URL for cloud storage, its local path otherwise"""
+    return file_storage.get_file_path(filename, settings.processed_dir)
+
+
+@stage("fetch")
+def fetch(job: VideoJob):
+    """Claim the video and download its original, unless an earlier attempt got further"""
+    # Admission check before claiming: without scratch space the job would fail half-way
+    if not has_scratch_capacity():
+        logger.warning(f"Not enough scratch space for video {job.video_id}, leaving it for later")
+        job.outcome = Outcome.deferred
+        return
+
+    job.db = SessionLocal()
+    job.file_storage = get_file_storage()
+
+    # Claim the video; duplicate deliveries of a claimed or processed video are not run again
+    claim = claim_video(job.db, job.video_id)
+    if claim == ClaimResult.claimed_by_other:
+        # The holder may have died mid-job: retry once its lease expires and resume from its checkpoint
+        logger.info(f"Video {job.video_id} is leased by another worker, will retry")
+        job.outcome = Outcome.busy
+        return
+    if claim != ClaimResult.claimed:
+        logger.info(f"Skipping video {job.video_id}: {claim.value}")
+        job.outcome = Outcome.skipped
+        return
+    # Keep the lease alive while the job runs; it lapses soon after a crash
+    job.lease = LeaseRenewal(job.video_id, session_factory=SessionLocal).start()
+
+    # Scratch directory for the temporary files of this attempt
+    job.workspace = JobWorkspace(job.video_id)
+    # Artifacts that outlive the attempt, keyed by video and pipeline version
+    job.checkpoint = checkpoint = JobCheckpoint(job.video_id)
+    job.name = output_name(job.video_id)
+
+    if not checkpoint.is_done('uploaded'):
+        published = find_published(job.file_storage, job.name)
+        if published is not None:
+            # Uploaded by an attempt that died before recording it (possibly on another instance)
+            checkpoint.mark('uploaded', **published)
+
+    resume = checkpoint.resume_stage()
+    if resume != 'downloaded':
+        job.resumed_at = resume
+        logger.info(f"Resuming video {job.video_id} at stage '{resume}'")
+    if resume == 'downloaded':
+        # Handle S3 paths: stream from a presigned URL or download to the checkpoint
+        job.input_path, local_copy = resolve_input(job.file_storage, job.video_path, checkpoint.path)
+        # Local originals and presigned URLs (streamed input) have nothing to keep
+        checkpoint.mark('downloaded', files=[os.path.basename(local_copy)] if local_copy else [],
+                        input_bytes=_file_size(job.input_path))
+    elif resume == 'encoded':
+        downloaded = checkpoint.get('downloaded')['files']
+        if downloaded:
+            job.input_path = checkpoint.file(downloaded[0])
+        else:
+            job.input_path, _ = resolve_input(job.file_storage, job.video_path, checkpoint.path)
+
+
+@stage("probe", skip_if=_encoded)
+def probe(job: VideoJob):
+    """Read the source's video stream, unless a probe worker or an earlier attempt recorded it on the video"""
+    video = VideoService.get_video_by_id_any_user(job.db, job.video_id)
+    if video is not None and video.source_height:
+        job.source = SourceInfo(width=video.source_width, height=video.source_height,
+                                duration=video.source_duration, fps=video.source_fps, codec=video.source_codec)
+        return
+
+    # A source that cannot be probed is rendered at the default tier
+    try:
+        job.source = source = probe_video(job.input_path, name=job.video_path)
+    except SourceReadError as e:
+        logger.warning(str(e))
+        return
+    if source is not None:
+        VideoService.record_source_info(job.db, job.video_id, source.width, source.height,
+                                        duration=source.duration, fps=source.fps, codec=source.codec)
+
+
+@stage("transform", skip_if=_encoded)
+def transform(job: VideoJob):
+    """Plan the render: encoding profile, output tier (never upscaling the source) and previews"""
+    spec = default_render_spec(job.encoding_profile)
+    job.spec = fit_to_source(spec, job.source.height if job.source else None)
+    if job.spec is not spec:
+        logger.info(f"Source is {job.source.width}x{job.source.height}, "
+                    f"rendering at {job.spec.width}x{job.spec.height}")
+    job.previews = preview_paths(job.checkpoint, job.name) if settings.video_previews_enabled else None
+
+
+@stage("encode", skip_if=_encoded)
+def encode(job: VideoJob):
+    """Render the processed video (or HLS ladder) and its previews into the checkpoint"""
+    spec, previews = job.spec, job.previews
+
+    # Optional HLS ladder, rendered into a directory named after the output; without it
+    # (or if it fails) the single MP4 is produced
+    processed_path = None
+    engine_used = 'ffmpeg'
+    files = []
+    hls = (settings.video_hls_enabled and settings.video_engine == 'ffmpeg'
+           and try_render_hls(job.input_path, job.checkpoint.file(job.name), spec, previews))
+    if hls:
+        files.append(job.name)
+    else:
+        output_filename = f"{job.name}.mp4"
+        streaming_upload = None
+        if settings.storage_type == 'cloud' and settings.video_streaming_upload:
+            streaming_upload = StreamingUpload(job.file_storage, output_filename, settings.processed_dir)
+        engine_used = render_video(job.input_path, job.checkpoint.file(output_filename), spec,
+                                   stream_to=streaming_upload, previews=previews,
+                                   source_duration=job.source.duration if job.source else None)
+        logger.info(f"Video {job.video_id} rendered with {engine_used} engine ({spec.encoding_profile} profile)")
+
+        if streaming_upload is not None and streaming_upload.stored_path is not None:
+            processed_path = _processed_path(job.file_storage, output_filename)
+        else:
+            files.append(output_filename)
+
+    # Poster and sprite sheet for the feed (extracted here if the render did not produce them)
+    has_previews = bool(previews) and ensure_previews(
+        job.input_path, get_render_assets(spec).logo_path, spec, previews
+    )
+    if has_previews:
+        files += [os.path.basename(previews.poster), os.path.basename(previews.sprite)]
+
+    # processed_path is set when the output is already in storage (streamed upload)
+    output_bytes = _file_size(job.checkpoint.file(files[0])) if processed_path is None else None
+    job.checkpoint.mark('encoded', files=files, processed_path=processed_path, hls=bool(hls),
+                        previews=has_previews, engine=engine_used, encoding_profile=spec.encoding_profile,
+                        width=spec.width, height=spec.height, output_bytes=output_bytes)
+
+
+@stage("publish", skip_if=lambda job: job.checkpoint.is_done('uploaded'))
+def publish(job: VideoJob):
+    """Store the encoded output and its previews next to each other"""
+    checkpoint = job.checkpoint
+    file_storage = job.file_storage
+    encoded = checkpoint.get('encoded')
+    processed_path = encoded.get('processed_path')
+
+    if encoded.get('hls'):
+        processed_path = publish_hls(file_storage, checkpoint.file(job.name), job.name)
+    elif processed_path is None:
+        output_filename = f"{job.name}.mp4"
+        local_output_path = checkpoint.file(output_filename)
+        # Upload processed video to S3 if using cloud storage
+        if settings.storage_type == 'cloud':
+            # Upload from disk (multipart for large files) instead of reading the video into memory
+            logger.info(f"Uploading processed video to S3")
+            file_storage.save_file_from_path(local_output_path, output_filename, settings.processed_dir)
+            processed_path = _processed_path(file_storage, output_filename)
+            logger.info(f"Processed video saved to S3, public URL: {processed_path}")
+        else:
+            # Local storage: publish into processed_dir by atomic rename
+            processed_path = publish_file(local_output_path, settings.processed_dir, output_filename)
+
+    # Poster and sprite sheet for the feed, stored next to the processed video
+    thumbnail_path = preview_path = None
+    if encoded.get('previews'):
+        thumbnail_path, preview_path = publish_previews(file_storage, preview_paths(checkpoint, job.name))
+
+    checkpoint.mark('uploaded', processed_path=processed_path, thumbnail_path=thumbnail_path,
+                    preview_path=preview_path, encoding_profile=encoded.get('encoding_profile'))
+
+
+@stage("record")
+def record(job: VideoJob):
+    """Mark the video processed, then delete the output it replaces (re-render of a processed video)"""
+    uploaded = job.checkpoint.get('uploaded')
+    video = VideoService.get_video_by_id_any_user(job.db, job.video_id)
+    superseded = []
+    if video is not None and video.status == VideoStatus.processed:
+        superseded = [video.processed_path, video.thumbnail_path, video.preview_path]
+
+    # Update database with success
+    VideoService.update_video_status(
+        job.db, job.video_id, VideoStatus.processed, processed_path=uploaded['processed_path'],
+        pipeline_version=settings.pipeline_version, encoding_profile=uploaded.get('encoding_profile'),
+        thumbnail_path=uploaded.get('thumbnail_path'), preview_path=uploaded.get('preview_path')
+    )
+    job.outcome = Outcome.processed
+    logger.info(f"Video {job.video_id} processed successfully")
+
+    current = {video.processed_path, video.thumbnail_path, video.preview_path} if video is not None else set()
+    for path in superseded:
+        if path and path not in current:
+            try:
+                VideoService.delete_stored_file(job.file_storage, path)
+            except Exception as e:
+                # Only storage space is lost: the video already points at its new output
+                logger.warning(f"Could not delete superseded output {path} of video {job.video_id}: {e}")
+
+
+def _build_result(job: VideoJob) -> PipelineResult:
+    checkpoint = job.checkpoint
+    downloaded = checkpoint.get('downloaded') if checkpoint is not None else {}
+    encoded = checkpoint.get('encoded') if checkpoint is not None else {}
+    uploaded = checkpoint.get('uploaded') if checkpoint is not None else {}
+    return PipelineResult(
+        video_id=job.video_id,
+        outcome=job.outcome,
+        stage_seconds=dict(job.stage_seconds),
+        resumed_at=job.resumed_at,
+        failed_stage=job.failed_stage,
+        error=job.error,
+        engine=encoded.get('engine'),
+        encoding_profile=uploaded.get('encoding_profile', encoded.get('encoding_profile')),
+        width=encoded.get('width'),
+        height=encoded.get('height'),
+        input_bytes=downloaded.get('input_bytes'),
+        output_bytes=encoded.get('output_bytes'),
+        processed_path=uploaded.get('processed_path'),
+    )
+
+
+def _record_run(job: VideoJob, result: PipelineResult):
+    """Store a processed or failed job in video_processing_runs; losing the row never fails the job"""
+    if not settings.worker_record_runs or job.db is None:
+        return
+    if result.outcome not in (Outcome.processed, Outcome.failed):
+        return
+    try:
+        ProcessingRunService.record_run(
+            job.db,
+            video_id=result.video_id,
+            worker_id=get_worker_id(),
+            outcome=result.outcome.value,
+            failed_stage=result.failed_stage,
+            error_message=result.error,
+            resumed_at=result.resumed_at,
+            engine=result.engine,
+            encoding_profile=result.encoding_profile,
+            pipeline_version=settings.pipeline_version,
+            width=result.width,
+            height=result.height,
+            input_bytes=result.input_bytes,
+            output_bytes=result.output_bytes,
+            total_seconds=result.total_seconds,
+            **{f"{name}_seconds": seconds for name, seconds in result.stage_seconds.items()}
+        )
+    except Exception as e:
+        job.db.rollback()
+        logger.warning(f"Could not record the processing run of video {job.video_id}: {e}")
+
+
+def fetch_phase(job: VideoJob) -> VideoJob:
+    """Network-in group: fetch"""
+    return fetch(job)
+
+
+def encode_phase(job: VideoJob) -> VideoJob:
+    """CPU group: probe, transform and encode"""
+    return encode(transform(probe(job)))
+
+
+def finish_phase(job: VideoJob) -> PipelineResult:
+    """Network-out group: publish and record, then release the job's resources and report"""
+    try:
+        record(publish(job))
+        job.result = _build_result(job)
+        if job.outcome == Outcome.processed:
+            job.checkpoint.clear()
+        _record_run(job, job.result)
+    finally:
+        if job.lease is not None:
+            job.lease.stop()
+        if job.workspace is not None:
+            job.workspace.cleanup()
+        if job.db is not None:
+            job.db.close()
+
+    result = job.result
+    timings = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result.stage_seconds.items())
+    logger.info(f"Video {job.video_id} {result.outcome.value} in {result.total_seconds:.2f}s ({timings})")
+    return result
+
+
+def run_pipeline(video_id: str, video_path: str, encoding_profile: Optional[str] = None) -> PipelineResult:
+    """Run every stage of one job in this thread"""
+    job = VideoJob(video_id=video_id, video_path=video_path, encoding_profile=encoding_profile)
+    return finish_phase(encode_phase(fetch_phase(job)))
@@ -0,0 +1,103 @@
+"""
+In-process pipeline for the sequential worker
+
+A job is split in three phases that use different resources:
+
+    fetch (network in) -> encode (CPU) -> finish (network out, database)
+
+`PipelinedRunner` runs fetch and finish in their own threads, so the next
+job's input downloads and the previous job's output uploads while the
+current job encodes. Jobs move between phases through bounded queues: at
+most `prefetch_depth` fetched jobs wait for the encoder and at most
+`upload_depth` encoded jobs wait to be finished, which caps the scratch
+space and memory in use at `prefetch_depth + upload_depth + 2` jobs (one
+encoding, one finishing). There is still a single encoder.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream of jobs on a queue
+_DONE = object()
+
+
+class PipelinedRunner:
+    """
+    Run fetch -> encode -> finish with fetch and finish overlapping the encode
+
+    Args:
+        fetch: returns the next fetched job, or None when there is none right now
+        encode: encodes a fetched job (called in the thread running `run`)
+        finish: uploads and records an encoded job; called for every fetched job,
+            also when encode raised, so it can release the job's resources
+        should_stop: checked between jobs; once True no more jobs are fetched and
+            the jobs already fetched are encoded and finished before `run` returns
+    """
+
+    def __init__(self, fetch: Callable[[], Optional[Any]], encode: Callable[[Any], Any],
+                 finish: Callable[[Any], None], should_stop: Callable[[], bool],
+                 prefetch_depth: int = 1, upload_depth: int = 1):
+        self.fetch = fetch
+        self.encode = encode
+        self.finish = finish
+        self.should_stop = should_stop
+        self.fetched = queue.Queue()
+        # Taken before fetching, returned when the encoder picks the job up, so a
+        # job is only fetched when there is room for it to wait
+        self.prefetch_slots = threading.Semaphore(max(1, prefetch_depth))
+        self.encoded = queue.Queue(maxsize=max(1, upload_depth))
+
+    def _fetch_loop(self):
+        try:
+            while not self.should_stop():
+                if not self.prefetch_slots.acquire(timeout=1):
+                    continue
+                try:
+                    job = self.fetch()
+                except Exception as e:
+                    logger.error(f"Error fetching next job: {e}", exc_info=True)
+                    job = None
+                    time.sleep(5)
+                if job is None:
+                    self.prefetch_slots.release()
+                else:
+                    self.fetched.put(job)
+        finally:
+            self.fetched.put(_DONE)
+
+    def _finish_loop(self):
+        # Queue.put blocks the encoder while `upload_depth` jobs are already waiting here
+        while True:
+            job = self.encoded.get()
+            if job is _DONE:
+                return
+            try:
+                self.finish(job)
+            except Exception as e:
+                logger.error(f"Error finishing job: {e}", exc_info=True)
+
+    def run(self):
+        """Encode jobs until stopped, then drain the fetched jobs and wait for the finisher"""
+        fetcher = threading.Thread(target=self._fetch_loop, name="job-fetch", daemon=True)
+        finisher = threading.Thread(target=self._finish_loop, name="job-finish", daemon=True)
+        fetcher.start()
+        finisher.start()
+        try:
+            while True:
+                job = self.fetched.get()
+                if job is _DONE:
+                    break
+                self.prefetch_slots.release()
+                try:
+                    job = self.encode(job)
+                except Exception as e:
+                    logger.error(f"Error encoding job: {e}", exc_info=True)
+                self.encoded.put(job)
+        finally:
+            fetcher.join()
+            self.encoded.put(_DONE)
+            finisher.join()
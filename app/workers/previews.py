@@ -0,0 +1,74 @@
+"""
+Feed previews: poster image and sprite sheet
+
+The ffmpeg engine writes both from the same decode as the processed video
+(see build_preview_filters). When that is not possible (moviepy fallback,
+parallel segment encoding) they are extracted afterwards with one extra
+decode of the trimmed clip. They are stored next to the processed video.
+"""
+import os
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.workers.rendering import RenderSpec, PreviewPaths
+from app.workers.ffmpeg_engine import (
+    FFmpegError, get_ffmpeg_binary, build_filter_complex, input_options, preview_output_args, run_ffmpeg
+)
+from app.workers.workspace import publish_file
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def preview_filenames(name: str) -> Tuple[str, str]:
+    """File names of the (poster, sprite sheet) of the output `name`"""
+    return f"{name}_poster.jpg", f"{name}_sprite.jpg"
+
+
+def preview_paths(workspace, name: str) -> PreviewPaths:
+    """Workspace paths of the previews of the output `name`"""
+    poster, sprite = preview_filenames(name)
+    return PreviewPaths(poster=workspace.file(poster), sprite=workspace.file(sprite))
+
+
+def build_preview_command(input_path: str, logo_path: str, spec: RenderSpec, previews: PreviewPaths):
+    """ffmpeg command producing only the previews (the clip itself is discarded)"""
+    return [
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        *input_options(input_path),
+        '-t', str(spec.max_duration), '-i', input_path,
+        '-i', logo_path,
+        '-filter_complex', build_filter_complex(spec, with_bumpers=False, with_previews=True),
+        '-map', '[out]', '-f', 'null', '-',
+        *preview_output_args(previews),
+    ]
+
+
+def ensure_previews(input_path: str, logo_path: str, spec: RenderSpec, previews: PreviewPaths) -> bool:
+    """Extract the previews if the render did not produce them; False if they are unavailable"""
+    if os.path.exists(previews.poster) and os.path.exists(previews.sprite):
+        return True
+    try:
+        run_ffmpeg(build_preview_command(input_path, logo_path, spec, previews))
+        return True
+    except FFmpegError as e:
+        # Previews are optional: the video is still published without them
+        logger.warning(f"Could not extract previews: {e}")
+        return False
+
+
+def publish_previews(file_storage, previews: PreviewPaths) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Store the previews in the processed directory
+
+    Returns the (thumbnail, preview sprite) processed paths: public URLs for
+    cloud storage, local paths otherwise.
+    """
+    stored = []
+    for path in (previews.poster, previews.sprite):
+        filename = os.path.basename(path)
+        if settings.storage_type == 'cloud':
+            file_storage.save_file_from_path(path, filename, settings.processed_dir)
+            stored.append(file_storage.get_file_path(filename, settings.processed_dir))
+        else:
+            stored.append(publish_file(path, settings.processed_dir, filename))
+    return stored[0], stored[1]
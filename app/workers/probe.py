@@ -0,0 +1,96 @@
+"""
+Source probing
+
+Reads the video stream properties of an original from the header ffmpeg
+prints for its input (there is no ffprobe in the bundled ffmpeg). Only the
+container header is read, so probing a presigned URL costs a few ranged GETs.
+"""
+import re
+import subprocess
+from dataclasses import dataclass
+from typing import Optional
+from app.workers.ffmpeg_engine import get_ffmpeg_binary, input_options
+import logging
+
+logger = logging.getLogger(__name__)
+
+_VIDEO_STREAM = re.compile(r"Stream #\d+:\d+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})")
+_DURATION = re.compile(r"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_FPS = re.compile(r"(\d+(?:\.\d+)?) fps")
+_ROTATION = re.compile(r"(?:rotate\s*:\s*|rotation of )(-?\d+(?:\.\d+)?)")
+_OPEN_ERROR = re.compile(r"Error opening input: (.+)")
+# The only open error that comes from the file's contents rather than from reaching it
+_INVALID_DATA = "Invalid data found when processing input"
+
+
+class SourceReadError(Exception):
+    """The input could not be read (network, storage or timeout); probing again may succeed"""
+
+
+@dataclass(frozen=True)
+class SourceInfo:
+    """Video stream of an original, with width and height as displayed (rotation applied)"""
+    width: int
+    height: int
+    duration: Optional[float] = None
+    fps: Optional[float] = None
+    codec: Optional[str] = None
+    rotation: int = 0
+
+
+def parse_source_info(ffmpeg_output: str) -> Optional[SourceInfo]:
+    """SourceInfo from the input description ffmpeg prints on stderr, or None without a video stream"""
+    stream = _VIDEO_STREAM.search(ffmpeg_output)
+    if stream is None:
+        return None
+    codec, width, height = stream.group(1), int(stream.group(2)), int(stream.group(3))
+
+    duration = None
+    match = _DURATION.search(ffmpeg_output)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    stream_line = ffmpeg_output[stream.start():].split("\n", 1)[0]
+    match = _FPS.search(stream_line)
+    fps = float(match.group(1)) if match else None
+
+    match = _ROTATION.search(ffmpeg_output)
+    rotation = int(round(float(match.group(1)))) % 360 if match else 0
+    if rotation in (90, 270):
+        # Phones store portrait video as landscape frames plus a rotation
+        width, height = height, width
+
+    return SourceInfo(width=width, height=height, duration=duration, fps=fps, codec=codec, rotation=rotation)
+
+
+def probe_video(input_path: str, timeout: int = 60, name: Optional[str] = None) -> Optional[SourceInfo]:
+    """
+    Probe `input_path` (a local path or URL)
+
+    Returns None if the input was read but has no usable video stream, and
+    raises SourceReadError if it could not be read at all (a timeout, a
+    connection or HTTP error, a missing file). Messages refer to the input as
+    `name` (the video's storage path), never to a presigned URL and its
+    signature.
+    """
+    name = name or input_path
+    command = [get_ffmpeg_binary(), '-hide_banner', *input_options(input_path), '-i', input_path]
+    try:
+        # Without an output ffmpeg exits with an error after printing the input description
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        # The exception's text includes the command, and with it the input URL
+        raise SourceReadError(f"Timed out after {timeout}s probing {name}") from e
+    except OSError as e:
+        raise SourceReadError(f"Could not probe {name}: {e}") from e
+
+    output = result.stderr.decode(errors='replace')
+    info = parse_source_info(output)
+    if info is None:
+        match = _OPEN_ERROR.search(output)
+        if match and _INVALID_DATA not in match.group(1):
+            reason = match.group(1).strip().replace(input_path, name)
+            raise SourceReadError(f"Could not read {name}: {reason}")
+        logger.warning(f"No video stream found when probing {name}")
+    return info
@@ -0,0 +1,127 @@
+"""
+Bulk re-enqueue of videos for processing
+
+Selects failed videos, videos stuck in processing and videos rendered by an
+older pipeline version, and sends them back to SQS using SendMessageBatch at a
+controlled rate.
+
+Usage:
+    python -m app.workers.reprocess --failed --stuck-minutes 60 --outdated --rate 50
+"""
+import argparse
+import sys
+import time
+import logging
+from app.core.database import SessionLocal
+from app.core.config import settings
+from app.services.video_service import VideoService
+from app.services.sqs_service import get_sqs_service, SQS_BATCH_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Re-enqueue videos for processing")
+    parser.add_argument("--failed", action="store_true",
+                        help="Include videos with status 'failed'")
+    parser.add_argument("--stuck-minutes", type=int, default=None,
+                        help="Include videos in 'processing' not updated for this many minutes "
+                             "(workers only re-claim them once VIDEO_CLAIM_LEASE_SECONDS has expired)")
+    parser.add_argument("--outdated", action="store_true",
+                        help="Include processed videos from a pipeline older than PIPELINE_VERSION")
+    parser.add_argument("--rate", type=float, default=50.0,
+                        help="Maximum messages per second (default: 50)")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Maximum number of videos to re-enqueue")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only list the selected videos")
+    return parser.parse_args(argv)
+
+
+def reprocess_videos(include_failed: bool = False, stuck_minutes: int = None,
+                     outdated: bool = False, rate: float = 50.0,
+                     limit: int = None, dry_run: bool = False) -> int:
+    """
+    Re-enqueue the selected videos in batches of 10
+
+    Returns:
+        Number of videos successfully enqueued
+    """
+    db = SessionLocal()
+    sqs_service = get_sqs_service()
+    enqueued = 0
+
+    try:
+        videos = VideoService.get_videos_for_reprocess(
+            db,
+            include_failed=include_failed,
+            stuck_minutes=stuck_minutes,
+            below_pipeline_version=settings.pipeline_version if outdated else None,
+            limit=limit
+        )
+        logger.info(f"Selected {len(videos)} video(s) for reprocessing")
+
+        if dry_run:
+            for video in videos:
+                logger.info(f"[dry-run] {video.id} status={video.status.value} "
+                            f"pipeline_version={video.pipeline_version}")
+            return 0
+
+        # One SendMessageBatch request per interval keeps us at `rate` messages/s
+        interval = SQS_BATCH_LIMIT / rate if rate > 0 else 0
+
+        for start in range(0, len(videos), SQS_BATCH_LIMIT):
+            batch_started = time.monotonic()
+            batch = videos[start:start + SQS_BATCH_LIMIT]
+
+            results = sqs_service.send_messages_batch(
+                [(str(video.id), video.original_path) for video in batch]
+            )
+
+            for video in batch:
+                message_id = results.get(str(video.id))
+                if message_id:
+                    video.task_id = message_id
+                    enqueued += 1
+            db.commit()
+
+            elapsed = time.monotonic() - batch_started
+            if interval > elapsed:
+                time.sleep(interval - elapsed)
+
+        logger.info(f"Re-enqueued {enqueued}/{len(videos)} video(s)")
+        return enqueued
+
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if not (args.failed or args.stuck_minutes is not None or args.outdated):
+        logger.error("Nothing selected: use --failed, --stuck-minutes and/or --outdated")
+        return 2
+
+    if not get_sqs_service().is_configured() and not args.dry_run:
+        logger.error("SQS queue URL not configured. Please set SQS_QUEUE_URL environment variable.")
+        return 1
+
+    reprocess_videos(
+        include_failed=args.failed,
+        stuck_minutes=args.stuck_minutes,
+        outdated=args.outdated,
+        rate=args.rate,
+        limit=args.limit,
+        dry_run=args.dry_run
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(main())
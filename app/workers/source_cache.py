@@ -0,0 +1,178 @@
+"""
+On-disk LRU cache of downloaded originals
+
+Retries (SQS redelivery, Celery `self.retry`) and reprocess runs of a video
+download the same original again. Downloads go through this cache instead:
+entries are keyed by S3 key and ETag, so a replaced object is never served
+stale, and the least recently used entries are evicted once the cache grows
+past WORKER_SOURCE_CACHE_MB.
+
+The cache lives in one directory shared by every slot process of a worker.
+Index changes (insert, evict, hit bookkeeping) are serialized with an
+exclusive lock on a file in that directory; downloads happen outside it.
+Jobs get a hard link to the entry (a copy across filesystems), so evicting
+an entry never removes a file a job is reading.
+
+Hits, misses and bytes not downloaded are kept in `stats.json` next to the
+entries and logged with every lookup; `SourceCache.stats()` reads them.
+"""
+import contextlib
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Optional
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".src"
+STATS_FILE = "stats.json"
+LOCK_FILE = ".lock"
+
+
+def _link_or_copy(source: str, destination: str):
+    """Hard link `source` at `destination`, copying when they are on different filesystems"""
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copyfile(source, destination)
+
+
+class SourceCache:
+    """Size-bounded LRU cache of originals, keyed by S3 key and ETag"""
+
+    def __init__(self, root: Optional[str] = None, max_mb: Optional[int] = None):
+        self.root = root or os.path.join(settings.worker_cache_dir, "sources")
+        self.max_bytes = (settings.worker_source_cache_mb if max_mb is None else max_mb) * 1024 * 1024
+        os.makedirs(self.root, exist_ok=True)
+
+    def entry_path(self, key: str, etag: str) -> str:
+        """Cache file of one version of an object"""
+        digest = hashlib.sha256(f"{key}\n{etag}".encode()).hexdigest()[:32]
+        return os.path.join(self.root, f"{digest}{ENTRY_SUFFIX}")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_stats(self) -> Dict[str, int]:
+        try:
+            with open(os.path.join(self.root, STATS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0, "bytes_saved": 0, "bytes_downloaded": 0}
+
+    def _record(self, hit: bool, size: int) -> Dict[str, int]:
+        """Update the shared counters (caller holds the lock)"""
+        stats = self._read_stats()
+        if hit:
+            stats["hits"] += 1
+            stats["bytes_saved"] += size
+        else:
+            stats["misses"] += 1
+            stats["bytes_downloaded"] += size
+        temp_path = os.path.join(self.root, f"{STATS_FILE}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(stats, f)
+        os.replace(temp_path, os.path.join(self.root, STATS_FILE))
+        return stats
+
+    def _evict(self, keep: str):
+        """Remove least recently used entries until the cache fits (caller holds the lock)"""
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(ENTRY_SUFFIX):
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+            logger.debug(f"Evicted {path} from the source cache")
+
+    def stats(self) -> Dict[str, float]:
+        """Hits, misses, hit rate, bytes saved and current size of the cache"""
+        with self._locked():
+            stats = dict(self._read_stats())
+            size = sum(
+                os.path.getsize(os.path.join(self.root, name))
+                for name in os.listdir(self.root) if name.endswith(ENTRY_SUFFIX)
+            )
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["size_bytes"] = size
+        return stats
+
+    def _log(self, stats: Dict[str, int], outcome: str, key: str):
+        lookups = stats["hits"] + stats["misses"]
+        logger.info(
+            f"Source cache {outcome} for {key} (hit rate {stats['hits'] / lookups:.0%} over {lookups} lookups, "
+            f"{stats['bytes_saved'] / (1024 * 1024):.0f}MB not downloaded)"
+        )
+
+    def fetch(self, file_storage, s3_path: str, local_path: str) -> bool:
+        """
+        Put the original at `local_path`, from the cache or downloaded into it
+
+        Objects whose ETag cannot be read bypass the cache. Returns False if
+        the download failed.
+        """
+        etag = file_storage.get_etag(s3_path)
+        if not etag:
+            return file_storage.download_file(s3_path, local_path)
+
+        entry = self.entry_path(s3_path, etag)
+        with self._locked():
+            if os.path.exists(entry):
+                os.utime(entry)
+                _link_or_copy(entry, local_path)
+                self._log(self._record(True, os.path.getsize(entry)), "hit", s3_path)
+                return True
+
+        temp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+        try:
+            if not file_storage.download_file(s3_path, temp_path):
+                return False
+            size = os.path.getsize(temp_path)
+            with self._locked():
+                if size > self.max_bytes:
+                    # Larger than the whole cache: hand the download to the job as-is
+                    shutil.move(temp_path, local_path)
+                else:
+                    os.replace(temp_path, entry)
+                    self._evict(keep=entry)
+                    _link_or_copy(entry, local_path)
+                self._log(self._record(False, size), "miss", s3_path)
+            return True
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def get_source_cache() -> Optional[SourceCache]:
+    """The worker's source cache, or None when WORKER_SOURCE_CACHE_MB is 0"""
+    if settings.worker_source_cache_mb <= 0:
+        return None
+    return SourceCache()
@@ -4,31 +4,38 @@ Replaces Celery worker for Entrega 4
 """
 import json
 import os
-import uuid
 import time
 import signal
 import sys
-from typing import Optional, Dict, Any
-from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip
-from PIL import Image, ImageDraw, ImageFont
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.services.video_service import VideoService
-from app.services.file_storage import get_file_storage
-from app.services.sqs_service import get_sqs_service
-from app.models.video import VideoStatus
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
+from app.core.database import engine
+from app.services.queue_backend import QueueBackendInterface
+from app.services.sqs_service import get_sqs_service, get_encode_queue_service
+from app.workers.heartbeat import VisibilityHeartbeat
+from app.workers.workspace import has_scratch_capacity
+from app.workers.checkpoints import prune_checkpoints
+from app.workers.intake import admit_video
+from app.workers.pipeline import VideoJob, Outcome, run_pipeline, fetch_phase, encode_phase, finish_phase
+from app.workers.rendering import default_render_spec
+from app.workers.assets import warm_assets
+from app.workers.encoding import BacklogEncodingPolicy
+from app.workers.pipelined import PipelinedRunner
+from app.workers.supervisor import RecyclingProcessPool
 from app.core.config import settings
 import logging
 
-# Fix for PIL.Image.ANTIALIAS compatibility
-if not hasattr(Image, 'ANTIALIAS'):
-    Image.ANTIALIAS = Image.LANCZOS
-
 logger = logging.getLogger(__name__)
 
 # Global flag for graceful shutdown
 shutdown_flag = False
 
+# Container memory limit (cgroup v2), "max" when unlimited
+CGROUP_MEMORY_MAX = '/sys/fs/cgroup/memory.max'
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
 
 def signal_handler(sig, frame):
     """Handle shutdown signals gracefully"""
@@ -42,258 +49,414 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 
-def create_anb_logo():
-    """Create a simple ANB logo as placeholder"""
-    # Create a simple logo since we don't have the actual ANB logo
-    img = Image.new('RGBA', (200, 100), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Draw ANB text
-    try:
-        # Try to use a default font, fallback to default if not available
-        font = ImageFont.load_default()
-    except:
-        font = None
-    
-    # Draw background rectangle
-    draw.rectangle([10, 10, 190, 90], fill=(255, 0, 0, 200))  # Red background
-    draw.text((60, 40), "ANB", fill=(255, 255, 255, 255), font=font)
-    
-    return img
-
-
-def process_video(video_id: str, video_path: str) -> bool:
+def process_video(video_id: str, video_path: str, encoding_profile: Optional[str] = None) -> bool:
     """
     Process video: trim, resize, add watermark
     
+    Runs every stage of the processing pipeline (app/workers/pipeline.py);
+    a retried job resumes at its first incomplete stage.
+    
     Args:
         video_id: UUID of the video to process
         video_path: Path to the video file (S3 or local)
+        encoding_profile: Encoding profile name (settings.encoding_profile by default)
         
     Returns:
-        True if successful, False otherwise
+        True if successful (or already processed), False if the message should be retried
     """
-    db = SessionLocal()
-    file_storage = get_file_storage()
-    local_video_path = None
+    return run_pipeline(video_id, video_path, encoding_profile).acknowledge
+
+
+def parse_message(message: Dict[str, Any], encoding_profile: Optional[str] = None) -> VideoJob:
+    """
+    Job for an SQS message
     
+    Malformed messages get a job that is already skipped (delete them).
+    """
+    receipt_handle = message.get('ReceiptHandle')
     try:
-        # Update status to processing
-        VideoService.update_video_status(db, video_id, VideoStatus.processing)
-        db.commit()
-        
-        # Handle S3 paths: download to local temp file if needed
-        if video_path.startswith('s3://'):
-            logger.info(f"Downloading video from S3: {video_path}")
-            local_video_path = f"/tmp/{uuid.uuid4()}.mp4"
-            if not file_storage.download_file(video_path, local_video_path):
-                raise Exception(f"Failed to download video from S3: {video_path}")
-            video_path_to_use = local_video_path
-        else:
-            video_path_to_use = video_path
-        
-        # Load video
-        video_clip = VideoFileClip(video_path_to_use)
-        
-        # Get video duration and trim to max 30 seconds
-        duration = min(video_clip.duration, settings.video_max_duration)
-        video_clip = video_clip.subclip(0, duration)
-        
-        # Resize to 720p with 16:9 aspect ratio
-        target_width = 1280
-        target_height = 720
-        
-        # Resize maintaining aspect ratio
-        video_clip = video_clip.resize(height=target_height)
-        
-        # If width is different from target, crop or pad
-        if video_clip.w != target_width:
-            if video_clip.w > target_width:
-                # Crop from center
-                x_center = video_clip.w / 2
-                x_start = x_center - target_width / 2
-                video_clip = video_clip.crop(x1=x_start, x2=x_start + target_width)
-            else:
-                # Add padding (black bars)
-                video_clip = video_clip.margin(
-                    left=(target_width - video_clip.w) // 2,
-                    right=(target_width - video_clip.w) // 2,
-                    color=(0, 0, 0)
-                )
-        
-        # Remove audio
-        video_clip = video_clip.without_audio()
-        
-        # Create ANB logo watermark
-        logo_image = create_anb_logo()
-        logo_path = f"/tmp/anb_logo_{uuid.uuid4()}.png"
-        logo_image.save(logo_path)
-        
-        # Create intro clip (2.5 seconds)
-        intro_clip = ImageClip(logo_path, duration=2.5).resize(
-            width=target_width, height=target_height
-        )
-        
-        # Create outro clip (2.5 seconds)  
-        outro_clip = ImageClip(logo_path, duration=2.5).resize(
-            width=target_width, height=target_height
-        )
-        
-        # Create watermark (small logo in corner)
-        watermark = ImageClip(logo_path).set_duration(video_clip.duration).resize(
-            width=100
-        ).set_position(('right', 'bottom')).set_opacity(0.7)
-        
-        # Composite video with watermark
-        video_with_watermark = CompositeVideoClip([video_clip, watermark])
-        
-        # Concatenate intro + video + outro
-        final_video = CompositeVideoClip([
-            intro_clip,
-            video_with_watermark.set_start(2.5),
-            outro_clip.set_start(2.5 + video_clip.duration)
-        ])
-        
-        # Generate output filename
-        output_filename = f"processed_{uuid.uuid4()}.mp4"
-        local_output_path = os.path.join("/tmp", output_filename)
-        
-        # Export processed video to local temp file
-        final_video.write_videofile(
-            local_output_path,
-            codec='libx264',
-            audio_codec='aac' if final_video.audio else None,
-            temp_audiofile='temp-audio.m4a',
-            remove_temp=True,
-            fps=24
-        )
-        
-        # Upload processed video to S3 if using cloud storage
-        if settings.storage_type == 'cloud':
-            logger.info(f"Uploading processed video to S3")
-            with open(local_output_path, 'rb') as f:
-                processed_file_data = f.read()
-            
-            # Save to S3 and get the S3 path
-            s3_path = file_storage.save_file(
-                processed_file_data,
-                output_filename,
-                settings.processed_dir
-            )
-            
-            # Get the public URL for the processed video
-            # Extract filename from output_filename to get the public URL
-            processed_path = file_storage.get_file_path(
-                output_filename,
-                settings.processed_dir
-            )
-            logger.info(f"Processed video saved to S3, public URL: {processed_path}")
-            
-            # Clean up local temp file
-            if os.path.exists(local_output_path):
-                os.remove(local_output_path)
-        else:
-            # Local storage: use local path
-            processed_path = local_output_path
-        
-        # Clean up
-        video_clip.close()
-        final_video.close()
-        intro_clip.close()
-        outro_clip.close()
-        if os.path.exists(logo_path):
-            os.remove(logo_path)
-        
-        # Clean up downloaded original video if it was from S3
-        if local_video_path and os.path.exists(local_video_path):
-            os.remove(local_video_path)
-        
-        # Update database with success
-        VideoService.update_video_status(
-            db, video_id, VideoStatus.processed, processed_path=processed_path
-        )
-        db.commit()
-        
-        logger.info(f"Video {video_id} processed successfully")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error processing video {video_id}: {str(e)}")
-        
-        # Update database with error
-        try:
-            VideoService.update_video_status(
-                db, video_id, VideoStatus.failed, error_message=str(e)
-            )
-            db.commit()
-        except Exception as db_error:
-            logger.error(f"Error updating database: {db_error}")
-        
-        return False
-        
-    finally:
-        db.close()
+        # Parse message body
+        body = json.loads(message['Body'])
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing message body: {e}")
+        # Delete malformed message
+        return VideoJob(video_id=None, video_path=None, receipt_handle=receipt_handle, outcome=Outcome.skipped)
+    
+    video_id = body.get('video_id')
+    video_path = body.get('video_path')
+    task_id = body.get('task_id', 'unknown')
+    
+    if not video_id or not video_path:
+        logger.error(f"Invalid message format: missing video_id or video_path")
+        # Delete invalid message
+        return VideoJob(video_id=None, video_path=None, receipt_handle=receipt_handle, outcome=Outcome.skipped)
+    
+    logger.info(f"Processing video {video_id} (task: {task_id})")
+    return VideoJob(video_id=video_id, video_path=video_path, encoding_profile=encoding_profile,
+                    receipt_handle=receipt_handle)
 
 
-def process_message(message: Dict[str, Any]) -> bool:
+def process_message(message: Dict[str, Any], encoding_profile: Optional[str] = None) -> bool:
     """
     Process a single SQS message
     
     Args:
         message: SQS message dictionary with 'Body', 'ReceiptHandle', etc.
+        encoding_profile: Encoding profile chosen by the backlog policy
         
     Returns:
         True if message should be deleted, False if it should be retried
     """
     try:
-        # Parse message body
-        body = json.loads(message['Body'])
-        video_id = body.get('video_id')
-        video_path = body.get('video_path')
-        task_id = body.get('task_id', 'unknown')
-        
-        if not video_id or not video_path:
-            logger.error(f"Invalid message format: missing video_id or video_path")
-            return True  # Delete invalid message
-        
-        logger.info(f"Processing video {video_id} (task: {task_id})")
+        job = parse_message(message, encoding_profile)
+        if job.outcome is not None:
+            return True
         
         # Process the video
-        success = process_video(video_id, video_path)
+        success = process_video(job.video_id, job.video_path, encoding_profile)
         
         if success:
-            logger.info(f"Successfully processed video {video_id}")
+            logger.info(f"Successfully processed video {job.video_id}")
             return True  # Delete message after successful processing
         else:
-            logger.warning(f"Failed to process video {video_id}, will retry")
+            logger.warning(f"Failed to process video {job.video_id}, will retry")
             return False  # Don't delete, let SQS retry
         
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing message body: {e}")
-        return True  # Delete malformed message
     except Exception as e:
         logger.error(f"Unexpected error processing message: {e}")
         return False  # Don't delete, let SQS retry
 
 
+def probe_message(message: Dict[str, Any], encode_queue: QueueBackendInterface) -> bool:
+    """
+    Validate the upload of one message and forward it to the encode queue
+    
+    Returns:
+        True if message should be deleted, False if it should be retried
+    """
+    try:
+        job = parse_message(message)
+        if job.outcome is not None:
+            return True
+        return admit_video(job.video_id, job.video_path, encode_queue)
+    except Exception as e:
+        logger.error(f"Unexpected error probing message: {e}")
+        return False
+
+
+def worker_queue() -> QueueBackendInterface:
+    """Queue the processing loops consume: the encode queue for WORKER_ROLE=encode, the upload queue otherwise"""
+    if settings.worker_role == 'encode':
+        return get_encode_queue_service()
+    return get_sqs_service()
+
+
+def detect_concurrency() -> int:
+    """
+    Size the number of processing slots from CPU count and memory
+    
+    Each slot encodes one video and needs roughly `worker_slot_memory_mb`,
+    so the slot count is bounded by whichever resource runs out first.
+    """
+    cpu_count = os.cpu_count() or 1
+    
+    memory_bytes = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    # Respect the container memory limit (cgroup v2) when it is lower than the host memory
+    try:
+        with open(CGROUP_MEMORY_MAX) as f:
+            limit = f.read().strip()
+        if limit.isdigit():
+            memory_bytes = min(memory_bytes, int(limit))
+    except OSError:
+        pass
+    
+    memory_slots = (memory_bytes // (1024 * 1024)) // max(settings.worker_slot_memory_mb, 1)
+    return max(1, min(cpu_count, memory_slots))
+
+
+@dataclass
+class SlotJob:
+    """A message being processed in one of the worker slots"""
+    slot: int
+    message: Dict[str, Any]
+    started_at: float = field(default_factory=time.monotonic)
+    
+    @property
+    def receipt_handle(self) -> str:
+        return self.message['ReceiptHandle']
+
+
+def _init_slot_process():
+    """Initializer for slot processes"""
+    # Slots start from the forkserver, without the parent's logging configuration
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    # Connections inherited from the parent must not be shared across processes
+    engine.dispose(close=False)
+    # The parent process coordinates shutdown; slots always finish their current job
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # Logo variants are rendered once per slot process, not per job
+    warm_assets([default_render_spec()])
+
+
+def _finish_slot_jobs(sqs_service, heartbeat: VisibilityHeartbeat, futures: List[Future],
+                      active_jobs: Dict[Future, SlotJob]):
+    """Delete the messages of completed slot jobs (one DeleteMessageBatch) and free their slots"""
+    to_delete = []
+    for future in futures:
+        job = active_jobs.pop(future)
+        heartbeat.untrack(job.receipt_handle)
+        try:
+            should_delete = future.result()
+        except Exception as e:
+            logger.error(f"Slot {job.slot} crashed processing message: {e}")
+            should_delete = False
+        
+        elapsed = time.monotonic() - job.started_at
+        if should_delete:
+            to_delete.append(job.receipt_handle)
+            logger.debug(f"Slot {job.slot} finished in {elapsed:.1f}s")
+        else:
+            logger.debug(f"Slot {job.slot} finished in {elapsed:.1f}s, message will be retried")
+    
+    if to_delete:
+        sqs_service.delete_messages_batch(to_delete)
+
+
+def run_pool_worker(slots: int):
+    """
+    Worker loop with `slots` processing slots backed by a process pool
+    
+    Only as many messages as there are free slots are received (up to 10 per
+    request), so no message waits in memory while its visibility timeout runs.
+    Slot processes are recycled between jobs by job count and RSS
+    (app/workers/supervisor.py); the parent keeps every in-flight message
+    tracked by the visibility heartbeat until its job returns.
+    """
+    global shutdown_flag
+    
+    logger.info(f"Starting SQS worker with {slots} processing slots...")
+    sqs_service = worker_queue()
+    heartbeat = VisibilityHeartbeat(sqs_service).start()
+    encoding_policy = BacklogEncodingPolicy(sqs_service)
+    active_jobs: Dict[Future, SlotJob] = {}
+    
+    pool = RecyclingProcessPool(
+        max_workers=slots,
+        initializer=_init_slot_process,
+        max_jobs=settings.worker_max_jobs_per_child,
+        max_rss_mb=settings.worker_max_child_rss_mb,
+        preload=["app.workers.sqs_worker"]
+    )
+    with pool:
+        while not shutdown_flag:
+            try:
+                done = [future for future in active_jobs if future.done()]
+                _finish_slot_jobs(sqs_service, heartbeat, done, active_jobs)
+                
+                free_slots = slots - len(active_jobs)
+                if free_slots == 0:
+                    finished, _ = wait(list(active_jobs), timeout=1, return_when=FIRST_COMPLETED)
+                    _finish_slot_jobs(sqs_service, heartbeat, list(finished), active_jobs)
+                    continue
+                
+                if not has_scratch_capacity():
+                    # Scratch volume full: let running jobs finish before taking more
+                    time.sleep(5)
+                    continue
+                
+                messages = sqs_service.receive_messages(max_messages=min(free_slots, 10))
+                
+                busy_slots = {job.slot for job in active_jobs.values()}
+                free_slot_ids = [slot for slot in range(slots) if slot not in busy_slots]
+                
+                for message in messages:
+                    if not message.get('ReceiptHandle'):
+                        logger.warning("Message missing ReceiptHandle, skipping")
+                        continue
+                    slot = free_slot_ids.pop(0)
+                    heartbeat.track(message['ReceiptHandle'])
+                    encoding_policy.observe_message(message)
+                    profile = encoding_policy.select()
+                    future = pool.submit(process_message, message, profile.name)
+                    active_jobs[future] = SlotJob(slot=slot, message=message)
+                    
+            except KeyboardInterrupt:
+                logger.info("Received keyboard interrupt, shutting down...")
+                shutdown_flag = True
+                break
+            except Exception as e:
+                logger.error(f"Error in worker loop: {e}", exc_info=True)
+                time.sleep(5)  # Wait before retrying
+        
+        if active_jobs:
+            for job in active_jobs.values():
+                logger.info(
+                    f"Waiting for slot {job.slot} "
+                    f"(running for {time.monotonic() - job.started_at:.0f}s) before shutting down"
+                )
+            finished, _ = wait(list(active_jobs))
+            _finish_slot_jobs(sqs_service, heartbeat, list(finished), active_jobs)
+    
+    heartbeat.stop()
+    logger.info("SQS worker stopped")
+
+
+def run_pipelined_worker():
+    """
+    Sequential worker that overlaps I/O with encoding
+    
+    While one video encodes, the next message is received and its original
+    downloaded, and the previous output is uploaded and recorded (see
+    app/workers/pipelined.py). Every message stays tracked by the visibility
+    heartbeat from the moment it is received until it is finished.
+    """
+    logger.info(f"Starting pipelined SQS worker (prefetch {settings.worker_prefetch_depth}, "
+                f"upload {settings.worker_upload_depth})...")
+    warm_assets([default_render_spec()])
+    sqs_service = worker_queue()
+    heartbeat = VisibilityHeartbeat(sqs_service).start()
+    encoding_policy = BacklogEncodingPolicy(sqs_service)
+    
+    def fetch() -> Optional[VideoJob]:
+        if not has_scratch_capacity():
+            time.sleep(5)
+            return None
+        
+        messages = sqs_service.receive_messages(max_messages=1)
+        if not messages:
+            return None
+        
+        message = messages[0]
+        if not message.get('ReceiptHandle'):
+            logger.warning("Message missing ReceiptHandle, skipping")
+            return None
+        
+        heartbeat.track(message['ReceiptHandle'])
+        encoding_policy.observe_message(message)
+        return fetch_phase(parse_message(message, encoding_policy.select().name))
+    
+    def finish(job: VideoJob):
+        try:
+            should_delete = finish_phase(job).acknowledge
+        finally:
+            heartbeat.untrack(job.receipt_handle)
+        
+        if should_delete:
+            sqs_service.delete_message(job.receipt_handle)
+            logger.debug("Message deleted from queue")
+        else:
+            logger.warning(f"Failed to process video {job.video_id}, will retry")
+    
+    PipelinedRunner(
+        fetch, encode_phase, finish,
+        should_stop=lambda: shutdown_flag,
+        prefetch_depth=settings.worker_prefetch_depth,
+        upload_depth=settings.worker_upload_depth
+    ).run()
+    
+    heartbeat.stop()
+    logger.info("SQS worker stopped")
+
+
+def run_probe_worker():
+    """
+    Probe stage of a split pipeline (WORKER_ROLE=probe)
+    
+    Receives uploads, validates them and forwards the valid ones to the
+    encode queue (app/workers/intake.py). Probes only read container headers,
+    so up to `worker_probe_concurrency` run at once in threads; every probe
+    is bounded by its ffmpeg timeout, well inside the visibility timeout.
+    """
+    global shutdown_flag
+    
+    concurrency = max(1, settings.worker_probe_concurrency)
+    logger.info(f"Starting probe worker with {concurrency} concurrent probes...")
+    upload_queue = get_sqs_service()
+    encode_queue = get_encode_queue_service()
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while not shutdown_flag:
+            try:
+                messages = upload_queue.receive_messages(max_messages=min(concurrency, 10))
+                messages = [message for message in messages if message.get('ReceiptHandle')]
+                if not messages:
+                    continue
+                
+                results = executor.map(lambda message: probe_message(message, encode_queue), messages)
+                to_delete = [message['ReceiptHandle'] for message, done in zip(messages, results) if done]
+                if to_delete:
+                    upload_queue.delete_messages_batch(to_delete)
+                    
+            except KeyboardInterrupt:
+                logger.info("Received keyboard interrupt, shutting down...")
+                shutdown_flag = True
+                break
+            except Exception as e:
+                logger.error(f"Error in worker loop: {e}", exc_info=True)
+                time.sleep(5)  # Wait before retrying
+    
+    logger.info("Probe worker stopped")
+
+
 def run_worker():
     """Main worker loop - continuously poll SQS and process messages"""
     global shutdown_flag
     
-    logger.info("Starting SQS worker...")
+    logger.info(f"Starting SQS worker (role: {settings.worker_role})...")
+    logger.info(f"Queue backend: {settings.queue_backend}")
     logger.info(f"SQS Queue URL: {settings.sqs_queue_url}")
     logger.info(f"SQS Region: {settings.sqs_region}")
     
-    if not settings.sqs_queue_url:
-        logger.error("SQS queue URL not configured. Please set SQS_QUEUE_URL environment variable.")
+    if settings.worker_role not in ('all', 'probe', 'encode'):
+        logger.error(f"Unknown worker role '{settings.worker_role}' (expected all, probe or encode).")
         sys.exit(1)
     
-    sqs_service = get_sqs_service()
+    queues = [(get_sqs_service(), 'SQS_QUEUE_URL')] if settings.worker_role != 'encode' else []
+    if settings.worker_role != 'all':
+        logger.info(f"SQS Encode Queue URL: {settings.sqs_encode_queue_url}")
+        queues.append((get_encode_queue_service(), 'SQS_ENCODE_QUEUE_URL'))
+    for queue, variable in queues:
+        if not queue.is_configured():
+            if settings.queue_backend == 'sqs':
+                logger.error(f"SQS queue URL not configured. Please set {variable} environment variable.")
+            else:
+                logger.error(f"Queue backend '{settings.queue_backend}' is not available.")
+            sys.exit(1)
+    
+    if settings.worker_role == 'probe':
+        run_probe_worker()
+        return
+    
+    try:
+        prune_checkpoints()
+    except Exception as e:
+        logger.warning(f"Could not prune checkpoints: {e}")
+    
+    slots = settings.worker_concurrency if settings.worker_concurrency > 0 else detect_concurrency()
+    if settings.worker_pipelined and slots == 1:
+        # Phases share database sessions across threads, so the pipeline runs in-process
+        run_pipelined_worker()
+        return
+    recycling = settings.worker_max_jobs_per_child > 0 or settings.worker_max_child_rss_mb > 0
+    if slots > 1 or recycling:
+        # A single slot still runs in a supervised child so it can be recycled
+        run_pool_worker(slots)
+        return
+    
+    warm_assets([default_render_spec()])
+    sqs_service = worker_queue()
+    heartbeat = VisibilityHeartbeat(sqs_service).start()
+    encoding_policy = BacklogEncodingPolicy(sqs_service)
     consecutive_empty_polls = 0
     max_empty_polls = 10  # After 10 empty polls, log status
     
     while not shutdown_flag:
         try:
+            if not has_scratch_capacity():
+                time.sleep(5)
+                continue
+            
             # Receive messages from SQS
             messages = sqs_service.receive_messages(max_messages=1)
             
@@ -318,8 +481,13 @@ def run_worker():
                     logger.warning("Message missing ReceiptHandle, skipping")
                     continue
                 
-                # Process the message
-                should_delete = process_message(message)
+                # Process the message, keeping it invisible to other workers meanwhile
+                heartbeat.track(receipt_handle)
+                encoding_policy.observe_message(message)
+                try:
+                    should_delete = process_message(message, encoding_policy.select().name)
+                finally:
+                    heartbeat.untrack(receipt_handle)
                 
                 if should_delete:
                     # Delete message from queue after successful processing
@@ -337,15 +505,13 @@ def run_worker():
             logger.error(f"Error in worker loop: {e}", exc_info=True)
             time.sleep(5)  # Wait before retrying
     
+    heartbeat.stop()
     logger.info("SQS worker stopped")
 
 
 if __name__ == "__main__":
     # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
     
     # Run worker
     run_worker()
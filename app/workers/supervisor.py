@@ -0,0 +1,222 @@
+"""
+Supervised child processes for the SQS worker
+
+moviepy and the ffmpeg subprocess plumbing leak memory over long runs, so
+jobs run in child processes that are recycled: a child is replaced after
+`max_jobs` jobs or as soon as its RSS after a job crosses `max_rss_mb`.
+Children are only recycled between jobs, never during one, so no in-flight
+message is lost; a child that dies mid-job fails that job's future and its
+message is redelivered by SQS.
+
+After every job the child reports its current RSS, its peak RSS and the
+peak RSS of its ffmpeg subprocesses; the peaks of each child are logged
+when it exits and kept in `RecyclingProcessPool.child_stats`.
+
+Children are started by a forkserver: the parent runs the heartbeat and
+dispatch threads, and forking it could copy a lock held by one of them into
+the child. Jobs and the initializer are therefore pickled, so they must be
+module-level functions.
+"""
+import multiprocessing
+import queue
+import resource
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Without /proc the peak is the best available estimate (ru_maxrss is in KiB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def memory_report() -> Dict[str, float]:
+    """Current and peak RSS of this process and peak RSS of its subprocesses (ffmpeg), in MB"""
+    return {
+        "rss_mb": current_rss_mb(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "subprocess_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def _child_main(connection, initializer: Optional[Callable[[], None]]):
+    """Child loop: run the jobs received on `connection` until told to stop"""
+    if initializer is not None:
+        initializer()
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        fn, args = task
+        try:
+            outcome = (True, fn(*args))
+        except Exception as e:
+            outcome = (False, e)
+        connection.send((outcome, memory_report()))
+    connection.close()
+
+
+@dataclass
+class ChildStats:
+    """Jobs run and memory high-water marks of one child process"""
+    pid: int
+    jobs: int = 0
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    subprocess_peak_rss_mb: float = 0.0
+    exit_reason: Optional[str] = None
+
+
+class _Child:
+    """One supervised child process and the parent end of its pipe"""
+
+    def __init__(self, context, initializer):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_child_main, args=(child_connection, initializer), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.stats = ChildStats(pid=self.process.pid)
+
+    def run(self, fn: Callable, args: tuple):
+        """Run one job in the child and return its result (raises if the child dies)"""
+        self.connection.send((fn, args))
+        (ok, value), report = self.connection.recv()
+        self.stats.jobs += 1
+        self.stats.rss_mb = report["rss_mb"]
+        self.stats.peak_rss_mb = max(self.stats.peak_rss_mb, report["peak_rss_mb"])
+        self.stats.subprocess_peak_rss_mb = max(self.stats.subprocess_peak_rss_mb, report["subprocess_peak_rss_mb"])
+        if not ok:
+            raise value
+        return value
+
+    def stop(self, timeout: float = 30):
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class RecyclingProcessPool:
+    """
+    Process pool with `max_workers` children recycled by job count and RSS
+
+    Used like ProcessPoolExecutor: `submit` returns a Future and the pool is a
+    context manager that waits for running jobs on exit. `max_jobs` and
+    `max_rss_mb` of 0 disable the corresponding limit. The modules in
+    `preload` are imported once by the forkserver, so each child starts
+    with them loaded instead of importing them again.
+    """
+
+    def __init__(self, max_workers: int, initializer: Optional[Callable[[], None]] = None,
+                 max_jobs: int = 0, max_rss_mb: int = 0, preload: Sequence[str] = ()):
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.child_stats: List[ChildStats] = []
+        self._context = multiprocessing.get_context("forkserver")
+        if preload:
+            # Only applies if the forkserver of this process is not running yet
+            self._context.set_forkserver_preload(list(preload))
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        # Idle slots: a started child, or None for a slot whose child starts on first use
+        self._idle: "queue.Queue[Optional[_Child]]" = queue.Queue()
+        for _ in range(max_workers):
+            self._idle.put(None)
+
+    def _recycle_reason(self, child: _Child) -> Optional[str]:
+        if self.max_jobs and child.stats.jobs >= self.max_jobs:
+            return "job limit"
+        if self.max_rss_mb and child.stats.rss_mb >= self.max_rss_mb:
+            return f"RSS {child.stats.rss_mb:.0f}MB over {self.max_rss_mb}MB"
+        return None
+
+    def _retire(self, child: _Child, reason: str):
+        child.stop()
+        child.stats.exit_reason = reason
+        with self._lock:
+            self.child_stats.append(child.stats)
+        logger.info(
+            f"Worker child {child.stats.pid} exited ({reason}) after {child.stats.jobs} jobs: "
+            f"peak RSS {child.stats.peak_rss_mb:.0f}MB, ffmpeg peak RSS {child.stats.subprocess_peak_rss_mb:.0f}MB"
+        )
+
+    def _run(self, future: Future, fn: Callable, args: tuple):
+        child = self._idle.get()
+        try:
+            if child is None:
+                try:
+                    child = _Child(self._context, self.initializer)
+                except Exception as e:
+                    # Start failed (e.g. ENOMEM): fail the job so its message is retried; the slot stays free
+                    if future.set_running_or_notify_cancel():
+                        future.set_exception(RuntimeError(f"Could not start a worker child: {e!r}"))
+                    return
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(child.run(fn, args))
+            except (EOFError, OSError) as e:
+                # The child died mid-job (e.g. OOM-killed): the job fails, its message is retried
+                future.set_exception(RuntimeError(f"Worker child {child.stats.pid} died: {e!r}"))
+                self._retire(child, "died")
+                child = None
+                return
+            except Exception as e:
+                future.set_exception(e)
+
+            reason = self._recycle_reason(child)
+            if reason is not None:
+                self._retire(child, reason)
+                child = None
+        finally:
+            self._idle.put(child)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Run `fn(*args)` in the next idle child"""
+        future = Future()
+        thread = threading.Thread(target=self._run, args=(future, fn, args), daemon=True)
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            self._threads.append(thread)
+        thread.start()
+        return future
+
+    def shutdown(self):
+        """Wait for submitted jobs, then stop every child"""
+        with self._lock:
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join()
+        while True:
+            try:
+                child = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if child is not None:
+                self._retire(child, "shutdown")
+
+    def __enter__(self) -> "RecyclingProcessPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
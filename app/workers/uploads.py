@@ -0,0 +1,28 @@
+"""
+Upload of the processed video while it is being encoded
+
+With VIDEO_STREAMING_UPLOAD the ffmpeg engine writes fragmented MP4 to a
+pipe and `StreamingUpload` sends it to storage in multipart chunks as it is
+produced, so the output never has to be on disk or in memory as a whole.
+"""
+from typing import BinaryIO, Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingUpload:
+    """Stream consumer for render_video(stream_to=...) storing the output as `filename`"""
+
+    def __init__(self, file_storage, filename: str, directory: str):
+        self.file_storage = file_storage
+        self.filename = filename
+        self.directory = directory
+        self.stored_path: Optional[str] = None
+
+    def __call__(self, stream: BinaryIO, finalize: Callable[[], None]) -> str:
+        self.stored_path = self.file_storage.save_file_from_stream(
+            stream, self.filename, self.directory, finalize=finalize
+        )
+        logger.info(f"Processed video streamed to storage: {self.stored_path}")
+        return self.stored_path
@@ -1,199 +1,34 @@
-import os
-import uuid
-from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip
-from PIL import Image, ImageDraw, ImageFont
-from celery import current_task
-from sqlalchemy.orm import Session
+from celery.signals import worker_process_init
 from app.workers.celery_app import celery_app
-from app.core.database import SessionLocal
-from app.services.video_service import VideoService
-from app.services.file_storage import get_file_storage
-from app.models.video import VideoStatus
-from app.core.config import settings
+from app.workers.pipeline import Outcome, run_pipeline
+from app.workers.rendering import default_render_spec
+from app.workers.assets import warm_assets
 import logging
 
-# Fix for PIL.Image.ANTIALIAS compatibility
-if not hasattr(Image, 'ANTIALIAS'):
-    Image.ANTIALIAS = Image.LANCZOS
-
 logger = logging.getLogger(__name__)
 
 
-def create_anb_logo():
-    """Create a simple ANB logo as placeholder"""
-    # Create a simple logo since we don't have the actual ANB logo
-    img = Image.new('RGBA', (200, 100), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Draw ANB text
-    try:
-        # Try to use a default font, fallback to default if not available
-        font = ImageFont.load_default()
-    except:
-        font = None
-    
-    # Draw background rectangle
-    draw.rectangle([10, 10, 190, 90], fill=(255, 0, 0, 200))  # Red background
-    draw.text((60, 40), "ANB", fill=(255, 255, 255, 255), font=font)
-    
-    return img
+@worker_process_init.connect
+def warm_worker_assets(**kwargs):
+    """Render the logo variants once per Celery worker process"""
+    warm_assets([default_render_spec()])
 
 
 @celery_app.task(bind=True)
 def process_video_task(self, video_id: str, video_path: str):
-    """Process video: trim, resize, add watermark"""
-    db = SessionLocal()
-    file_storage = get_file_storage()
-    local_video_path = None
+    """
+    Process video: trim, resize, add watermark
+    
+    Runs the processing pipeline (app/workers/pipeline.py) and returns its
+    structured result, with the seconds spent in each stage.
+    """
+    result = run_pipeline(video_id, video_path)
+    
+    if result.outcome == Outcome.deferred:
+        # Admission check failed: without scratch space the job would fail half-way
+        raise self.retry(countdown=60)
+    if result.outcome == Outcome.failed:
+        # Re-raise the error so Celery can handle retries (the next attempt resumes from the checkpoint)
+        raise self.retry(exc=Exception(result.error), countdown=60, max_retries=3)
     
-    try:
-        # Update status to processing
-        VideoService.update_video_status(db, video_id, VideoStatus.processing)
-        
-        # Handle S3 paths: download to local temp file if needed
-        if video_path.startswith('s3://'):
-            logger.info(f"Downloading video from S3: {video_path}")
-            local_video_path = f"/tmp/{uuid.uuid4()}.mp4"
-            if not file_storage.download_file(video_path, local_video_path):
-                raise Exception(f"Failed to download video from S3: {video_path}")
-            video_path_to_use = local_video_path
-        else:
-            video_path_to_use = video_path
-        
-        # Load video
-        video_clip = VideoFileClip(video_path_to_use)
-        
-        # Get video duration and trim to max 30 seconds
-        duration = min(video_clip.duration, settings.video_max_duration)
-        video_clip = video_clip.subclip(0, duration)
-        
-        # Resize to 720p with 16:9 aspect ratio
-        target_width = 1280
-        target_height = 720
-        
-        # Resize maintaining aspect ratio
-        video_clip = video_clip.resize(height=target_height)
-        
-        # If width is different from target, crop or pad
-        if video_clip.w != target_width:
-            if video_clip.w > target_width:
-                # Crop from center
-                x_center = video_clip.w / 2
-                x_start = x_center - target_width / 2
-                video_clip = video_clip.crop(x1=x_start, x2=x_start + target_width)
-            else:
-                # Add padding (black bars)
-                video_clip = video_clip.margin(
-                    left=(target_width - video_clip.w) // 2,
-                    right=(target_width - video_clip.w) // 2,
-                    color=(0, 0, 0)
-                )
-        
-        # Remove audio
-        video_clip = video_clip.without_audio()
-        
-        # Create ANB logo watermark
-        logo_image = create_anb_logo()
-        logo_path = f"/tmp/anb_logo_{uuid.uuid4()}.png"
-        logo_image.save(logo_path)
-        
-        # Create intro clip (2.5 seconds)
-        intro_clip = ImageClip(logo_path, duration=2.5).resize(
-            width=target_width, height=target_height
-        )
-        
-        # Create outro clip (2.5 seconds)  
-        outro_clip = ImageClip(logo_path, duration=2.5).resize(
-            width=target_width, height=target_height
-        )
-        
-        # Create watermark (small logo in corner)
-        watermark = ImageClip(logo_path).set_duration(video_clip.duration).resize(
-            width=100
-        ).set_position(('right', 'bottom')).set_opacity(0.7)
-        
-        # Composite video with watermark
-        video_with_watermark = CompositeVideoClip([video_clip, watermark])
-        
-        # Concatenate intro + video + outro
-        final_video = CompositeVideoClip([
-            intro_clip,
-            video_with_watermark.set_start(2.5),
-            outro_clip.set_start(2.5 + video_clip.duration)
-        ])
-        
-        # Generate output filename
-        output_filename = f"processed_{uuid.uuid4()}.mp4"
-        local_output_path = os.path.join("/tmp", output_filename)
-        
-        # Export processed video to local temp file
-        final_video.write_videofile(
-            local_output_path,
-            codec='libx264',
-            audio_codec='aac' if final_video.audio else None,
-            temp_audiofile='temp-audio.m4a',
-            remove_temp=True,
-            fps=24
-        )
-        
-        # Upload processed video to S3 if using cloud storage
-        if settings.storage_type == 'cloud':
-            logger.info(f"Uploading processed video to S3")
-            with open(local_output_path, 'rb') as f:
-                processed_file_data = f.read()
-            
-            # Save to S3 and get the S3 path
-            s3_path = file_storage.save_file(
-                processed_file_data,
-                output_filename,
-                settings.processed_dir
-            )
-            
-            # Get the public URL for the processed video
-            # Extract filename from output_filename to get the public URL
-            processed_path = file_storage.get_file_path(
-                output_filename,
-                settings.processed_dir
-            )
-            logger.info(f"Processed video saved to S3, public URL: {processed_path}")
-            
-            # Clean up local temp file
-            if os.path.exists(local_output_path):
-                os.remove(local_output_path)
-        else:
-            # Local storage: use local path
-            processed_path = local_output_path
-        
-        # Clean up
-        video_clip.close()
-        final_video.close()
-        intro_clip.close()
-        outro_clip.close()
-        if os.path.exists(logo_path):
-            os.remove(logo_path)
-        
-        # Clean up downloaded original video if it was from S3
-        if local_video_path and os.path.exists(local_video_path):
-            os.remove(local_video_path)
-        
-        # Update database with success
-        VideoService.update_video_status(
-            db, video_id, VideoStatus.processed, processed_path=processed_path
-        )
-        
-        logger.info(f"Video {video_id} processed successfully")
-        return f"Video processed successfully: {processed_path}"
-        
-    except Exception as e:
-        logger.error(f"Error processing video {video_id}: {str(e)}")
-        
-        # Update database with error
-        VideoService.update_video_status(
-            db, video_id, VideoStatus.failed, error_message=str(e)
-        )
-        
-        # Re-raise the exception so Celery can handle retries
-        raise self.retry(exc=e, countdown=60, max_retries=3)
-        
-    finally:
-        db.close()
\ No newline at end of file
+    return result.as_dict()
@@ -0,0 +1,89 @@
+"""
+Per-job scratch workspace
+
+Every temporary file of a job (downloaded original, encoded segments, the
+processed output before publishing) lives in one directory under
+WORKER_SCRATCH_DIR, which can point at tmpfs or instance NVMe storage. The
+directory is removed when the job ends, whichever way it ends. Artifacts kept
+for retries live in the checkpoint directory (app/workers/checkpoints.py),
+by default on the same volume.
+"""
+import errno
+import os
+import shutil
+import uuid
+from typing import Optional
+from app.core.config import settings
+from app.workers.checkpoints import checkpoint_root
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def has_scratch_capacity(required_mb: Optional[int] = None) -> bool:
+    """Admission check: is there room for one more job on the scratch and checkpoint volumes?"""
+    required_mb = settings.worker_scratch_min_free_mb if required_mb is None else required_mb
+    for directory in (settings.worker_scratch_dir, checkpoint_root()):
+        os.makedirs(directory, exist_ok=True)
+        free_mb = shutil.disk_usage(directory).free / (1024 * 1024)
+        if free_mb < required_mb:
+            logger.warning(f"Only {free_mb:.0f}MB free in {directory} ({required_mb}MB required per job)")
+            return False
+    return True
+
+
+def publish_file(source_path: str, directory: str, filename: str) -> str:
+    """
+    Move a finished file (or directory) into `directory` atomically
+
+    On the same filesystem this is a rename; across filesystems the file is
+    copied next to its destination first, so readers never see a partial file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    destination = os.path.join(directory, filename)
+    try:
+        os.replace(source_path, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        temp_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+        try:
+            if os.path.isdir(source_path):
+                shutil.copytree(source_path, temp_path)
+            else:
+                shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.isdir(temp_path):
+                shutil.rmtree(temp_path, ignore_errors=True)
+            elif os.path.exists(temp_path):
+                os.remove(temp_path)
+        if os.path.isdir(source_path):
+            shutil.rmtree(source_path)
+        else:
+            os.remove(source_path)
+    return destination
+
+
+class JobWorkspace:
+    """Scratch directory of one job, removed by `cleanup` (or on leaving a `with` block)"""
+
+    def __init__(self, job_id: str, root: Optional[str] = None):
+        self.root = root or settings.worker_scratch_dir
+        self.path = os.path.join(self.root, f"job_{job_id}_{uuid.uuid4().hex[:8]}")
+        os.makedirs(self.path)
+
+    def file(self, name: str) -> str:
+        """Path of a file inside the workspace"""
+        return os.path.join(self.path, name)
+
+    def cleanup(self):
+        """Remove the workspace and everything left in it"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "JobWorkspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de perfiles de codificación (velocidad / tamaño / calidad)
+
+Para cada clip de entrada y cada perfil de app/workers/encoding.py se codifica
+el cuerpo del video (sin intro/outro, que se reutilizan ya codificados) con el
+motor ffmpeg y se mide:
+- Tiempo de codificación (wall-clock)
+- Tamaño del archivo resultante
+- PSNR y SSIM frente a una referencia sin pérdidas (CRF 0) con los mismos
+  filtros y fps del perfil
+
+Si no se indican videos de entrada se generan clips sintéticos (testsrc2) de
+1080p y 480p con la duración indicada.
+
+Uso:
+    python capacity-planning/encoding_benchmark.py --profiles quality,balanced,fast
+    python capacity-planning/encoding_benchmark.py --inputs clip1.mp4 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, Any
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+
+def generate_test_clip(path: str, size: str, seconds: int):
+    """Generar un clip sintético H.264 con audio"""
+    from app.workers.ffmpeg_engine import get_ffmpeg_binary
+    subprocess.run([
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30',
+        '-f', 'lavfi', '-i', 'sine=frequency=440',
+        '-t', str(seconds), '-c:v', 'libx264', '-preset', 'veryfast', '-c:a', 'aac',
+        path
+    ], check=True)
+
+
+def encode_body(input_path: str, output_path: str, logo_path: str, spec) -> float:
+    """Codificar el cuerpo del video con `spec` y devolver los segundos empleados"""
+    from app.workers.ffmpeg_engine import build_ffmpeg_command, run_ffmpeg
+    started = time.perf_counter()
+    run_ffmpeg(build_ffmpeg_command(input_path, output_path, logo_path, spec, with_bumpers=False))
+    return time.perf_counter() - started
+
+
+def measure_quality(distorted_path: str, reference_path: str) -> Dict[str, float]:
+    """PSNR y SSIM promedio del video codificado frente a la referencia"""
+    from app.workers.ffmpeg_engine import get_ffmpeg_binary
+    result = subprocess.run([
+        get_ffmpeg_binary(), '-hide_banner', '-nostats',
+        '-i', distorted_path, '-i', reference_path,
+        '-lavfi', '[0:v]split[a][b];[1:v]split[c][d];[a][c]ssim;[b][d]psnr',
+        '-f', 'null', '-'
+    ], capture_output=True, text=True)
+    ssim = re.search(r'SSIM .*All:([\d.]+)', result.stderr)
+    psnr = re.search(r'PSNR .*average:([\d.]+|inf)', result.stderr)
+    return {
+        "ssim": float(ssim.group(1)) if ssim else None,
+        "psnr_db": float(psnr.group(1)) if psnr else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de perfiles de codificación")
+    parser.add_argument("--profiles", default="quality,balanced,fast", help="Perfiles separados por coma")
+    parser.add_argument("--inputs", nargs="*", default=None, help="Videos de entrada (por defecto clips sintéticos)")
+    parser.add_argument("--seconds", type=int, default=30, help="Duración de los clips sintéticos")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por perfil y clip")
+    args = parser.parse_args()
+
+    from app.workers.encoding import get_encoding_profile, apply_profile
+    from app.workers.rendering import RenderSpec, create_anb_logo
+
+    profiles = [get_encoding_profile(name.strip()) for name in args.profiles.split(",") if name.strip()]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        inputs = args.inputs
+        if not inputs:
+            inputs = []
+            for size in ("1920x1080", "854x480"):
+                path = os.path.join(work_dir, f"synthetic_{size}.mp4")
+                print(f"Generando clip sintético {size} ({args.seconds}s)...")
+                generate_test_clip(path, size, args.seconds)
+                inputs.append(path)
+
+        logo_path = os.path.join(work_dir, "logo.png")
+        create_anb_logo().save(logo_path)
+
+        results = []
+        for input_path in inputs:
+            for profile in profiles:
+                spec = apply_profile(RenderSpec(), profile)
+
+                # Referencia sin pérdidas con la misma cadencia que el perfil
+                reference_path = os.path.join(work_dir, f"reference_{profile.fps}.mkv")
+                reference_spec = replace(spec, preset="ultrafast", crf=0)
+                encode_body(input_path, reference_path, logo_path, reference_spec)
+
+                seconds = []
+                output_path = os.path.join(work_dir, f"out_{profile.name}.mp4")
+                for _ in range(args.repeat):
+                    seconds.append(encode_body(input_path, output_path, logo_path, spec))
+
+                row = {
+                    "input": os.path.basename(input_path),
+                    "profile": profile.name,
+                    "preset": profile.preset,
+                    "crf": profile.crf,
+                    "fps": profile.fps,
+                    "seconds": statistics.median(seconds),
+                    "output_mb": os.path.getsize(output_path) / (1024 * 1024),
+                    **measure_quality(output_path, reference_path),
+                }
+                results.append(row)
+                print(f"{row['input']} [{profile.name}]: {row['seconds']:.1f}s, "
+                      f"{row['output_mb']:.2f}MB, PSNR {row['psnr_db']}dB, SSIM {row['ssim']}")
+
+    output = f"encoding_benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark de motores de procesamiento de video (moviepy vs ffmpeg filter-graph)
+
+Cada render se ejecuta en un proceso hijo nuevo para medir, por clip:
+- Tiempo total (wall-clock)
+- RSS pico del proceso Python del worker
+- RSS pico de los subprocesos ffmpeg lanzados por el motor
+
+Si no se indican videos de entrada se generan clips sintéticos (testsrc) de
+1080p y 480p con la duración indicada.
+
+Uso:
+    python capacity-planning/engine_benchmark.py --engines ffmpeg,moviepy --repeat 3
+    python capacity-planning/engine_benchmark.py --inputs clip1.mp4 clip2.mov
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Any, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+
+def generate_test_clip(path: str, size: str, seconds: int):
+    """Generar un clip sintético H.264 con audio"""
+    from app.workers.ffmpeg_engine import get_ffmpeg_binary
+    subprocess.run([
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30',
+        '-f', 'lavfi', '-i', 'sine=frequency=440',
+        '-t', str(seconds), '-c:v', 'libx264', '-preset', 'veryfast', '-c:a', 'aac',
+        path
+    ], check=True)
+
+
+def run_engine_in_child(engine: str, input_path: str, output_path: str, logo_path: str) -> Dict[str, Any]:
+    """Ejecutar un render en un proceso hijo y devolver sus métricas"""
+    result = subprocess.run(
+        [sys.executable, os.path.realpath(__file__), '--child', engine, input_path, output_path, logo_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip()[-1000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def child_main(engine: str, input_path: str, output_path: str, logo_path: str):
+    """Proceso hijo: renderizar con un motor y reportar tiempo y memoria"""
+    from app.workers.rendering import default_render_spec
+
+    started = time.perf_counter()
+    if engine == 'ffmpeg':
+        from app.workers.ffmpeg_engine import render_with_ffmpeg
+        render_with_ffmpeg(input_path, output_path, logo_path, default_render_spec())
+    else:
+        from app.workers.moviepy_engine import render_with_moviepy
+        render_with_moviepy(input_path, output_path, logo_path, default_render_spec(),
+                            temp_audiofile=output_path + '.m4a')
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss está en KiB en Linux
+    print(json.dumps({
+        "seconds": elapsed,
+        "python_peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "ffmpeg_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        "output_mb": os.path.getsize(output_path) / (1024 * 1024)
+    }))
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Mediana de cada métrica sobre las repeticiones"""
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child_main(*sys.argv[2:6])
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark de motores de procesamiento de video")
+    parser.add_argument("--engines", default="ffmpeg,moviepy", help="Motores separados por coma")
+    parser.add_argument("--inputs", nargs="*", default=None, help="Videos de entrada (por defecto clips sintéticos)")
+    parser.add_argument("--seconds", type=int, default=35, help="Duración de los clips sintéticos")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por motor y clip")
+    args = parser.parse_args()
+
+    from app.workers.rendering import create_anb_logo
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        inputs = args.inputs
+        if not inputs:
+            inputs = []
+            for size in ("1920x1080", "854x480"):
+                path = os.path.join(work_dir, f"synthetic_{size}.mp4")
+                print(f"Generando clip sintético {size} ({args.seconds}s)...")
+                generate_test_clip(path, size, args.seconds)
+                inputs.append(path)
+
+        logo_path = os.path.join(work_dir, "logo.png")
+        create_anb_logo().save(logo_path)
+
+        results = []
+        for input_path in inputs:
+            for engine in [name.strip() for name in args.engines.split(",") if name.strip()]:
+                runs = []
+                for i in range(args.repeat):
+                    output_path = os.path.join(work_dir, f"out_{engine}_{i}.mp4")
+                    runs.append(run_engine_in_child(engine, input_path, output_path, logo_path))
+                summary = summarize(runs)
+                print(f"{os.path.basename(input_path)} [{engine}]: {summary['seconds']:.1f}s, "
+                      f"python RSS {summary['python_peak_rss_mb']:.0f}MB, "
+                      f"ffmpeg RSS {summary['ffmpeg_peak_rss_mb']:.0f}MB")
+                results.append({"input": os.path.basename(input_path), "engine": engine,
+                                "median": summary, "runs": runs})
+
+    output = f"engine_benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark de backends de cola para el worker de procesamiento de videos
+
+Compara SQS (long polling), Redis Streams y la cola en PostgreSQL usando las
+mismas operaciones que el API y el worker:
+- Latencia de encolado (send_video_processing_message) por mensaje: p50/p95/p99
+- Throughput de consumo (receive_messages + delete_messages_batch)
+- Latencia extremo a extremo (encolado -> recepción por el worker)
+
+Uso:
+    python capacity-planning/queue_benchmark.py --backends redis,postgres --messages 1000
+    python capacity-planning/queue_benchmark.py --backends sqs --messages 200 --sqs-queue-url <cola-de-pruebas>
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.config import settings
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def create_backend(name: str, queue_name: str, sqs_queue_url: str = None):
+    """Crear una instancia del backend sobre una cola exclusiva del benchmark"""
+    if name == "sqs":
+        from app.services.sqs_service import SQSService
+        service = SQSService()
+        # Nunca usar la cola de producción: los mensajes de prueba serían procesados por los workers
+        service.queue_url = sqs_queue_url
+        return service
+    if name == "redis":
+        from app.services.redis_queue import RedisStreamsQueueBackend
+        return RedisStreamsQueueBackend(stream=queue_name, group="benchmark")
+    if name == "postgres":
+        from app.services.postgres_queue import PostgresQueueBackend
+        return PostgresQueueBackend(queue_name=queue_name)
+    raise ValueError(f"Backend desconocido: {name}")
+
+
+class QueueBenchmark:
+    def __init__(self, backend_name: str, messages: int, batch_size: int, sqs_queue_url: str = None):
+        self.backend_name = backend_name
+        self.messages = messages
+        self.batch_size = batch_size
+        self.queue_name = f"benchmark_{uuid.uuid4().hex[:8]}"
+        self.backend = create_backend(backend_name, self.queue_name, sqs_queue_url)
+        # SQS conserva su long polling configurado (es lo que se compara); las colas
+        # propias esperan 1s para no quedarse bloqueadas al vaciarse
+        if backend_name != "sqs":
+            self.backend.wait_time_seconds = 1
+
+    def run_enqueue(self) -> Dict[str, Any]:
+        """Medir la latencia de encolado de cada mensaje (camino del upload)"""
+        latencies_ms = []
+        failures = 0
+        started = time.perf_counter()
+        for i in range(self.messages):
+            t0 = time.perf_counter()
+            message_id = self.backend.send_video_processing_message(
+                f"benchmark-{i}", f"/app/uploads/benchmark-{i}.mp4"
+            )
+            latencies_ms.append((time.perf_counter() - t0) * 1000)
+            if not message_id:
+                failures += 1
+        elapsed = time.perf_counter() - started
+
+        return {
+            "messages": self.messages,
+            "failures": failures,
+            "total_seconds": elapsed,
+            "messages_per_second": self.messages / elapsed if elapsed else 0,
+            "latency_ms": {
+                "p50": percentile(latencies_ms, 50),
+                "p95": percentile(latencies_ms, 95),
+                "p99": percentile(latencies_ms, 99),
+                "mean": statistics.mean(latencies_ms) if latencies_ms else 0
+            }
+        }
+
+    def run_consume(self) -> Dict[str, Any]:
+        """Consumir la cola como el worker y medir throughput y latencia extremo a extremo"""
+        received = 0
+        empty_polls = 0
+        end_to_end_ms = []
+        started = time.perf_counter()
+
+        while received < self.messages and empty_polls < 3:
+            batch = self.backend.receive_messages(max_messages=self.batch_size)
+            if not batch:
+                empty_polls += 1
+                continue
+            empty_polls = 0
+            now_ms = time.time() * 1000
+            for message in batch:
+                sent = (message.get('Attributes') or {}).get('SentTimestamp')
+                if sent:
+                    end_to_end_ms.append(now_ms - float(sent))
+            self.backend.delete_messages_batch([message['ReceiptHandle'] for message in batch])
+            received += len(batch)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "received": received,
+            "total_seconds": elapsed,
+            "messages_per_second": received / elapsed if elapsed else 0,
+            "end_to_end_ms": {
+                "p50": percentile(end_to_end_ms, 50),
+                "p95": percentile(end_to_end_ms, 95),
+                "p99": percentile(end_to_end_ms, 99)
+            }
+        }
+
+    def run(self) -> Dict[str, Any]:
+        print(f"\n=== Backend: {self.backend_name} (cola {self.queue_name}) ===")
+        if not self.backend.is_configured():
+            print("Backend no configurado, se omite")
+            return {"backend": self.backend_name, "skipped": True}
+
+        enqueue = self.run_enqueue()
+        print(f"Encolado: {enqueue['messages_per_second']:.1f} msg/s, "
+              f"p50={enqueue['latency_ms']['p50']:.2f}ms p99={enqueue['latency_ms']['p99']:.2f}ms")
+
+        # Mensajes encolados aún no entregados (en Redis Streams, el `lag` del grupo de consumidores)
+        attributes_before = self.backend.get_queue_attributes() or {}
+        backlog = attributes_before.get("ApproximateNumberOfMessages")
+        print(f"Backlog antes de consumir: {backlog}")
+
+        consume = self.run_consume()
+        print(f"Consumo: {consume['messages_per_second']:.1f} msg/s, "
+              f"extremo a extremo p50={consume['end_to_end_ms']['p50']:.0f}ms")
+
+        return {
+            "backend": self.backend_name,
+            "enqueue": enqueue,
+            "consume": consume,
+            "backlog_before_consume": int(backlog) if backlog is not None else None,
+            "queue_attributes_after": self.backend.get_queue_attributes()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends de cola")
+    parser.add_argument("--backends", default="redis,postgres,sqs",
+                        help="Backends separados por coma: sqs, redis, postgres")
+    parser.add_argument("--messages", type=int, default=500, help="Mensajes por backend")
+    parser.add_argument("--batch-size", type=int, default=10, help="Mensajes por receive (máx. 10)")
+    parser.add_argument("--sqs-queue-url", default=None,
+                        help="URL de una cola SQS exclusiva para el benchmark (requerida para 'sqs')")
+    args = parser.parse_args()
+
+    results = []
+    for backend_name in [name.strip() for name in args.backends.split(",") if name.strip()]:
+        try:
+            results.append(
+                QueueBenchmark(backend_name, args.messages, args.batch_size, args.sqs_queue_url).run()
+            )
+        except Exception as e:
+            print(f"Error en backend {backend_name}: {e}")
+            results.append({"backend": backend_name, "error": str(e)})
+
+    output = f"queue_benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "sqs_wait_time_seconds": settings.sqs_wait_time_seconds,
+            "results": results
+        }, f, indent=2, default=str)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark de composición de la marca de agua en el motor moviepy
+
+Compara, sobre frames sintéticos del tamaño de salida, los frames por
+segundo de:
+- composite: CompositeVideoClip([clip, watermark]) de moviepy (ruta anterior)
+- blender: WatermarkBlender (NumPy vectorizado sobre buffers preasignados)
+
+Solo se mide la composición: no hay decodificación ni codificación.
+
+Uso:
+    python capacity-planning/watermark_benchmark.py --frames 240 --size 1280x720
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+
+def measure_fps(get_frame, frames: int, fps: int) -> float:
+    """Frames por segundo de `get_frame(t)` sobre `frames` instantes consecutivos"""
+    get_frame(0)  # calentamiento
+    started = time.perf_counter()
+    for i in range(frames):
+        get_frame(i / fps)
+    return frames / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de composición de la marca de agua")
+    parser.add_argument("--frames", type=int, default=240, help="Frames a componer por método")
+    parser.add_argument("--size", default="1280x720", help="Tamaño de salida (ANCHOxALTO)")
+    args = parser.parse_args()
+
+    from moviepy.editor import VideoClip, ImageClip, CompositeVideoClip
+    from app.workers.assets import get_render_assets
+    from app.workers.compositing import WatermarkBlender
+    from app.workers.rendering import RenderSpec
+
+    width, height = (int(value) for value in args.size.split("x"))
+    spec = RenderSpec(width=width, height=height)
+    assets = get_render_assets(spec)
+    duration = args.frames / spec.fps
+
+    # Frames distintos en cada instante, como los de un video decodificado
+    rng = np.random.default_rng(0)
+    pool = rng.integers(0, 256, (8, height, width, 3), dtype=np.uint8)
+
+    def source_frame(t):
+        return pool[int(t * spec.fps) % len(pool)].copy()
+
+    clip = VideoClip(source_frame, duration=duration)
+
+    mask = ImageClip(assets.watermark_alpha, ismask=True)
+    watermark = ImageClip(assets.watermark_rgb).set_mask(mask).set_duration(duration).set_position(('right', 'bottom'))
+    composite = CompositeVideoClip([clip, watermark])
+
+    blender = WatermarkBlender(assets, width, height)
+    blended = clip.fl_image(blender.blend)
+
+    baseline = measure_fps(source_frame, args.frames, spec.fps)
+    results = {
+        "size": args.size,
+        "frames": args.frames,
+        "source_fps": baseline,
+        "composite_fps": measure_fps(composite.get_frame, args.frames, spec.fps),
+        "blender_fps": measure_fps(blended.get_frame, args.frames, spec.fps),
+    }
+    results["speedup"] = results["blender_fps"] / results["composite_fps"]
+
+    print(f"Generación de frames (referencia): {results['source_fps']:.0f} fps")
+    print(f"CompositeVideoClip:                {results['composite_fps']:.0f} fps")
+    print(f"WatermarkBlender:                  {results['blender_fps']:.0f} fps "
+          f"(x{results['speedup']:.1f})")
+
+    output = f"watermark_benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.core.database import get_db, Base
 from app.core.config import settings
+from app.models.user import User
+from app.models.video import Video, VideoStatus
 
 # Test database URL - use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -81,4 +83,39 @@ def authenticated_client(client, test_user_data, test_login_data):
         "Authorization": f"Bearer {token_data['access_token']}"
     })
     
-    return client, token_data
\ No newline at end of file
+    return client, token_data
+
+
+@pytest.fixture
+def worker_dirs(tmp_path, monkeypatch):
+    """Local storage, scratch and checkpoint directories for one test"""
+    monkeypatch.setattr(settings, "storage_type", "local")
+    monkeypatch.setattr(settings, "processed_dir", str(tmp_path / "processed"))
+    monkeypatch.setattr(settings, "worker_scratch_dir", str(tmp_path / "scratch"))
+    monkeypatch.setattr(settings, "worker_scratch_min_free_mb", 0)
+    monkeypatch.setattr(settings, "worker_checkpoint_dir", str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(settings, "video_hls_enabled", False)
+    monkeypatch.setattr(settings, "video_previews_enabled", False)
+    return tmp_path
+
+
+@pytest.fixture
+def uploaded_video_db():
+    """Database with one uploaded video (video-1), shared with the worker pipeline"""
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    user = User(
+        email="worker@example.com", first_name="Test", last_name="User",
+        city="Bogotá", country="Colombia", hashed_password="x"
+    )
+    session.add(user)
+    session.commit()
+    session.add(Video(
+        id="video-1", title="Clip", original_filename="clip.mp4",
+        original_path="/app/uploads/clip.mp4", owner_id=user.id,
+        status=VideoStatus.uploaded
+    ))
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
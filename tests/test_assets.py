@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.workers import assets
+from app.workers.rendering import RenderSpec
+
+
+@pytest.fixture(autouse=True)
+def asset_cache(tmp_path, monkeypatch):
+    """Isolated cache directory and in-memory cache for each test"""
+    monkeypatch.setattr(settings, "worker_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "anb_logo_path", str(tmp_path / "missing.png"))
+    assets.clear_assets()
+    yield
+    assets.clear_assets()
+
+
+def test_assets_are_rendered_once_per_spec():
+    """Test that jobs with the same spec reuse the pre-rendered variants"""
+    spec = RenderSpec()
+
+    first = assets.get_render_assets(spec)
+
+    assert assets.get_render_assets(RenderSpec()) is first
+    assert assets.get_render_assets(RenderSpec(width=854, height=480)) is not first
+    assert os.path.exists(first.logo_path)
+
+
+def test_frame_and_watermark_match_spec():
+    """Test the sizes of the full-frame and watermark variants"""
+    spec = RenderSpec(width=1280, height=720, watermark_width=100, watermark_opacity=0.7)
+
+    rendered = assets.get_render_assets(spec)
+
+    # Placeholder logo is 200x100
+    assert rendered.frame.shape == (720, 1280, 3)
+    assert rendered.watermark_rgb.shape == (50, 100, 3)
+    assert rendered.watermark_alpha.shape == (50, 100)
+    assert rendered.watermark_alpha.max() <= 0.7 + 1e-6
+    # Transparent corners of the placeholder stay black on the full frame
+    assert not rendered.frame[0, 0].any()
+    np.testing.assert_allclose(
+        rendered.watermark_premultiplied,
+        rendered.watermark_rgb * rendered.watermark_alpha[:, :, None],
+        atol=1.0
+    )
+
+
+def test_configured_logo_is_used(tmp_path, monkeypatch):
+    """Test that settings.anb_logo_path is loaded when it exists"""
+    from PIL import Image
+    logo_path = tmp_path / "anb_logo.png"
+    Image.new('RGBA', (400, 100), (0, 255, 0, 255)).save(logo_path)
+    monkeypatch.setattr(settings, "anb_logo_path", str(logo_path))
+
+    rendered = assets.get_render_assets(RenderSpec())
+
+    assert rendered.watermark_rgb.shape == (25, 100, 3)
+    assert tuple(rendered.frame[360, 640]) == (0, 255, 0)
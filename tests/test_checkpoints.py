@@ -0,0 +1,52 @@
+import os
+import time
+from app.core.config import settings
+from app.services.file_storage import LocalFileStorage
+from app.workers.checkpoints import JobCheckpoint, find_published, output_name, prune_checkpoints
+
+
+def test_checkpoint_survives_reopening(worker_dirs):
+    """Test that completed stages are read back and require their artifacts"""
+    checkpoint = JobCheckpoint("video-1", pipeline_version=2)
+    with open(checkpoint.file("source.mp4"), "wb") as f:
+        f.write(b"video")
+    checkpoint.mark("downloaded", files=["source.mp4"])
+
+    reopened = JobCheckpoint("video-1", pipeline_version=2)
+    assert reopened.is_done("downloaded")
+    assert reopened.resume_stage() == "encoded"
+    # Another pipeline version does not share the artifacts
+    assert JobCheckpoint("video-1", pipeline_version=3).resume_stage() == "downloaded"
+
+    os.remove(checkpoint.file("source.mp4"))
+    assert JobCheckpoint("video-1", pipeline_version=2).resume_stage() == "downloaded"
+
+
+def test_prune_removes_only_abandoned_checkpoints(worker_dirs):
+    """Test that checkpoints older than the TTL are removed"""
+    old = JobCheckpoint("old")
+    recent = JobCheckpoint("recent")
+    stale = time.time() - 48 * 3600
+    os.utime(old.path, (stale, stale))
+
+    assert prune_checkpoints(max_age_hours=24) == 1
+    assert not os.path.exists(old.path)
+    assert os.path.exists(recent.path)
+
+
+def test_find_published_output(worker_dirs):
+    """Test that an output published under its deterministic name is found in storage"""
+    storage = LocalFileStorage()
+    name = output_name("video-1")
+
+    assert find_published(storage, name) is None
+
+    os.makedirs(settings.processed_dir, exist_ok=True)
+    with open(os.path.join(settings.processed_dir, f"{name}.mp4"), "wb") as f:
+        f.write(b"mp4")
+
+    assert find_published(storage, name) == {
+        "processed_path": os.path.join(settings.processed_dir, f"{name}.mp4"),
+        "thumbnail_path": None,
+        "preview_path": None,
+    }
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.workers import assets
+from app.workers.compositing import WatermarkBlender
+from app.workers.rendering import RenderSpec
+
+
+@pytest.fixture
+def render_assets(tmp_path, monkeypatch):
+    """Placeholder logo assets rendered into an isolated cache"""
+    monkeypatch.setattr(settings, "worker_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "anb_logo_path", str(tmp_path / "missing.png"))
+    assets.clear_assets()
+    yield assets.get_render_assets(RenderSpec(width=320, height=180, watermark_width=100))
+    assets.clear_assets()
+
+
+def reference_composite(frame, rendered):
+    """Straight alpha blend of the watermark at the bottom-right corner"""
+    out = frame.astype(np.float64)
+    height, width = rendered.watermark_alpha.shape
+    alpha = rendered.watermark_alpha[:, :, None]
+    region = out[-height:, -width:]
+    out[-height:, -width:] = rendered.watermark_rgb * alpha + region * (1 - alpha)
+    return out
+
+
+def test_blend_matches_alpha_composite(render_assets):
+    """Test that the blended frame matches a straight alpha composite"""
+    frame = np.random.default_rng(1).integers(0, 256, (180, 320, 3), dtype=np.uint8)
+    expected = reference_composite(frame, render_assets)
+
+    blended = WatermarkBlender(render_assets, 320, 180).blend(frame.copy())
+
+    assert np.abs(blended.astype(np.float64) - expected).max() <= 1.5
+    # Outside the watermark the frame is untouched
+    np.testing.assert_array_equal(blended[:100], frame[:100])
+
+
+def test_blend_in_place_and_read_only_frames(render_assets):
+    """Test that writable frames are blended in place and read-only ones into the blender buffer"""
+    blender = WatermarkBlender(render_assets, 320, 180)
+    frame = np.zeros((180, 320, 3), dtype=np.uint8)
+
+    assert blender.blend(frame) is frame
+
+    read_only = np.zeros((180, 320, 3), dtype=np.uint8)
+    read_only.setflags(write=False)
+    blended = blender.blend(read_only)
+
+    assert blended is not read_only
+    assert not read_only.any()
+    np.testing.assert_array_equal(blended, frame)
+
+
+def test_watermark_larger_than_frame_is_cut(render_assets):
+    """Test that a frame smaller than the watermark keeps its bottom-right part"""
+    blender = WatermarkBlender(render_assets, 60, 40)
+
+    blended = blender.blend(np.zeros((40, 60, 3), dtype=np.uint8))
+
+    assert blended.shape == (40, 60, 3)
+    assert blender.inverse_alpha.shape == (40, 60, 1)
@@ -0,0 +1,77 @@
+import time
+from app.workers.encoding import BacklogEncodingPolicy, apply_profile, get_encoding_profile, message_age_seconds
+from app.workers.ffmpeg_engine import encoding_args
+from app.workers.rendering import RenderSpec
+
+
+class FakeQueue:
+    """Queue backend returning a configurable depth"""
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.calls = 0
+
+    def get_queue_attributes(self):
+        self.calls += 1
+        return {'ApproximateNumberOfMessages': str(self.depth)}
+
+
+def make_policy(queue=None, **overrides):
+    options = dict(normal_profile="quality", backlog_profile="fast", depth_high=100, depth_low=10,
+                   age_high=600, age_low=60, sample_interval=0)
+    options.update(overrides)
+    return BacklogEncodingPolicy(queue, **options)
+
+
+def test_policy_switches_with_hysteresis():
+    """Test that the backlog profile is kept until the backlog drops below the low thresholds"""
+    policy = make_policy()
+
+    assert policy.update(depth=50, age=0).name == "quality"
+    assert policy.update(depth=150).name == "fast"
+    # Between the thresholds: no change in either direction
+    assert policy.update(depth=50).name == "fast"
+    assert policy.update(depth=5).name == "quality"
+    assert policy.update(depth=50).name == "quality"
+
+
+def test_policy_reacts_to_message_age():
+    """Test that old messages trigger the backlog profile even with a shallow queue"""
+    policy = make_policy(FakeQueue(depth=0))
+    old_message = {'Attributes': {'SentTimestamp': str(int((time.time() - 900) * 1000))}}
+    fresh_message = {'Attributes': {'SentTimestamp': str(int(time.time() * 1000))}}
+
+    policy.observe_message(old_message)
+    assert policy.select().name == "fast"
+
+    policy.observe_message(fresh_message)
+    assert policy.select().name == "quality"
+
+
+def test_policy_samples_queue_depth_at_interval():
+    """Test that queue attributes are not requested for every job"""
+    queue = FakeQueue(depth=500)
+    policy = make_policy(queue, sample_interval=3600)
+
+    assert policy.select().name == "fast"
+    policy.select()
+
+    assert queue.calls == 1
+
+
+def test_message_age_without_timestamp():
+    """Test that messages without SentTimestamp have no age"""
+    assert message_age_seconds({'Body': '{}'}) is None
+    assert message_age_seconds({'Attributes': {'SentTimestamp': '1000'}}, now=11) == 10
+
+
+def test_profile_sets_encoder_options():
+    """Test that a profile reaches the ffmpeg encoder options"""
+    spec = apply_profile(RenderSpec(), get_encoding_profile("fast"))
+    args = encoding_args(spec)
+
+    assert spec.encoding_profile == "fast"
+    assert args[args.index('-preset') + 1] == "ultrafast"
+    assert args[args.index('-crf') + 1] == "26"
+    assert args[args.index('-r') + 1] == str(spec.fps)
+    assert get_encoding_profile("unknown").name == "quality"
@@ -0,0 +1,152 @@
+import os
+import re
+import subprocess
+import pytest
+from app.workers.ffmpeg_engine import build_ffmpeg_command, build_filter_complex
+from app.workers.rendering import RenderSpec
+
+
+def test_command_trims_input_and_drops_audio():
+    """Test that the clip is trimmed on input and the output has no audio"""
+    command = build_ffmpeg_command("in.mp4", "out.mp4", "logo.png", RenderSpec(max_duration=30))
+
+    assert command[command.index('-t') + 1] == '30'
+    assert command.index('-t') < command.index('in.mp4')
+    assert '-an' in command
+    assert command[command.index('-map') + 1] == '[out]'
+    assert command[-1] == 'out.mp4'
+
+
+def test_filter_graph_targets_spec_resolution():
+    """Test that body, intro and outro are built at the spec size and concatenated"""
+    graph = build_filter_complex(RenderSpec(width=1280, height=720, fps=24))
+
+    assert "scale=-2:720,crop='min(iw,1280)':720,pad=1280:720" in graph
+    assert "color=c=black:s=1280x720:r=24:d=2.5[intro_bg]" in graph
+    assert "colorchannelmixer=aa=0.7" in graph
+    assert graph.endswith("[intro][main][outro]concat=n=3:v=1:a=0[out]")
+
+
+def test_bumper_is_encoded_once_per_spec(tmp_path, monkeypatch):
+    """Test that intro/outro segments are cached per logo and spec"""
+    from app.core.config import settings
+    from app.workers import bumpers
+
+    logo_path = tmp_path / "logo.png"
+    logo_path.write_bytes(b"logo")
+    monkeypatch.setattr(settings, "worker_cache_dir", str(tmp_path / "cache"))
+
+    commands = []
+
+    def fake_run_ffmpeg(command):
+        commands.append(command)
+        with open(command[-1], 'wb') as f:
+            f.write(b"mp4")
+
+    monkeypatch.setattr(bumpers, "run_ffmpeg", fake_run_ffmpeg)
+
+    first = bumpers.get_bumper("intro", str(logo_path), RenderSpec())
+    again = bumpers.get_bumper("intro", str(logo_path), RenderSpec())
+    other = bumpers.get_bumper("intro", str(logo_path), RenderSpec(width=854, height=480))
+
+    assert first == again
+    assert other != first
+    assert len(commands) == 2
+    assert not [name for name in os.listdir(os.path.dirname(first)) if name.endswith(".tmp.mp4")]
+
+
+def test_body_graph_without_bumpers():
+    """Test that the body-only graph has no intro/outro"""
+    graph = build_filter_complex(RenderSpec(), with_bumpers=False)
+
+    assert "intro" not in graph
+    assert graph.endswith("overlay=W-w:H-h[out]")
+
+
+def test_parallel_mode_concatenates_encoded_segments(tmp_path, monkeypatch):
+    """Test that frame-range segments are encoded separately and joined between the bumpers"""
+    from app.core.config import settings
+    from app.workers import bumpers, ffmpeg_engine
+
+    monkeypatch.setattr(settings, "video_bumper_mode", "concat")
+    monkeypatch.setattr(settings, "video_parallel_segments", 3)
+    monkeypatch.setattr(settings, "video_segment_min_seconds", 2.0)
+    monkeypatch.setattr(bumpers, "get_bumper", lambda kind, logo_path, spec: f"/cache/{kind}.mp4")
+
+    encoded, joined = [], []
+    monkeypatch.setattr(ffmpeg_engine, "run_ffmpeg", lambda command: encoded.append(command))
+    monkeypatch.setattr(ffmpeg_engine, "concat_segments", lambda paths, output_path, stream_to=None: joined.extend(paths))
+
+    output_path = str(tmp_path / "out.mp4")
+    ffmpeg_engine.render_with_ffmpeg("in.mp4", output_path, "logo.png", RenderSpec(fps=24), source_duration=12.0)
+
+    assert [command[-1] for command in encoded] == joined[1:-1]
+    assert [command[command.index('-frames:v') + 1] if '-frames:v' in command else None
+            for command in encoded] == ['96', '96', None]
+    assert [command[command.index('-ss') + 1] if '-ss' in command else None
+            for command in encoded] == [None, '4.000000', '8.000000']
+    assert joined[0] == "/cache/intro.mp4" and joined[-1] == "/cache/outro.mp4"
+    assert not os.path.exists(output_path + ".segments")
+
+
+def test_segments_are_sized_from_the_source_duration(monkeypatch):
+    """Test that segments are whole output frames of the rendered clip, the last one running to its end"""
+    from app.core.config import settings
+    from app.workers.ffmpeg_engine import plan_segments
+
+    monkeypatch.setattr(settings, "video_segment_min_seconds", 2.0)
+    spec = RenderSpec(fps=24, max_duration=30)
+
+    assert plan_segments(spec, 3, 10.0) == [(0, 80), (80, 80), (160, None)]
+    # Capped at max_duration; short clips keep segments of at least video_segment_min_seconds
+    assert plan_segments(spec, 3, 120.0) == [(0, 240), (240, 240), (480, None)]
+    assert plan_segments(spec, 3, 5.0) == [(0, 48), (48, None)]
+    assert plan_segments(spec, 3, None) == [(0, None)]
+
+
+def test_segmented_encode_has_the_frames_of_a_single_pass(tmp_path, monkeypatch):
+    """Test that joined segments have exactly as many frames as the same clip rendered in one pass"""
+    from app.core.config import settings
+    from app.workers.ffmpeg_engine import (
+        concat_segments, encode_body_in_segments, get_ffmpeg_binary, run_ffmpeg
+    )
+
+    monkeypatch.setattr(settings, "video_segment_min_seconds", 0.5)
+    source, logo = str(tmp_path / "source.mp4"), str(tmp_path / "logo.png")
+    # 25 fps source rendered at 30 fps: cutting it at its keyframes (every 13 frames) and
+    # converting each piece on its own would lose a frame
+    run_ffmpeg([get_ffmpeg_binary(), '-loglevel', 'error', '-y', '-f', 'lavfi',
+                '-i', 'testsrc=size=160x120:rate=25:duration=3.1', '-c:v', 'libx264', '-g', '13', source])
+    run_ffmpeg([get_ffmpeg_binary(), '-loglevel', 'error', '-y', '-f', 'lavfi',
+                '-i', 'color=white:size=32x32', '-frames:v', '1', logo])
+    spec = RenderSpec(width=160, height=120, fps=30, watermark_width=16, preset="ultrafast")
+
+    def frame_count(path):
+        result = subprocess.run([get_ffmpeg_binary(), '-hide_banner', '-stats', '-i', path, '-map', '0:v',
+                                 '-f', 'null', '-'], capture_output=True, text=True)
+        return int(re.findall(r"frame=\s*(\d+)", result.stderr)[-1])
+
+    single = str(tmp_path / "single.mp4")
+    run_ffmpeg(build_ffmpeg_command(source, single, logo, spec, with_bumpers=False))
+    joined = str(tmp_path / "joined.mp4")
+    segments = encode_body_in_segments(source, joined, logo, spec, 3, source_duration=3.1)
+    concat_segments(segments, joined)
+
+    assert len(segments) == 3
+    assert frame_count(joined) == frame_count(single)
+
+
+def test_previews_share_the_clip_decode():
+    """Test that poster and sprite sheet are extra outputs of the same command"""
+    from app.workers.rendering import PreviewPaths
+    previews = PreviewPaths(poster="poster.jpg", sprite="sprite.jpg")
+
+    command = build_ffmpeg_command("in.mp4", "out.mp4", "logo.png", RenderSpec(max_duration=30), previews=previews)
+    graph = command[command.index('-filter_complex') + 1]
+
+    assert command.count('-i') == 2
+    assert "[clip]split=3[main][poster_src][sprite_src]" in graph
+    assert "tile=5x2[sprite]" in graph
+    assert command[-1] == "sprite.jpg"
+    assert command[command.index('[poster]') + 1:command.index('[poster]') + 3] == ['-frames:v', '1']
+    assert command.index("out.mp4") < command.index("poster.jpg")
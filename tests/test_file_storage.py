@@ -52,4 +52,137 @@ def test_local_file_storage_delete_file():
 def test_get_file_storage():
     """Test file storage factory function"""
     storage = get_file_storage()
-    assert isinstance(storage, LocalFileStorage)
\ No newline at end of file
+    assert isinstance(storage, LocalFileStorage)
+
+def test_local_file_storage_save_file_from_path():
+    """Test saving a local file by path"""
+    storage = LocalFileStorage()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, "source.mp4")
+        with open(source_path, "wb") as f:
+            f.write(b"processed video")
+        
+        file_path = storage.save_file_from_path(source_path, "copy.mp4", os.path.join(temp_dir, "processed"))
+        
+        with open(file_path, "rb") as f:
+            assert f.read() == b"processed video"
+
+
+class FakeS3Client:
+    """Records multipart upload calls"""
+    
+    def __init__(self):
+        self.parts = []
+        self.completed = None
+        self.aborted = False
+    
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        return {'UploadId': 'upload-1'}
+    
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.parts.append(Body)
+        return {'ETag': f'etag-{PartNumber}'}
+    
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload['Parts']
+    
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted = True
+
+
+def make_s3_storage(client):
+    from app.services.file_storage import S3FileStorage
+    storage = S3FileStorage.__new__(S3FileStorage)
+    storage.s3_client = client
+    storage.bucket_name = "bucket"
+    storage.upload_prefix = "uploads/"
+    storage.processed_prefix = "processed_videos/"
+    return storage
+
+
+def test_s3_stream_upload_in_parts(monkeypatch):
+    """Test that a stream is uploaded in parts of the configured size"""
+    import io
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "s3_multipart_chunksize_mb", 5)
+    client = FakeS3Client()
+    data = b"x" * (5 * 1024 * 1024 * 2 + 10)
+    
+    path = make_s3_storage(client).save_file_from_stream(io.BytesIO(data), "out.mp4", "processed_videos")
+    
+    assert path == "s3://bucket/processed_videos/out.mp4"
+    assert [len(part) for part in client.parts] == [5 * 1024 * 1024, 5 * 1024 * 1024, 10]
+    assert [part['PartNumber'] for part in client.completed] == [1, 2, 3]
+
+
+def test_s3_stream_upload_aborted_when_finalize_fails():
+    """Test that a failed encoder aborts the multipart upload"""
+    import io
+    client = FakeS3Client()
+    
+    def finalize():
+        raise RuntimeError("encoder failed")
+    
+    with pytest.raises(RuntimeError):
+        make_s3_storage(client).save_file_from_stream(io.BytesIO(b"partial"), "out.mp4", "processed_videos",
+                                                      finalize=finalize)
+    
+    assert client.aborted is True
+    assert client.completed is None
+
+
+class FakeListingS3Client:
+    """Lists a fixed set of keys and records deletions"""
+    
+    def __init__(self, keys):
+        self.keys = keys
+        self.deleted = []
+    
+    def get_paginator(self, operation):
+        client = self
+        
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                yield {'Contents': [{'Key': key} for key in client.keys if key.startswith(Prefix)]}
+        
+        return Paginator()
+    
+    def delete_objects(self, Bucket, Delete):
+        self.deleted += [item['Key'] for item in Delete['Objects']]
+
+
+def test_s3_delete_directory_removes_the_hls_prefix():
+    """Test that deleting an HLS output removes every object under its prefix and nothing else"""
+    from app.services.video_service import VideoService
+    client = FakeListingS3Client([
+        "processed_videos/processed_1_v1/master.m3u8",
+        "processed_videos/processed_1_v1/v0/index.m3u8",
+        "processed_videos/processed_1_v1/v0/segment_000.ts",
+        "processed_videos/processed_1_v10/master.m3u8",
+    ])
+    
+    VideoService.delete_stored_file(make_s3_storage(client), "s3://bucket/processed_videos/processed_1_v1/master.m3u8")
+    
+    assert client.deleted == [
+        "processed_videos/processed_1_v1/master.m3u8",
+        "processed_videos/processed_1_v1/v0/index.m3u8",
+        "processed_videos/processed_1_v1/v0/segment_000.ts",
+    ]
+
+
+def test_local_delete_stored_hls_directory():
+    """Test that deleting a local HLS output removes its directory"""
+    from app.services.video_service import VideoService
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        hls_dir = os.path.join(temp_dir, "processed_1_v1")
+        os.makedirs(os.path.join(hls_dir, "v0"))
+        for name in ("master.m3u8", os.path.join("v0", "segment_000.ts")):
+            with open(os.path.join(hls_dir, name), "wb") as f:
+                f.write(b"hls")
+        
+        VideoService.delete_stored_file(LocalFileStorage(), os.path.join(hls_dir, "master.m3u8"))
+        
+        assert not os.path.exists(hls_dir)
+        assert os.listdir(temp_dir) == []
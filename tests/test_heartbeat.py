@@ -0,0 +1,43 @@
+from app.workers.heartbeat import VisibilityHeartbeat
+
+
+class RecordingSQSService:
+    """Records ChangeMessageVisibilityBatch calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def change_messages_visibility(self, receipt_handles, visibility_timeout):
+        self.calls.append((sorted(receipt_handles), visibility_timeout))
+        return []
+
+
+def test_heartbeat_extends_only_tracked_messages():
+    """Test that beat extends active jobs and stops once a job is untracked"""
+    sqs_service = RecordingSQSService()
+    heartbeat = VisibilityHeartbeat(sqs_service, interval=60, visibility_timeout=300)
+
+    heartbeat.track("handle-1")
+    heartbeat.track("handle-2")
+    heartbeat.beat()
+    heartbeat.untrack("handle-1")
+    heartbeat.beat()
+    heartbeat.untrack("handle-2")
+    heartbeat.beat()
+
+    assert sqs_service.calls == [
+        (["handle-1", "handle-2"], 300),
+        (["handle-2"], 300),
+    ]
+
+
+def test_heartbeat_gives_up_on_hung_jobs():
+    """Test that jobs running longer than max_job_seconds are no longer extended"""
+    sqs_service = RecordingSQSService()
+    heartbeat = VisibilityHeartbeat(sqs_service, interval=60, visibility_timeout=300, max_job_seconds=10)
+
+    heartbeat.track("handle-1")
+    heartbeat._tracked["handle-1"] -= 11
+    heartbeat.beat()
+
+    assert sqs_service.calls == []
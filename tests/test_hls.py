@@ -0,0 +1,75 @@
+import os
+from app.core.config import settings
+from app.workers.hls import build_hls_command, get_hls_ladder, publish_hls, MASTER_PLAYLIST
+from app.workers.rendering import RenderSpec
+
+
+def test_ladder_never_exceeds_output_height(monkeypatch):
+    """Test that renditions taller than the output are dropped"""
+    monkeypatch.setattr(settings, "video_hls_ladder", "360,540,720,1080")
+
+    ladder = get_hls_ladder(RenderSpec(height=720))
+
+    assert [rendition.height for rendition in ladder] == [360, 540, 720]
+
+
+def test_command_splits_one_render_into_renditions(monkeypatch):
+    """Test that all renditions come from one filter graph with aligned keyframes"""
+    monkeypatch.setattr(settings, "video_hls_ladder", "360,720")
+    spec = RenderSpec()
+
+    command = build_hls_command("in.mp4", "/out", "logo.png", spec, get_hls_ladder(spec))
+    graph = command[command.index('-filter_complex') + 1]
+
+    assert command.count('-i') == 2
+    assert "[out]split=2[v0_src][v1_src]" in graph
+    assert "[v1_src]scale=-2:720[v1]" in graph
+    assert command[command.index('-var_stream_map') + 1] == "v:0 v:1"
+    assert command[command.index('-maxrate:v:0') + 1] == "800k"
+    assert '-force_key_frames' in command
+
+
+class RecordingStorage:
+    def __init__(self):
+        self.saved = []
+
+    def save_file_from_path(self, source_path, filename, directory):
+        self.saved.append(filename)
+        return f"s3://bucket/{filename}"
+
+    def get_file_path(self, filename, directory):
+        return f"https://bucket.example/{filename}"
+
+
+def make_hls_dir(root):
+    for rendition in ("v0", "v1"):
+        os.makedirs(os.path.join(root, rendition))
+        for name in ("segment_000.ts", "index.m3u8"):
+            open(os.path.join(root, rendition, name), "w").close()
+    open(os.path.join(root, MASTER_PLAYLIST), "w").close()
+
+
+def test_publish_uploads_playlists_after_segments(tmp_path, monkeypatch):
+    """Test that the master playlist is uploaded last and returned as the processed URL"""
+    monkeypatch.setattr(settings, "storage_type", "cloud")
+    make_hls_dir(str(tmp_path / "hls"))
+    storage = RecordingStorage()
+
+    url = publish_hls(storage, str(tmp_path / "hls"), "processed_1")
+
+    assert url == "https://bucket.example/processed_1/master.m3u8"
+    assert storage.saved[:2] == ["processed_1/v0/segment_000.ts", "processed_1/v1/segment_000.ts"]
+    assert storage.saved[-1] == "processed_1/master.m3u8"
+
+
+def test_publish_local_renames_directory(tmp_path, monkeypatch):
+    """Test that local storage receives the ladder by renaming its directory"""
+    monkeypatch.setattr(settings, "storage_type", "local")
+    monkeypatch.setattr(settings, "processed_dir", str(tmp_path / "processed"))
+    make_hls_dir(str(tmp_path / "hls"))
+
+    path = publish_hls(RecordingStorage(), str(tmp_path / "hls"), "processed_1")
+
+    assert path == os.path.join(str(tmp_path / "processed"), "processed_1", MASTER_PLAYLIST)
+    assert os.path.exists(os.path.join(str(tmp_path / "processed"), "processed_1", "v1", "segment_000.ts"))
+    assert not os.path.exists(tmp_path / "hls")
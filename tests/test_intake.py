@@ -0,0 +1,134 @@
+import pytest
+from app.core.config import settings
+from app.models.video import Video, VideoStatus
+from app.services import sqs_service
+from app.services.postgres_queue import PostgresQueueBackend
+from app.workers import intake, pipeline
+from app.workers.intake import admit_video, validate_source
+from app.workers.pipeline import run_pipeline
+from app.workers.probe import SourceInfo, SourceReadError
+from tests.conftest import TestingSessionLocal
+
+SOURCE = SourceInfo(width=640, height=480, duration=12.0, fps=30.0, codec="h264")
+
+
+class FakeQueue:
+    """Encode queue that records forwarded videos"""
+
+    def __init__(self, available=True):
+        self.available = available
+        self.sent = []
+
+    def send_video_processing_message(self, video_id, video_path):
+        if not self.available:
+            return None
+        self.sent.append((video_id, video_path))
+        return f"message-{len(self.sent)}"
+
+
+@pytest.fixture
+def probed(uploaded_video_db, monkeypatch):
+    """Intake wired to the test database, probing every source as SOURCE"""
+    monkeypatch.setattr(intake, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(intake, "probe_video", lambda path, name=None: SOURCE)
+    return uploaded_video_db
+
+
+def test_validate_source():
+    """Test that unreadable, tiny and too-short sources are rejected"""
+    assert validate_source(SOURCE) is None
+    assert validate_source(None) == "no readable video stream"
+    assert "too small" in validate_source(SourceInfo(width=8, height=8, duration=5.0))
+    assert "shorter" in validate_source(SourceInfo(width=640, height=480, duration=0.1))
+    # Containers without a duration are left to the encoder
+    assert validate_source(SourceInfo(width=640, height=480)) is None
+
+
+def test_valid_upload_is_recorded_and_forwarded(probed):
+    """Test that a valid upload gets its metadata recorded and goes to the encode queue"""
+    queue = FakeQueue()
+
+    assert admit_video("video-1", "/uploads/clip.mp4", queue) is True
+
+    assert queue.sent == [("video-1", "/uploads/clip.mp4")]
+    probed.expire_all()
+    video = probed.get(Video, "video-1")
+    assert (video.source_width, video.source_height, video.source_codec) == (640, 480, "h264")
+    assert video.status == VideoStatus.uploaded
+
+
+def test_corrupt_upload_never_reaches_the_encode_queue(probed, monkeypatch):
+    """Test that an unreadable upload is marked failed and its message acknowledged"""
+    monkeypatch.setattr(intake, "probe_video", lambda path, name=None: None)
+    queue = FakeQueue()
+
+    assert admit_video("video-1", "/uploads/clip.mp4", queue) is True
+
+    assert queue.sent == []
+    probed.expire_all()
+    video = probed.get(Video, "video-1")
+    assert video.status == VideoStatus.failed
+    assert video.error_message == "Invalid video: no readable video stream"
+
+
+def test_unreadable_input_is_retried(probed, monkeypatch):
+    """Test that a network or storage error while probing leaves the upload for a retry"""
+    def unreachable(path, name=None):
+        raise SourceReadError(f"Could not read {path}: Connection refused")
+
+    monkeypatch.setattr(intake, "probe_video", unreachable)
+    queue = FakeQueue()
+
+    assert admit_video("video-1", "/uploads/clip.mp4", queue) is False
+
+    assert queue.sent == []
+    probed.expire_all()
+    assert probed.get(Video, "video-1").status == VideoStatus.uploaded
+
+
+def test_duplicates_and_unavailable_queue(probed):
+    """Test that processed videos are dropped and a failed forward is retried"""
+    assert admit_video("video-1", "/uploads/clip.mp4", FakeQueue(available=False)) is False
+
+    video = probed.get(Video, "video-1")
+    video.status = VideoStatus.processed
+    video.pipeline_version = settings.pipeline_version
+    probed.commit()
+    queue = FakeQueue()
+    assert admit_video("video-1", "/uploads/clip.mp4", queue) is True
+    assert admit_video("missing", "/uploads/clip.mp4", queue) is True
+    assert queue.sent == []
+
+
+def test_encode_stage_reuses_recorded_metadata(worker_dirs, probed, monkeypatch):
+    """Test that the encode worker does not probe a source the probe stage recorded"""
+    def fake_render(input_path, output_path, spec, stream_to=None, previews=None, source_duration=None):
+        with open(output_path, "wb") as f:
+            f.write(b"processed")
+        return "ffmpeg"
+
+    def unexpected_probe(path, name=None):
+        raise AssertionError("source probed twice")
+
+    admit_video("video-1", "/uploads/clip.mp4", FakeQueue())
+    monkeypatch.setattr(pipeline, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(pipeline, "render_video", fake_render)
+    monkeypatch.setattr(pipeline, "probe_video", unexpected_probe)
+
+    result = run_pipeline("video-1", "/uploads/clip.mp4")
+
+    assert result.outcome == pipeline.Outcome.processed
+    # Rendered at the 480p tier of the recorded 640x480 source
+    assert result.height == 480
+
+
+def test_encode_queue_is_a_separate_queue(monkeypatch):
+    """Test that the encode queue uses its own table queue name and never falls back to the upload queue"""
+    monkeypatch.setattr(settings, "queue_backend", "postgres")
+    monkeypatch.setattr(sqs_service, "_encode_queue_service", None)
+
+    queue = sqs_service.get_encode_queue_service()
+
+    assert isinstance(queue, PostgresQueueBackend)
+    assert queue.queue_name == settings.queue_encode_name
+    assert sqs_service.SQSService(queue_url="").is_configured() is False
@@ -0,0 +1,208 @@
+import os
+import pytest
+from datetime import timedelta
+from app.core.config import settings
+from app.models.video import Video, VideoStatus
+from app.workers import pipeline, sqs_worker
+from app.workers.checkpoints import JobCheckpoint, output_name
+from app.services.video_service import VideoService, ClaimResult
+from app.workers.claims import LeaseRenewal
+from app.workers.pipeline import STAGES, Outcome, VideoJob, run_pipeline, fetch_phase, encode_phase, finish_phase
+from tests.conftest import TestingSessionLocal
+
+
+def fake_render(input_path, output_path, spec, stream_to=None, previews=None, source_duration=None):
+    with open(output_path, "wb") as f:
+        f.write(b"processed")
+    return "ffmpeg"
+
+
+@pytest.fixture
+def worker(worker_dirs, uploaded_video_db, monkeypatch):
+    """Pipeline wired to the test database, with a fake render and no probing"""
+    monkeypatch.setattr(pipeline, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(pipeline, "render_video", fake_render)
+    monkeypatch.setattr(pipeline, "probe_video", lambda input_path, name=None: None)
+    return uploaded_video_db
+
+
+def test_processed_job_times_every_stage(worker):
+    """Test that a processed job reports the seconds spent in each of the six stages"""
+    result = run_pipeline("video-1", "/uploads/clip.mp4")
+
+    assert result.outcome == Outcome.processed
+    assert result.acknowledge
+    assert list(result.stage_seconds) == list(STAGES)
+    assert result.total_seconds == pytest.approx(sum(result.stage_seconds.values()))
+
+    summary = result.as_dict()
+    assert summary["outcome"] == "processed"
+    assert summary["engine"] == "ffmpeg"
+    assert summary["processed_path"] == os.path.join(settings.processed_dir, f"{output_name('video-1')}.mp4")
+    worker.expire_all()
+    assert worker.get(Video, "video-1").status == VideoStatus.processed
+
+
+def test_failed_stage_is_reported(worker, monkeypatch):
+    """Test that a failing encode stops the job there and leaves the message for a retry"""
+    def failing_render(input_path, output_path, spec, stream_to=None, previews=None, source_duration=None):
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(pipeline, "render_video", failing_render)
+
+    result = run_pipeline("video-1", "/uploads/clip.mp4")
+
+    assert result.outcome == Outcome.failed
+    assert not result.acknowledge
+    assert result.failed_stage == "encode"
+    assert result.error == "encoder crashed"
+    assert "publish" not in result.stage_seconds
+    worker.expire_all()
+    assert worker.get(Video, "video-1").status == VideoStatus.failed
+
+
+def test_missing_video_is_skipped(worker):
+    """Test that a message for an unknown video is acknowledged without running any stage after fetch"""
+    result = run_pipeline("missing", "/uploads/clip.mp4")
+
+    assert result.outcome == Outcome.skipped
+    assert result.acknowledge
+    assert list(result.stage_seconds) == ["fetch"]
+
+
+def test_retry_resumes_after_encoding(worker_dirs, uploaded_video_db, monkeypatch):
+    """Test that a job whose upload failed is retried without encoding again"""
+    renders = []
+
+    def fake_render(input_path, output_path, spec, stream_to=None, previews=None, source_duration=None):
+        renders.append(input_path)
+        with open(output_path, "wb") as f:
+            f.write(b"processed")
+        return "ffmpeg"
+
+    def failing_publish(source_path, directory, filename):
+        raise OSError("storage unavailable")
+
+    monkeypatch.setattr(pipeline, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(pipeline, "render_video", fake_render)
+    monkeypatch.setattr(pipeline, "publish_file", failing_publish)
+
+    assert sqs_worker.process_video("video-1", "/uploads/clip.mp4") is False
+    uploaded_video_db.expire_all()
+    assert uploaded_video_db.get(Video, "video-1").status == VideoStatus.failed
+    assert JobCheckpoint("video-1").resume_stage() == "uploaded"
+
+    from app.workers.workspace import publish_file
+    monkeypatch.setattr(pipeline, "publish_file", publish_file)
+
+    assert sqs_worker.process_video("video-1", "/uploads/clip.mp4") is True
+    uploaded_video_db.expire_all()
+    video = uploaded_video_db.get(Video, "video-1")
+    assert video.status == VideoStatus.processed
+    assert video.processed_path == os.path.join(settings.processed_dir, f"{output_name('video-1')}.mp4")
+    assert renders == ["/uploads/clip.mp4"]
+    assert not os.listdir(settings.worker_checkpoint_dir)
+
+
+def test_crashed_holder_is_resumed_on_redelivery(worker):
+    """Test that with the default settings the redelivery after a crash claims the video instead of finding it busy"""
+    assert VideoService.claim_video(worker, "video-1", "crashed-host:1",
+                                    lease_seconds=settings.video_claim_lease_seconds,
+                                    pipeline_version=settings.pipeline_version) == ClaimResult.claimed
+
+    # The crashed holder's last lease renewal and visibility extension came at most one
+    # heartbeat before the crash, so its message reappears this long after that renewal
+    redelivered_after = settings.sqs_visibility_timeout - settings.sqs_heartbeat_interval
+    video = worker.get(Video, "video-1")
+    video.lease_expires_at = video.lease_expires_at - timedelta(seconds=redelivered_after)
+    worker.commit()
+
+    result = run_pipeline("video-1", "/uploads/clip.mp4")
+
+    assert result.outcome == Outcome.processed
+    assert result.acknowledge
+
+
+def test_lease_renewal_extends_only_its_own_lease(worker):
+    """Test that a running job extends its lease and stops once another worker owns the video"""
+    assert VideoService.claim_video(worker, "video-1", LeaseRenewal("video-1").worker_id, lease_seconds=1,
+                                    pipeline_version=settings.pipeline_version) == ClaimResult.claimed
+    renewal = LeaseRenewal("video-1", lease_seconds=600, session_factory=TestingSessionLocal)
+
+    assert renewal.renew()
+    worker.expire_all()
+    video = worker.get(Video, "video-1")
+    assert video.lease_expires_at - video.updated_at > timedelta(seconds=500)
+
+    video.lease_owner = "other-host:2"
+    worker.commit()
+    assert not renewal.renew()
+
+
+def processed_at_previous_version(db, processed_path):
+    """Mark video-1 processed by the previous pipeline version, with its output at `processed_path`"""
+    with open(processed_path, "wb") as f:
+        f.write(b"old render")
+    VideoService.update_video_status(db, "video-1", VideoStatus.processed, processed_path=processed_path,
+                                     pipeline_version=settings.pipeline_version - 1)
+
+
+def test_reprocessing_replaces_the_published_output(worker, worker_dirs):
+    """Test that a re-render records the new output and deletes the one it supersedes"""
+    old_path = str(worker_dirs / "processed_video-1_v0.mp4")
+    processed_at_previous_version(worker, old_path)
+
+    result = run_pipeline("video-1", "/uploads/clip.mp4")
+
+    assert result.outcome == Outcome.processed
+    worker.expire_all()
+    video = worker.get(Video, "video-1")
+    assert video.processed_path == result.processed_path
+    assert video.pipeline_version == settings.pipeline_version
+    assert os.path.exists(result.processed_path)
+    assert not os.path.exists(old_path)
+
+
+def test_failed_reprocessing_keeps_the_published_output(worker, worker_dirs, monkeypatch):
+    """Test that a failed re-render leaves the video processed with its previous output"""
+    def failing_render(input_path, output_path, spec, stream_to=None, previews=None, source_duration=None):
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(pipeline, "render_video", failing_render)
+    old_path = str(worker_dirs / "processed_video-1_v0.mp4")
+    processed_at_previous_version(worker, old_path)
+
+    result = run_pipeline("video-1", "/uploads/clip.mp4")
+
+    assert result.outcome == Outcome.failed
+    worker.expire_all()
+    video = worker.get(Video, "video-1")
+    assert video.status == VideoStatus.processed
+    assert video.processed_path == old_path
+    assert video.pipeline_version == settings.pipeline_version - 1
+    assert video.lease_owner is None
+    assert os.path.exists(old_path)
+
+
+def test_hls_output_is_uploaded_by_publish(worker, monkeypatch):
+    """Test that the HLS ladder is rendered into the checkpoint by encode and stored by publish"""
+    def fake_hls(input_path, output_dir, spec, previews=None):
+        os.makedirs(os.path.join(output_dir, "v0"))
+        for name in ("master.m3u8", os.path.join("v0", "index.m3u8"), os.path.join("v0", "segment_000.ts")):
+            with open(os.path.join(output_dir, name), "wb") as f:
+                f.write(b"hls")
+        return True
+
+    monkeypatch.setattr(settings, "video_hls_enabled", True)
+    monkeypatch.setattr(settings, "video_engine", "ffmpeg")
+    monkeypatch.setattr(pipeline, "try_render_hls", fake_hls)
+
+    job = encode_phase(fetch_phase(VideoJob(video_id="video-1", video_path="/uploads/clip.mp4")))
+    assert job.outcome is None
+    assert not os.path.exists(settings.processed_dir) or not os.listdir(settings.processed_dir)
+
+    result = finish_phase(job)
+
+    assert result.outcome == Outcome.processed
+    assert result.processed_path == os.path.join(settings.processed_dir, output_name("video-1"), "master.m3u8")
+    assert os.path.exists(os.path.join(settings.processed_dir, output_name("video-1"), "v0", "segment_000.ts"))
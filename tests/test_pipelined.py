@@ -0,0 +1,80 @@
+import threading
+from app.workers.pipelined import PipelinedRunner
+
+
+def make_source(count):
+    """fetch() returning jobs 0..count-1, then nothing"""
+    jobs = iter(range(count))
+    return lambda: next(jobs, None)
+
+
+def test_every_job_is_encoded_and_finished_in_order():
+    """Test that fetched jobs go through encode and finish once, in order, before run returns"""
+    encoded, finished = [], []
+    stop = threading.Event()
+
+    def finish(job):
+        finished.append(job)
+        if len(finished) == 5:
+            stop.set()
+
+    PipelinedRunner(make_source(5), lambda job: encoded.append(job) or job, finish, stop.is_set).run()
+
+    assert encoded == [0, 1, 2, 3, 4]
+    assert finished == [0, 1, 2, 3, 4]
+
+
+def test_fetch_and_finish_overlap_the_encode():
+    """Test that the next job is fetched and the previous one finished while a job encodes"""
+    fetched = {job: threading.Event() for job in range(3)}
+    finished = {job: threading.Event() for job in range(3)}
+    overlapped = []
+    source = make_source(3)
+
+    def fetch():
+        job = source()
+        if job is not None:
+            fetched[job].set()
+        return job
+
+    def encode(job):
+        # Job 1 encodes only after job 0 was finished and job 2 fetched
+        if job == 1:
+            overlapped.append(finished[0].wait(timeout=5) and fetched[2].wait(timeout=5))
+        return job
+
+    PipelinedRunner(fetch, encode, lambda job: finished[job].set(),
+                    should_stop=lambda: all(event.is_set() for event in finished.values())).run()
+
+    assert overlapped == [True]
+
+
+def test_buffers_are_bounded():
+    """Test that jobs in flight never exceed prefetch + upload depth + one encoding + one finishing"""
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+    release_finish = threading.Event()
+    source = make_source(12)
+    done = []
+
+    def fetch():
+        job = source()
+        if job is not None:
+            with lock:
+                in_flight.append(job)
+                peak.append(len(in_flight))
+        return job
+
+    def finish(job):
+        # The finisher stalls until the pipeline is saturated, then drains
+        release_finish.wait(timeout=0.1)
+        with lock:
+            in_flight.remove(job)
+        done.append(job)
+
+    PipelinedRunner(fetch, lambda job: job, finish, should_stop=lambda: len(done) == 12,
+                    prefetch_depth=2, upload_depth=1).run()
+
+    assert max(peak) <= 2 + 1 + 2
+    assert sorted(done) == list(range(12))
@@ -0,0 +1,54 @@
+import json
+import pytest
+from app.core.database import Base
+from app.models.queue import QueueMessage, DeadLetterMessage
+from app.services.postgres_queue import PostgresQueueBackend
+from tests.conftest import engine, TestingSessionLocal
+
+
+@pytest.fixture
+def queue():
+    """PostgreSQL queue backend on the test database, without long polling"""
+    Base.metadata.create_all(bind=engine)
+    backend = PostgresQueueBackend(session_factory=TestingSessionLocal, queue_name="test_queue")
+    backend.wait_time_seconds = 0
+    backend.max_receive_count = 2
+    yield backend
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_send_and_receive_message(queue):
+    """Test that a received message is hidden until its visibility lease expires"""
+    message_id = queue.send_video_processing_message("video-1", "/app/uploads/a.mp4")
+
+    messages = queue.receive_messages(max_messages=10)
+
+    assert len(messages) == 1
+    assert messages[0]['MessageId'] == message_id
+    assert json.loads(messages[0]['Body'])['video_id'] == "video-1"
+    assert messages[0]['Attributes']['ApproximateReceiveCount'] == "1"
+    assert queue.receive_messages(max_messages=10) == []
+
+
+def test_delete_message(queue):
+    """Test that deleted messages leave the queue and stale handles are rejected"""
+    queue.send_messages_batch([("video-1", "a.mp4"), ("video-2", "b.mp4")])
+    handles = [message['ReceiptHandle'] for message in queue.receive_messages(max_messages=10)]
+
+    assert queue.delete_messages_batch(handles + ["stale"]) == ["stale"]
+    assert queue.get_queue_attributes()['ApproximateNumberOfMessagesNotVisible'] == "0"
+
+
+def test_message_is_dead_lettered_after_max_receives(queue):
+    """Test that a message received max_receive_count times moves to the dead-letter table"""
+    queue.send_video_processing_message("video-1", "a.mp4")
+
+    for _ in range(2):
+        handle = queue.receive_messages()[0]['ReceiptHandle']
+        assert queue.change_messages_visibility([handle], 0) == []
+
+    assert queue.receive_messages() == []
+    db = TestingSessionLocal()
+    assert db.query(QueueMessage).count() == 0
+    assert db.query(DeadLetterMessage).count() == 1
+    db.close()
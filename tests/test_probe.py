@@ -0,0 +1,80 @@
+import pytest
+from app.core.config import settings
+from app.workers.probe import SourceReadError, parse_source_info, probe_video
+from app.workers.rendering import RenderSpec, fit_to_source
+
+LANDSCAPE_480P = """
+Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'clip.mp4':
+  Duration: 00:00:12.50, start: 0.000000, bitrate: 198 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(progressive), 640x480 [SAR 1:1 DAR 4:3], 197 kb/s, 29.97 fps, 30 tbr, 15360 tbn (default)
+  Stream #0:1[0x2](und): Audio: aac (LC) (mp4a / 0x6134706D), 44100 Hz, stereo, fltp, 128 kb/s (default)
+"""
+
+ROTATED_PHONE = """
+Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'phone.mov':
+  Duration: 00:01:02.04, start: 0.000000, bitrate: 8000 kb/s
+  Stream #0:0[0x1](und): Video: hevc (Main) (hvc1 / 0x31637668), yuv420p(tv, bt709), 1920x1080, 7900 kb/s, 30 fps, 30 tbr, 600 tbn (default)
+      Side data:
+        displaymatrix: rotation of -90.00 degrees
+"""
+
+
+def test_parse_landscape_source():
+    """Test that size, duration, fps and codec are read from the input description"""
+    info = parse_source_info(LANDSCAPE_480P)
+
+    assert (info.width, info.height) == (640, 480)
+    assert info.duration == 12.5
+    assert info.fps == 29.97
+    assert info.codec == "h264"
+
+
+def test_parse_rotated_source_and_audio_only():
+    """Test that rotated phone video reports its displayed size and audio-only input has no info"""
+    info = parse_source_info(ROTATED_PHONE)
+
+    assert (info.width, info.height, info.rotation) == (1080, 1920, 270)
+    assert info.duration == 62.04
+    assert parse_source_info("Stream #0:0: Audio: aac, 44100 Hz") is None
+
+
+def test_output_tier_never_upscales(monkeypatch):
+    """Test that sources are rendered at the tallest tier not above their height"""
+    monkeypatch.setattr(settings, "video_output_heights", "360,480,720")
+    monkeypatch.setattr(settings, "video_resolution", "720p")
+    spec = RenderSpec(width=1280, height=720, watermark_width=100)
+
+    assert fit_to_source(spec, 1080) is spec
+    assert fit_to_source(spec, None) is spec
+
+    sd = fit_to_source(spec, 480)
+    assert (sd.width, sd.height, sd.watermark_width) == (854, 480, 67)
+    assert (fit_to_source(spec, 600).width, fit_to_source(spec, 600).height) == (854, 480)
+    # Below every tier the lowest one is used
+    assert fit_to_source(spec, 240).height == 360
+    assert fit_to_source(spec, 240).width == 640
+
+
+def test_unreachable_input_is_a_read_error(tmp_path):
+    """Test that a connection failure raises instead of looking like a file without video"""
+    with pytest.raises(SourceReadError, match="Connection refused"):
+        probe_video("http://127.0.0.1:9/clip.mp4")
+
+    garbage = tmp_path / "garbage.mp4"
+    garbage.write_bytes(b"not a video" * 100)
+    assert probe_video(str(garbage)) is None
+
+
+def test_read_errors_name_the_storage_path_not_the_url():
+    """Test that probe errors and warnings never include a presigned URL and its signature"""
+    url = "http://127.0.0.1:9/uploads/clip.mp4?X-Amz-Credential=AKIA%2Fexample&X-Amz-Signature=secret"
+
+    with pytest.raises(SourceReadError) as error:
+        probe_video(url, name="s3://bucket/uploads/clip.mp4")
+
+    assert "s3://bucket/uploads/clip.mp4" in str(error.value)
+    assert "X-Amz" not in str(error.value)
+
+    with pytest.raises(SourceReadError) as error:
+        probe_video(url, timeout=0, name="s3://bucket/uploads/clip.mp4")
+    assert "X-Amz" not in str(error.value)
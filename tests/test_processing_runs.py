@@ -0,0 +1,89 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.models.processing_run import ProcessingRun
+from app.services.processing_run_service import ProcessingRunService
+from app.workers import pipeline
+from app.workers.pipeline import STAGES, run_pipeline
+from tests.conftest import TestingSessionLocal
+
+
+def fake_render(input_path, output_path, spec, stream_to=None, previews=None, source_duration=None):
+    with open(output_path, "wb") as f:
+        f.write(b"processed")
+    return "ffmpeg"
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(settings, "admin_api_token", "admin-secret")
+    return {"X-Admin-Token": "admin-secret"}
+
+
+def add_runs(db, encode_seconds, outcome="processed"):
+    for seconds in encode_seconds:
+        ProcessingRunService.record_run(
+            db, video_id="video-1", outcome=outcome, fetch_seconds=0.5,
+            encode_seconds=seconds, total_seconds=seconds + 0.5
+        )
+
+
+def test_pipeline_records_its_run(worker_dirs, uploaded_video_db, tmp_path, monkeypatch):
+    """Test that a processed job stores its stage timings and sizes"""
+    source = tmp_path / "clip.mp4"
+    source.write_bytes(b"x" * 1000)
+    monkeypatch.setattr(pipeline, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(pipeline, "render_video", fake_render)
+    monkeypatch.setattr(pipeline, "probe_video", lambda input_path, name=None: None)
+
+    result = run_pipeline("video-1", str(source))
+
+    run = uploaded_video_db.query(ProcessingRun).one()
+    assert run.outcome == "processed"
+    assert run.input_bytes == 1000
+    assert run.output_bytes == len(b"processed")
+    assert run.engine == "ffmpeg"
+    for stage in STAGES:
+        assert getattr(run, f"{stage}_seconds") == pytest.approx(result.stage_seconds[stage])
+    assert run.total_seconds == pytest.approx(result.total_seconds)
+
+
+def test_stage_percentiles_interpolate_between_ranks(uploaded_video_db):
+    """Test that the percentiles match PostgreSQL's percentile_cont"""
+    add_runs(uploaded_video_db, [float(seconds) for seconds in range(1, 101)])
+    now = datetime.now(timezone.utc)
+
+    stats = ProcessingRunService.stage_percentiles(uploaded_video_db, now - timedelta(hours=1), now + timedelta(minutes=1))
+
+    assert stats["encode"] == {"count": 100, "p50": 50.5, "p95": pytest.approx(95.05), "p99": pytest.approx(99.01)}
+    assert stats["fetch"]["p99"] == 0.5
+    # Stages no run went through have no percentiles
+    assert stats["probe"] == {"count": 0, "p50": None, "p95": None, "p99": None}
+
+
+def test_stats_endpoint_requires_admin_token(client, monkeypatch):
+    """Test that the stats endpoint is disabled without a token and rejects a wrong one"""
+    assert client.get("/api/admin/processing-runs/stats").status_code == 403
+
+    monkeypatch.setattr(settings, "admin_api_token", "admin-secret")
+    response = client.get("/api/admin/processing-runs/stats", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+
+
+def test_stats_endpoint_reports_each_stage(client, admin_token):
+    """Test that the endpoint returns per-stage percentiles of the requested outcome"""
+    db = TestingSessionLocal()
+    add_runs(db, [10.0, 20.0, 30.0])
+    add_runs(db, [99.0], outcome="failed")
+    db.close()
+
+    response = client.get("/api/admin/processing-runs/stats", params={"hours": 1}, headers=admin_token)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["runs"] == {"processed": 3, "failed": 1}
+    stages = {item["stage"]: item for item in data["stages"]}
+    assert list(stages) == [*STAGES, "total"]
+    assert stages["encode"]["runs"] == 3
+    assert stages["encode"]["p50_seconds"] == 20.0
+    assert stages["transform"]["p50_seconds"] is None
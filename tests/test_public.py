@@ -58,4 +58,61 @@ def test_vote_with_invalid_token(client):
     })
     
     response = client.post("/api/public/videos/some-video-id/vote")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+
+def test_public_videos_include_previews(authenticated_client):
+    """Test that feed items carry the poster and sprite sheet URLs"""
+    from tests.conftest import TestingSessionLocal
+    from app.models.user import User
+    from app.models.video import Video, VideoStatus
+    client, token_data = authenticated_client
+    
+    db = TestingSessionLocal()
+    owner = db.query(User).first()
+    db.add(Video(
+        title="Clip", original_filename="clip.mp4", original_path="/uploads/clip.mp4",
+        status=VideoStatus.processed, owner_id=owner.id,
+        processed_path="https://bucket.example/processed_1.mp4",
+        thumbnail_path="https://bucket.example/processed_1_poster.jpg",
+        preview_path="https://bucket.example/processed_1_sprite.jpg"
+    ))
+    db.commit()
+    db.close()
+    
+    response = client.get("/api/public/videos")
+    
+    assert response.status_code == 200
+    video = response.json()[0]
+    assert video["thumbnail_url"] == "https://bucket.example/processed_1_poster.jpg"
+    assert video["preview_url"] == "https://bucket.example/processed_1_sprite.jpg"
+
+
+def test_local_preview_urls_are_served(authenticated_client, tmp_path):
+    """Test that the feed's local poster and sprite sheet URLs resolve to the stored images"""
+    from tests.conftest import TestingSessionLocal
+    from app.models.user import User
+    from app.models.video import Video, VideoStatus
+    client, token_data = authenticated_client
+    poster = tmp_path / "processed_1_poster.jpg"
+    poster.write_bytes(b"\xff\xd8poster")
+    
+    db = TestingSessionLocal()
+    owner = db.query(User).first()
+    db.add(Video(
+        title="Clip", original_filename="clip.mp4", original_path="/uploads/clip.mp4",
+        status=VideoStatus.processed, owner_id=owner.id,
+        processed_path=str(tmp_path / "processed_1.mp4"),
+        thumbnail_path=str(poster),
+        preview_path=str(tmp_path / "missing_sprite.jpg")
+    ))
+    db.commit()
+    db.close()
+    
+    video = client.get("/api/public/videos").json()[0]
+    
+    response = client.get(video["thumbnail_url"])
+    assert response.status_code == 200
+    assert response.content == b"\xff\xd8poster"
+    assert response.headers["content-type"] == "image/jpeg"
+    assert client.get(video["preview_url"]).status_code == 404
@@ -0,0 +1,95 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from redis.exceptions import ConnectionError
+from app.services.redis_queue import RedisStreamsQueueBackend
+
+
+def entry(entry_id, video_id):
+    return (entry_id.encode(), {b'body': json.dumps({"video_id": video_id, "video_path": "a.mp4"}).encode()})
+
+
+@pytest.fixture
+def client():
+    """Mocked redis client: no stalled entries, nothing new, pipelines return nothing"""
+    client = MagicMock()
+    client.xautoclaim.return_value = [b'0-0', [], []]
+    client.xreadgroup.return_value = []
+    client.pipeline.return_value.execute.return_value = []
+    return client
+
+
+@pytest.fixture
+def queue(client):
+    """Redis Streams backend on the mocked client, without long polling"""
+    backend = RedisStreamsQueueBackend(redis_client=client, stream="test_stream", group="workers", consumer="c1")
+    backend.wait_time_seconds = 0
+    backend.max_receive_count = 2
+    return backend
+
+
+def test_receive_takes_stalled_entries_before_new_ones(queue, client):
+    """Test that XAUTOCLAIM entries come first and only the remaining count is read"""
+    client.xautoclaim.return_value = [b'0-0', [entry("1000-0", "stalled"), (b"1001-0", None)], []]
+    client.xreadgroup.return_value = [[b'test_stream', [entry("2000-0", "new")]]]
+    client.pipeline.return_value.execute.return_value = [[{'times_delivered': 2}], [{'times_delivered': 1}]]
+
+    messages = queue.receive_messages(max_messages=3)
+
+    client.xautoclaim.assert_called_once_with(
+        "test_stream", "workers", "c1", min_idle_time=queue.visibility_timeout * 1000, start_id='0-0', count=3
+    )
+    # The entry deleted while pending is dropped; reclaimed entries never wait for new ones
+    client.xreadgroup.assert_called_once_with("workers", "c1", {"test_stream": '>'}, count=2, block=None)
+    assert [json.loads(message['Body'])['video_id'] for message in messages] == ["stalled", "new"]
+    assert messages[0]['ReceiptHandle'] == "1000-0"
+    assert messages[0]['Attributes'] == {'ApproximateReceiveCount': "2", 'SentTimestamp': "1000"}
+
+
+def test_receive_blocks_only_with_a_wait_time(queue, client):
+    """Test that a zero wait time never turns into BLOCK 0 (wait forever)"""
+    queue.receive_messages()
+    assert client.xreadgroup.call_args.kwargs['block'] is None
+
+    queue.wait_time_seconds = 20
+    queue.receive_messages()
+    assert client.xreadgroup.call_args.kwargs['block'] == 20000
+
+
+def test_entry_is_dead_lettered_after_max_receives(queue, client):
+    """Test that an entry delivered more than max_receive_count times moves to the dead-letter stream"""
+    client.xautoclaim.return_value = [b'0-0', [entry("1000-0", "poison")], []]
+    pipe = client.pipeline.return_value
+    pipe.execute.side_effect = [[[{'times_delivered': 3}]], [b"1-0", 1, 1]]
+
+    assert queue.receive_messages() == []
+
+    dead_letter = pipe.xadd.call_args
+    assert dead_letter.args[0] == "test_stream:dead"
+    assert dead_letter.args[1]['message_id'] == "1000-0"
+    assert dead_letter.args[1]['receive_count'] == 3
+    pipe.xack.assert_called_once_with("test_stream", "workers", "1000-0")
+    pipe.xdel.assert_called_once_with("test_stream", "1000-0")
+
+
+def test_delete_messages_batch(queue, client):
+    """Test that entries are acknowledged and removed in one round trip, failures returned"""
+    pipe = client.pipeline.return_value
+
+    assert queue.delete_messages_batch(["1-0", "2-0"]) == []
+    pipe.xack.assert_called_once_with("test_stream", "workers", "1-0", "2-0")
+    pipe.xdel.assert_called_once_with("test_stream", "1-0", "2-0")
+    pipe.execute.assert_called_once()
+
+    pipe.execute.side_effect = ConnectionError("down")
+    assert queue.delete_messages_batch(["3-0"]) == ["3-0"]
+
+
+def test_change_visibility_reclaims_entries(queue, client):
+    """Test that the heartbeat resets idle time with XCLAIM JUSTID and reports lost entries"""
+    client.xclaim.return_value = [b"1-0"]
+
+    assert queue.change_messages_visibility(["1-0", "2-0"], 300) == ["2-0"]
+    client.xclaim.assert_called_once_with(
+        "test_stream", "workers", "c1", min_idle_time=0, message_ids=["1-0", "2-0"], justid=True
+    )
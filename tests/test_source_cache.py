@@ -0,0 +1,81 @@
+import os
+import time
+from app.workers.source_cache import SourceCache
+
+
+class FakeS3Storage:
+    """Storage serving objects of a given size and ETag, recording downloads"""
+
+    def __init__(self, sizes, etags=None):
+        self.sizes = sizes
+        self.etags = etags if etags is not None else {key: "etag-1" for key in sizes}
+        self.downloads = []
+
+    def get_etag(self, s3_path):
+        return self.etags.get(s3_path)
+
+    def download_file(self, s3_path, local_path):
+        self.downloads.append(s3_path)
+        with open(local_path, "wb") as f:
+            f.write(b"x" * self.sizes[s3_path])
+        return True
+
+
+def test_repeated_downloads_hit_the_cache(tmp_path):
+    """Test that a second fetch of the same object is served from disk and counted"""
+    cache = SourceCache(root=str(tmp_path / "cache"), max_mb=1)
+    storage = FakeS3Storage({"s3://bucket/a.mp4": 1000})
+
+    assert cache.fetch(storage, "s3://bucket/a.mp4", str(tmp_path / "job1" / "a.mp4"))
+    assert cache.fetch(storage, "s3://bucket/a.mp4", str(tmp_path / "job2" / "a.mp4"))
+
+    assert storage.downloads == ["s3://bucket/a.mp4"]
+    assert os.path.getsize(tmp_path / "job2" / "a.mp4") == 1000
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bytes_saved"]) == (1, 1, 1000)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_replaced_object_is_downloaded_again(tmp_path):
+    """Test that a new ETag for the same key is a miss"""
+    cache = SourceCache(root=str(tmp_path / "cache"), max_mb=1)
+    storage = FakeS3Storage({"s3://bucket/a.mp4": 10})
+
+    cache.fetch(storage, "s3://bucket/a.mp4", str(tmp_path / "1.mp4"))
+    storage.etags["s3://bucket/a.mp4"] = "etag-2"
+    cache.fetch(storage, "s3://bucket/a.mp4", str(tmp_path / "2.mp4"))
+
+    assert len(storage.downloads) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Test that the cache stays under its size by dropping the oldest entries"""
+    cache = SourceCache(root=str(tmp_path / "cache"), max_mb=1)
+    half = 512 * 1024
+    storage = FakeS3Storage({"a": half, "b": half, "c": half})
+
+    cache.fetch(storage, "a", str(tmp_path / "a1"))
+    cache.fetch(storage, "b", str(tmp_path / "b1"))
+    # Touch "a" so that "b" is the least recently used when "c" arrives
+    past = time.time() - 60
+    os.utime(cache.entry_path("b", "etag-1"), (past, past))
+    cache.fetch(storage, "a", str(tmp_path / "a2"))
+    cache.fetch(storage, "c", str(tmp_path / "c1"))
+
+    assert os.path.exists(cache.entry_path("a", "etag-1"))
+    assert not os.path.exists(cache.entry_path("b", "etag-1"))
+    assert cache.stats()["size_bytes"] <= 1024 * 1024
+    # Evicting an entry leaves the jobs' links in place
+    assert os.path.getsize(tmp_path / "b1") == half
+
+
+def test_objects_without_etag_bypass_the_cache(tmp_path):
+    """Test that objects whose ETag cannot be read are downloaded directly"""
+    cache = SourceCache(root=str(tmp_path / "cache"), max_mb=1)
+    storage = FakeS3Storage({"a": 10}, etags={})
+
+    cache.fetch(storage, "a", str(tmp_path / "1"))
+    cache.fetch(storage, "a", str(tmp_path / "2"))
+
+    assert storage.downloads == ["a", "a"]
+    assert cache.stats()["hits"] == 0
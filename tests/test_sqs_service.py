@@ -0,0 +1,69 @@
+import pytest
+from app.services import sqs_service as sqs_module
+from app.services.sqs_service import SQSService
+
+
+class FakeSQSClient:
+    """Minimal stand-in for the boto3 SQS client used by SQSService"""
+
+    def __init__(self, fail_first_attempt=(), sender_fault=()):
+        self.fail_first_attempt = set(fail_first_attempt)
+        self.sender_fault = set(sender_fault)
+        self.batches = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.batches.append([entry['Id'] for entry in Entries])
+        successful, failed = [], []
+        for entry in Entries:
+            video_id = entry['MessageAttributes']['video_id']['StringValue']
+            if video_id in self.sender_fault:
+                failed.append({'Id': entry['Id'], 'SenderFault': True, 'Code': 'InvalidParameterValue'})
+            elif video_id in self.fail_first_attempt:
+                self.fail_first_attempt.discard(video_id)
+                failed.append({'Id': entry['Id'], 'SenderFault': False, 'Code': 'InternalError'})
+            else:
+                successful.append({'Id': entry['Id'], 'MessageId': f"msg-{video_id}"})
+        return {'Successful': successful, 'Failed': failed}
+
+
+@pytest.fixture
+def sqs_service(monkeypatch):
+    """SQSService wired to the fake client"""
+    monkeypatch.setattr(sqs_module.time, "sleep", lambda seconds: None)
+    service = SQSService()
+    service.queue_url = "https://sqs.us-east-1.amazonaws.com/123456789012/test-queue"
+    return service
+
+
+def test_send_messages_batch_splits_in_chunks_of_ten(sqs_service):
+    """Test that 25 videos are sent in three SendMessageBatch requests"""
+    sqs_service.sqs_client = FakeSQSClient()
+    videos = [(f"video-{i}", f"s3://bucket/uploads/{i}.mp4") for i in range(25)]
+
+    results = sqs_service.send_messages_batch(videos)
+
+    assert [len(batch) for batch in sqs_service.sqs_client.batches] == [10, 10, 5]
+    assert all(results[video_id] == f"msg-{video_id}" for video_id, _ in videos)
+
+
+def test_send_messages_batch_retries_partial_failures(sqs_service):
+    """Test that only the failed entries are retried"""
+    sqs_service.sqs_client = FakeSQSClient(fail_first_attempt={"video-3"})
+    videos = [(f"video-{i}", f"s3://bucket/uploads/{i}.mp4") for i in range(5)]
+
+    results = sqs_service.send_messages_batch(videos)
+
+    assert len(sqs_service.sqs_client.batches) == 2
+    assert len(sqs_service.sqs_client.batches[1]) == 1
+    assert results["video-3"] == "msg-video-3"
+
+
+def test_send_messages_batch_does_not_retry_sender_faults(sqs_service):
+    """Test that entries rejected as sender faults are not retried"""
+    sqs_service.sqs_client = FakeSQSClient(sender_fault={"video-1"})
+    videos = [("video-0", "a.mp4"), ("video-1", "b.mp4")]
+
+    results = sqs_service.send_messages_batch(videos)
+
+    assert len(sqs_service.sqs_client.batches) == 1
+    assert results == {"video-0": "msg-video-0", "video-1": None}
@@ -0,0 +1,144 @@
+import json
+import threading
+from concurrent.futures import Future
+from app.core.config import settings
+from app.workers import sqs_worker
+from app.workers.sqs_worker import SlotJob, _finish_slot_jobs, detect_concurrency
+
+
+class FakeHeartbeat:
+    def __init__(self, queue=None):
+        self.tracked = []
+        self.untracked = []
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def track(self, receipt_handle):
+        self.tracked.append(receipt_handle)
+
+    def untrack(self, receipt_handle):
+        self.untracked.append(receipt_handle)
+
+
+class FakePolicy:
+    class profile:
+        name = "quality"
+
+    def __init__(self, queue=None):
+        pass
+
+    def observe_message(self, message):
+        pass
+
+    def select(self):
+        return self.profile
+
+
+class FakeQueue:
+    """Queue holding `count` messages that stops the worker once they are all received"""
+
+    def __init__(self, count):
+        self.messages = [
+            {'MessageId': str(i), 'ReceiptHandle': f"handle-{i}",
+             'Body': json.dumps({"video_id": f"video-{i}", "video_path": "a.mp4"})}
+            for i in range(count)
+        ]
+        self.requested = []
+        self.deleted = []
+
+    def receive_messages(self, max_messages=1):
+        self.requested.append(max_messages)
+        batch, self.messages = self.messages[:max_messages], self.messages[max_messages:]
+        if not self.messages:
+            sqs_worker.shutdown_flag = True
+        return batch
+
+    def delete_messages_batch(self, receipt_handles):
+        self.deleted += receipt_handles
+        return []
+
+
+class FakePool:
+    """Pool whose jobs finish shortly after submission, recording how many run at once"""
+
+    def __init__(self, max_workers, **kwargs):
+        self.max_workers = max_workers
+        self.futures = []
+        self.max_running = 0
+
+    def submit(self, fn, *args):
+        self.max_running = max(self.max_running, 1 + sum(not future.done() for future in self.futures))
+        future = Future()
+        self.futures.append(future)
+        threading.Timer(0.05, future.set_result, args=(True,)).start()
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_detect_concurrency_respects_cgroup_limit(tmp_path, monkeypatch):
+    """Test that slots are bounded by CPUs and by the container memory limit"""
+    memory_max = tmp_path / "memory.max"
+    monkeypatch.setattr(sqs_worker, "CGROUP_MEMORY_MAX", str(memory_max))
+    monkeypatch.setattr(sqs_worker.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "worker_slot_memory_mb", 700)
+
+    memory_max.write_text(f"{3 * 700 * 1024 * 1024}\n")
+    assert detect_concurrency() == 3
+
+    memory_max.write_text("max\n")
+    # 64GB host
+    monkeypatch.setattr(sqs_worker.os, "sysconf", lambda name: 4096 if name == 'SC_PAGE_SIZE' else 16 * 1024 ** 2)
+    assert detect_concurrency() == 8
+
+    memory_max.write_text(f"{100 * 1024 * 1024}\n")
+    assert detect_concurrency() == 1
+
+
+def test_pool_worker_never_receives_more_than_free_slots(monkeypatch):
+    """Test that the pool loop only asks for as many messages as it has free slots"""
+    queue = FakeQueue(count=7)
+    pools = []
+    monkeypatch.setattr(sqs_worker, "shutdown_flag", False)
+    monkeypatch.setattr(sqs_worker, "worker_queue", lambda: queue)
+    monkeypatch.setattr(sqs_worker, "VisibilityHeartbeat", FakeHeartbeat)
+    monkeypatch.setattr(sqs_worker, "BacklogEncodingPolicy", FakePolicy)
+    monkeypatch.setattr(sqs_worker, "has_scratch_capacity", lambda: True)
+    monkeypatch.setattr(sqs_worker, "RecyclingProcessPool",
+                        lambda **kwargs: pools.append(FakePool(**kwargs)) or pools[-1])
+
+    sqs_worker.run_pool_worker(slots=2)
+
+    assert queue.requested[0] == 2
+    assert all(1 <= requested <= 2 for requested in queue.requested)
+    assert pools[0].max_running <= 2
+    assert sorted(queue.deleted) == sorted(f"handle-{i}" for i in range(7))
+
+
+def test_finish_slot_jobs_deletes_only_successes():
+    """Test that finished slots are untracked and only successful messages are deleted, in one batch"""
+    queue = FakeQueue(count=0)
+    heartbeat = FakeHeartbeat()
+    outcomes = {"handle-ok": True, "handle-retry": False, "handle-crash": RuntimeError("child died")}
+    active_jobs = {}
+    for slot, (handle, outcome) in enumerate(outcomes.items()):
+        future = Future()
+        if isinstance(outcome, Exception):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+        active_jobs[future] = SlotJob(slot=slot, message={'ReceiptHandle': handle})
+
+    _finish_slot_jobs(queue, heartbeat, list(active_jobs), active_jobs)
+
+    assert queue.deleted == ["handle-ok"]
+    assert sorted(heartbeat.untracked) == sorted(outcomes)
+    assert active_jobs == {}
@@ -0,0 +1,95 @@
+import os
+import pytest
+from app.workers import supervisor
+from app.workers.supervisor import RecyclingProcessPool, current_rss_mb
+
+# Memory a job keeps alive in its child, like a leak across jobs
+_leaked = []
+
+
+def leak_memory(mb):
+    _leaked.append(bytearray(os.urandom(1024)) * (mb * 1024))
+    return os.getpid()
+
+
+def crash():
+    os._exit(1)
+
+
+def fail():
+    raise ValueError("bad input")
+
+
+def run(pool, fn, *args):
+    return pool.submit(fn, *args).result(timeout=30)
+
+
+def test_child_is_recycled_after_max_jobs():
+    """Test that a child runs at most max_jobs jobs and reports its peak memory"""
+    with RecyclingProcessPool(max_workers=1, max_jobs=2) as pool:
+        pids = [run(pool, os.getpid) for _ in range(5)]
+        recycled = list(pool.child_stats)
+
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert os.getpid() not in pids
+    assert [stats.exit_reason for stats in recycled] == ["job limit", "job limit"]
+    assert all(stats.peak_rss_mb > 0 for stats in recycled)
+    assert pool.child_stats[-1].exit_reason == "shutdown"
+
+
+def test_child_is_recycled_when_rss_crosses_threshold():
+    """Test that a child whose RSS grows past max_rss_mb is replaced after its job"""
+    with RecyclingProcessPool(max_workers=1) as pool:
+        child_rss_mb = run(pool, current_rss_mb)
+
+    with RecyclingProcessPool(max_workers=1, max_rss_mb=int(child_rss_mb) + 100) as pool:
+        first = run(pool, leak_memory, 10)
+        assert run(pool, leak_memory, 10) == first
+        leaking = run(pool, leak_memory, 150)
+        after = run(pool, os.getpid)
+
+    assert leaking == first
+    assert after != first
+    assert pool.child_stats[0].exit_reason.startswith("RSS")
+    assert pool.child_stats[0].peak_rss_mb >= 150
+
+
+def test_job_errors_and_dead_children():
+    """Test that job exceptions reach the future and a dead child is replaced"""
+    with RecyclingProcessPool(max_workers=1) as pool:
+        first = run(pool, os.getpid)
+        with pytest.raises(ValueError):
+            run(pool, fail)
+        assert run(pool, os.getpid) == first
+
+        with pytest.raises(RuntimeError, match="died"):
+            run(pool, crash)
+        assert run(pool, os.getpid) != first
+
+
+def test_child_start_failure_fails_the_job(monkeypatch):
+    """Test that a child that cannot be started fails the job instead of leaving its future pending"""
+    real_child = supervisor._Child
+    attempts = []
+
+    def flaky_child(context, initializer):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError(12, "Cannot allocate memory")
+        return real_child(context, initializer)
+
+    monkeypatch.setattr(supervisor, "_Child", flaky_child)
+    with RecyclingProcessPool(max_workers=1) as pool:
+        with pytest.raises(RuntimeError, match="Could not start a worker child"):
+            run(pool, os.getpid)
+        # The slot is still usable
+        assert run(pool, os.getpid) != os.getpid()
+
+
+def test_children_start_from_a_forkserver():
+    """Test that children are not forked from the threaded parent and jobs must be importable"""
+    with RecyclingProcessPool(max_workers=1) as pool:
+        assert pool._context.get_start_method() == "forkserver"
+        with pytest.raises(Exception, match="pickle"):
+            run(pool, lambda: os.getpid())
+        assert run(pool, os.getpid) != os.getpid()
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+from app.models.video import Video, VideoStatus
+from app.services.video_service import VideoService, ClaimResult
+
+
+def claim(db, worker_id="worker-a", pipeline_version=1):
+    return VideoService.claim_video(db, "video-1", worker_id, lease_seconds=600,
+                                    pipeline_version=pipeline_version)
+
+
+def test_claim_uploaded_video_once(uploaded_video_db):
+    """Test that only the first delivery claims the video"""
+    assert claim(uploaded_video_db, "worker-a") == ClaimResult.claimed
+    assert claim(uploaded_video_db, "worker-b") == ClaimResult.claimed_by_other
+
+    video = uploaded_video_db.query(Video).filter(Video.id == "video-1").first()
+    uploaded_video_db.refresh(video)
+    assert video.status == VideoStatus.processing
+    assert video.lease_owner == "worker-a"
+
+
+def test_claim_expired_lease_is_reclaimed(uploaded_video_db):
+    """Test that a video stuck in processing can be claimed after its lease expires"""
+    assert claim(uploaded_video_db, "worker-a") == ClaimResult.claimed
+    video = uploaded_video_db.query(Video).filter(Video.id == "video-1").first()
+    video.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    uploaded_video_db.commit()
+
+    assert claim(uploaded_video_db, "worker-b") == ClaimResult.claimed
+
+
+def test_claim_skips_processed_video(uploaded_video_db):
+    """Test that processed videos are only claimed for a newer pipeline version"""
+    assert claim(uploaded_video_db) == ClaimResult.claimed
+    VideoService.update_video_status(uploaded_video_db, "video-1", VideoStatus.processed,
+                                     processed_path="/tmp/out.mp4", pipeline_version=1)
+
+    assert claim(uploaded_video_db, pipeline_version=1) == ClaimResult.already_processed
+    assert claim(uploaded_video_db, pipeline_version=2) == ClaimResult.claimed
+
+
+def test_reprocessed_video_stays_public(uploaded_video_db):
+    """Test that claiming a processed video for a newer pipeline leases it without unpublishing it"""
+    assert claim(uploaded_video_db) == ClaimResult.claimed
+    VideoService.update_video_status(uploaded_video_db, "video-1", VideoStatus.processed,
+                                     processed_path="/tmp/out.mp4", pipeline_version=1)
+
+    assert claim(uploaded_video_db, "worker-a", pipeline_version=2) == ClaimResult.claimed
+    assert claim(uploaded_video_db, "worker-b", pipeline_version=2) == ClaimResult.claimed_by_other
+
+    video = uploaded_video_db.query(Video).filter(Video.id == "video-1").first()
+    uploaded_video_db.refresh(video)
+    assert video.status == VideoStatus.processed
+    assert video.processed_path == "/tmp/out.mp4"
+    assert video.lease_owner == "worker-a"
+
+
+def test_processed_output_replaces_previews(uploaded_video_db):
+    """Test that recording an output without previews clears the previews of the one it replaces"""
+    VideoService.update_video_status(uploaded_video_db, "video-1", VideoStatus.processed,
+                                     processed_path="/tmp/v1.mp4", thumbnail_path="/tmp/v1_poster.jpg",
+                                     preview_path="/tmp/v1_sprite.jpg")
+    VideoService.update_video_status(uploaded_video_db, "video-1", VideoStatus.processed,
+                                     processed_path="/tmp/v2.mp4")
+
+    video = uploaded_video_db.query(Video).filter(Video.id == "video-1").first()
+    assert video.processed_path == "/tmp/v2.mp4"
+    assert video.thumbnail_path is None
+    assert video.preview_path is None
+
+
+def test_claim_missing_video(uploaded_video_db):
+    """Test claiming a video that no longer exists"""
+    result = VideoService.claim_video(uploaded_video_db, "missing", "worker-a", lease_seconds=600,
+                                      pipeline_version=1)
+    assert result == ClaimResult.not_found
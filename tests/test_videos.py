@@ -125,4 +125,32 @@ def test_get_videos_with_invalid_token(client):
     })
     
     response = client.get("/api/videos")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_delete_video_removes_previews(authenticated_client, tmp_path):
+    """Test that deleting a processed video also deletes its poster and sprite sheet"""
+    from tests.conftest import TestingSessionLocal
+    from app.models.user import User
+    from app.models.video import Video, VideoStatus
+    client, token_data = authenticated_client
+    files = [tmp_path / name for name in ("clip.mp4", "processed_1.mp4", "processed_1_poster.jpg",
+                                          "processed_1_sprite.jpg")]
+    for path in files:
+        path.write_bytes(b"data")
+    
+    db = TestingSessionLocal()
+    owner = db.query(User).first()
+    video = Video(
+        title="Clip", original_filename="clip.mp4", original_path=str(files[0]),
+        status=VideoStatus.processed, owner_id=owner.id, processed_path=str(files[1]),
+        thumbnail_path=str(files[2]), preview_path=str(files[3])
+    )
+    db.add(video)
+    db.commit()
+    video_id = video.id
+    db.close()
+    
+    response = client.delete(f"/api/videos/{video_id}")
+    
+    assert response.status_code == 200
+    assert [path for path in files if path.exists()] == []
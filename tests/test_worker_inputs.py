@@ -0,0 +1,48 @@
+from app.core.config import settings
+from app.workers.inputs import resolve_input
+
+
+class FakeS3Storage:
+    """Storage that records downloads and can presign URLs"""
+
+    def __init__(self, presign=True):
+        self.presign = presign
+        self.downloads = []
+
+    def generate_presigned_url(self, s3_path):
+        return f"https://bucket.example/{s3_path[5:]}?X-Amz-Signature=abc" if self.presign else None
+
+    def download_file(self, s3_path, local_path):
+        self.downloads.append(local_path)
+        return True
+
+
+def test_local_paths_are_read_in_place(monkeypatch):
+    """Test that local originals are neither downloaded nor copied"""
+    monkeypatch.setattr(settings, "worker_input_mode", "stream")
+
+    assert resolve_input(FakeS3Storage(), "/app/uploads/video.mp4") == ("/app/uploads/video.mp4", None)
+
+
+def test_stream_mode_reads_presigned_url(monkeypatch):
+    """Test that stream mode hands the decoder a presigned URL instead of downloading"""
+    monkeypatch.setattr(settings, "worker_input_mode", "stream")
+    storage = FakeS3Storage()
+
+    path, local_copy = resolve_input(storage, "s3://bucket/uploads/video.mp4")
+
+    assert path.startswith("https://bucket.example/bucket/uploads/video.mp4")
+    assert local_copy is None
+    assert storage.downloads == []
+
+
+def test_download_mode_and_presign_failure_download(monkeypatch):
+    """Test that originals are downloaded in download mode or when presigning fails"""
+    monkeypatch.setattr(settings, "worker_input_mode", "download")
+    path, local_copy = resolve_input(FakeS3Storage(), "s3://bucket/uploads/video.mp4")
+    assert path == local_copy and path.startswith("/tmp/")
+
+    monkeypatch.setattr(settings, "worker_input_mode", "stream")
+    storage = FakeS3Storage(presign=False)
+    path, local_copy = resolve_input(storage, "s3://bucket/uploads/video.mp4")
+    assert storage.downloads == [local_copy]
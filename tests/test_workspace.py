@@ -0,0 +1,82 @@
+import errno
+import os
+import pytest
+from app.core.config import settings
+from app.workers import workspace as workspace_module
+from app.workers.checkpoints import checkpoint_root
+from app.workers.workspace import JobWorkspace, has_scratch_capacity, publish_file
+
+
+@pytest.fixture(autouse=True)
+def scratch_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "worker_scratch_dir", str(tmp_path / "scratch"))
+    return tmp_path / "scratch"
+
+
+def test_workspace_removed_on_error(scratch_dir):
+    """Test that the scratch directory is removed even when the job fails"""
+    with pytest.raises(RuntimeError):
+        with JobWorkspace("video-1") as workspace:
+            with open(workspace.file("original.mp4"), "wb") as f:
+                f.write(b"data")
+            raise RuntimeError("encoder failed")
+
+    assert os.listdir(scratch_dir) == []
+
+
+def test_publish_file_renames_into_place(tmp_path):
+    """Test that outputs are moved into the destination directory"""
+    with JobWorkspace("video-1") as workspace:
+        with open(workspace.file("out.mp4"), "wb") as f:
+            f.write(b"video")
+
+        published = publish_file(workspace.file("out.mp4"), str(tmp_path / "processed"), "out.mp4")
+
+        assert not os.path.exists(workspace.file("out.mp4"))
+    with open(published, "rb") as f:
+        assert f.read() == b"video"
+
+
+def test_publish_file_across_filesystems(tmp_path, monkeypatch):
+    """Test the copy-then-rename fallback when the rename crosses filesystems"""
+    source = tmp_path / "out.mp4"
+    source.write_bytes(b"video")
+    real_replace = os.replace
+    calls = []
+
+    def replace(src, dst):
+        calls.append(src)
+        if len(calls) == 1:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(workspace_module.os, "replace", replace)
+
+    published = publish_file(str(source), str(tmp_path / "processed"), "out.mp4")
+
+    assert not source.exists()
+    assert open(published, "rb").read() == b"video"
+    assert os.listdir(tmp_path / "processed") == ["out.mp4"]
+
+
+def test_admission_check():
+    """Test the free space check of the scratch volume"""
+    assert has_scratch_capacity(required_mb=0) is True
+    assert has_scratch_capacity(required_mb=10 ** 12) is False
+
+
+def test_admission_check_covers_checkpoint_volume(tmp_path, monkeypatch):
+    """Test that checkpoints default to the scratch volume and a separate one is measured too"""
+    monkeypatch.setattr(settings, "worker_checkpoint_dir", "")
+    assert checkpoint_root() == os.path.join(settings.worker_scratch_dir, "checkpoints")
+
+    checkpoints = str(tmp_path / "checkpoints")
+    monkeypatch.setattr(settings, "worker_checkpoint_dir", checkpoints)
+    real_disk_usage = workspace_module.shutil.disk_usage
+
+    def disk_usage(path):
+        usage = real_disk_usage(path)
+        return usage._replace(free=0) if path == checkpoints else usage
+
+    monkeypatch.setattr(workspace_module.shutil, "disk_usage", disk_usage)
+    assert has_scratch_capacity(required_mb=1) is False